@@ -0,0 +1,199 @@
+"""
+Ingestion benchmark over synthetic repositories.
+
+Generates a deterministic local git repo, then drives the /upload-repo path stage by
+stage (clone, walk, chunk, embed, vector write) and reports wall time,
+throughput and peak RSS per stage.
+
+Run from the backend folder:
+    python -m benchmarks.ingest_benchmark --files 500 --file-size 4000 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+
+def _current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        # No /proc (e.g. macOS): fall back to the process-wide peak
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class RSSSampler:
+    """
+    Samples RSS in a background thread so each stage can report its own peak.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _current_rss_mb())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.peak = _current_rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _current_rss_mb())
+
+
+class StageReport:
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Times a stage; the body sets `record["files"]` / `record["chunks"]` for throughput.
+        """
+        record = {"stage": name}
+        with RSSSampler() as sampler:
+            start = time.perf_counter()
+            yield record
+            elapsed = time.perf_counter() - start
+        record["wall_s"] = round(elapsed, 4)
+        record["peak_rss_mb"] = round(sampler.peak, 1)
+        for unit in ("files", "chunks"):
+            if unit in record:
+                record[f"{unit}_per_s"] = round(record[unit] / elapsed, 1) if elapsed else None
+        self.stages.append(record)
+        print(f"⏱️ {name:<14} {elapsed:8.3f}s  {record.get('files', ''):>7} files  "
+              f"{record.get('chunks', ''):>8} chunks  peak RSS {record['peak_rss_mb']} MB")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200, help="number of synthetic source files")
+    parser.add_argument("--file-size", type=int, default=4000, help="approximate bytes per file")
+    parser.add_argument("--languages", default="py:0.5,js:0.3,md:0.2", help='language mix, e.g. "py:0.5,js:0.3,md:0.2"')
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=None, help="chunks per embedding call")
+    parser.add_argument("--chunk-workers", type=int, default=None, help="chunking processes (1 = serial)")
+    parser.add_argument("--embedder", choices=["stub", "model"], default="stub",
+                        help="stub = deterministic hashing embedder (no download); model = real SentenceTransformer")
+    parser.add_argument("--skip-vector-store", action="store_true", help="don't write to Chroma")
+    parser.add_argument("--workdir", default=None, help="where to generate the repo (default: a temp dir)")
+    parser.add_argument("--keep", action="store_true", help="keep the work dir afterwards")
+    parser.add_argument("--output", default=None, help="write the JSON report here (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Settings are read at import time, so configure them before importing services
+    if args.embedder == "stub":
+        os.environ["EMBEDDING_BACKEND"] = "hash"
+    os.environ["EMBED_CACHE_ENABLED"] = "0"
+    if args.batch_size:
+        os.environ["EMBED_BATCH_SIZE"] = str(args.batch_size)
+    if args.chunk_workers:
+        os.environ["CHUNK_WORKERS"] = str(args.chunk_workers)
+
+    from benchmarks.synthetic_repo import generate_repo
+    from config.settings import EMBED_BATCH_SIZE, CHUNK_WORKERS
+    from services.repo_processor import clone_repo
+    from services.repo_scanner import scan_repo
+    from services.chunker import chunk_files
+    from services.ingestion import PREAMBLE_TEMPLATE, chunk_id, iter_batches
+    from services.embedder import get_embeddings
+    from services.vector_db import ChromaDBWrapper
+
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="ingest-bench-"))
+    os.makedirs(workdir, exist_ok=True)
+    previous_cwd = os.getcwd()
+    report = StageReport()
+
+    try:
+        print(f"🧪 Generating {args.files} files (~{args.file_size} B, {args.languages}) in {workdir}")
+        source = generate_repo(os.path.join(workdir, "source"), files=args.files, file_size=args.file_size,
+                               languages=args.languages, seed=args.seed)
+        # clone_repo writes to ./temp, so run the pipeline inside the work dir
+        os.chdir(workdir)
+
+        with report.stage("clone") as record:
+            repo_path = clone_repo(source, repo_name="bench_repo")
+            record["files"] = args.files
+
+        with report.stage("walk") as record:
+            scan = scan_repo(repo_path)
+            files = scan.files
+            record["files"] = len(files)
+            record["skipped"] = len(scan.skipped)
+
+        with report.stage("chunk") as record:
+            chunks = []
+            for _, file_chunks in chunk_files(files, preamble_template=PREAMBLE_TEMPLATE):
+                for i, chunk in enumerate(file_chunks):
+                    chunk.metadata["chunk_index"] = i
+                    chunks.append(chunk)
+            record["files"] = len(files)
+            record["chunks"] = len(chunks)
+
+        with report.stage("embed") as record:
+            embeddings = []
+            for batch in iter_batches([c.page_content for c in chunks], EMBED_BATCH_SIZE):
+                embeddings.extend(get_embeddings(batch, batch_size=EMBED_BATCH_SIZE))
+            record["chunks"] = len(embeddings)
+
+        if not args.skip_vector_store:
+            db = ChromaDBWrapper(persist_path=os.path.join(workdir, "chroma_store"), collection_name="bench_chunks")
+            with report.stage("vector_write") as record:
+                for batch in iter_batches(list(zip(chunks, embeddings)), EMBED_BATCH_SIZE):
+                    db.add_chunks([c.page_content for c, _ in batch], [e for _, e in batch],
+                                  [c.metadata for c, _ in batch], ids=[chunk_id(c, "bench_repo") for c, _ in batch])
+                record["chunks"] = len(chunks)
+    finally:
+        os.chdir(previous_cwd)
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        "params": {
+            "files": args.files,
+            "file_size": args.file_size,
+            "languages": args.languages,
+            "seed": args.seed,
+            "batch_size": EMBED_BATCH_SIZE,
+            "chunk_workers": CHUNK_WORKERS,
+            "embedder": args.embedder,
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "stages": report.stages,
+        "total_wall_s": round(sum(stage["wall_s"] for stage in report.stages), 4),
+    }
+
+    payload = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+        print(f"📝 Report written to {args.output}")
+    else:
+        print(payload)
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import os
+import random
+from typing import Dict
+from git import Repo
+
+# Templates per language; {name}, {other} and {n} are filled with generated identifiers
+TEMPLATES = {
+    "py": (
+        "def {name}(value, limit={n}):\n"
+        "    \"\"\"Process value with {other}.\"\"\"\n"
+        "    result = []\n"
+        "    for item in range(limit):\n"
+        "        result.append({other}(item, value))\n"
+        "    return result\n\n"
+    ),
+    "js": (
+        "function {name}(value, limit = {n}) {{\n"
+        "  // Process value with {other}\n"
+        "  const result = [];\n"
+        "  for (let i = 0; i < limit; i++) {{\n"
+        "    result.push({other}(i, value));\n"
+        "  }}\n"
+        "  return result;\n"
+        "}}\n\n"
+    ),
+    "ts": (
+        "export function {name}(value: number, limit: number = {n}): number[] {{\n"
+        "  const result: number[] = [];\n"
+        "  for (let i = 0; i < limit; i++) {{\n"
+        "    result.push({other}(i, value));\n"
+        "  }}\n"
+        "  return result;\n"
+        "}}\n\n"
+    ),
+    "go": (
+        "func {name}(value int, limit int) []int {{\n"
+        "\tresult := make([]int, 0, {n})\n"
+        "\tfor i := 0; i < limit; i++ {{\n"
+        "\t\tresult = append(result, {other}(i, value))\n"
+        "\t}}\n"
+        "\treturn result\n"
+        "}}\n\n"
+    ),
+    "java": (
+        "    public static int[] {name}(int value, int limit) {{\n"
+        "        int[] result = new int[{n}];\n"
+        "        for (int i = 0; i < limit; i++) {{\n"
+        "            result[i] = {other}(i, value);\n"
+        "        }}\n"
+        "        return result;\n"
+        "    }}\n\n"
+    ),
+    "md": (
+        "## {name}\n\n"
+        "The `{name}` step calls `{other}` up to {n} times and collects the results.\n"
+        "It is part of the synthetic benchmark corpus.\n\n"
+    ),
+}
+
+WORDS = ["user", "order", "cache", "index", "parse", "render", "fetch", "token", "config",
+         "stream", "batch", "vector", "query", "report", "session", "payload", "metric", "route"]
+
+
+def parse_language_mix(spec: str) -> Dict[str, float]:
+    """
+    Parses "py:0.5,js:0.3,md:0.2" into normalized weights.
+    """
+    mix = {}
+    for part in spec.split(","):
+        lang, _, weight = part.partition(":")
+        lang = lang.strip()
+        if lang not in TEMPLATES:
+            raise ValueError(f"Unsupported language '{lang}', pick from {sorted(TEMPLATES)}")
+        mix[lang] = float(weight or 1)
+    total = sum(mix.values())
+    return {lang: weight / total for lang, weight in mix.items()}
+
+
+def _identifier(rng: random.Random) -> str:
+    first, second = rng.sample(WORDS, 2)
+    return f"{first}_{second}_{rng.randint(0, 9999)}"
+
+
+def _file_body(lang: str, size: int, rng: random.Random) -> str:
+    parts, length = [], 0
+    if lang == "java":
+        parts.append(f"public class Synthetic{rng.randint(0, 99999)} {{\n\n")
+    while length < size:
+        block = TEMPLATES[lang].format(name=_identifier(rng), other=_identifier(rng), n=rng.randint(1, 500))
+        parts.append(block)
+        length += len(block)
+    if lang == "java":
+        parts.append("}\n")
+    return "".join(parts)
+
+
+def generate_repo(path: str, files: int = 200, file_size: int = 4000,
+                  languages: str = "py:0.5,js:0.3,md:0.2", files_per_dir: int = 25, seed: int = 42) -> str:
+    """
+    Writes a deterministic synthetic repo to `path` and commits it as a local git repo.
+
+    Args:
+        path: Directory to create.
+        files: Number of source files.
+        file_size: Approximate size of each file in bytes.
+        languages: Language mix, e.g. "py:0.5,js:0.3,md:0.2".
+        files_per_dir: Files per package directory.
+        seed: RNG seed; the same arguments always produce the same repo.
+
+    Returns:
+        str: Path of the generated repo.
+    """
+    rng = random.Random(seed)
+    mix = parse_language_mix(languages)
+    langs, weights = list(mix), list(mix.values())
+
+    os.makedirs(path, exist_ok=True)
+    for i in range(files):
+        lang = rng.choices(langs, weights)[0]
+        directory = os.path.join(path, "src", f"pkg{i // files_per_dir:04d}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"module_{i:05d}.{lang}"), "w", encoding="utf-8") as f:
+            f.write(_file_body(lang, file_size, rng))
+
+    repo = Repo.init(path)
+    repo.git.add(A=True)
+    repo.git.commit("-m", "Synthetic benchmark repo", author="bench <bench@example.com>",
+                    env={"GIT_COMMITTER_NAME": "bench", "GIT_COMMITTER_EMAIL": "bench@example.com"})
+    return path
@@ -0,0 +1,165 @@
+"""
+Vector store benchmark: Chroma vs the in-process NumPy store.
+
+Generates clustered synthetic embeddings (similar to code chunks: many near
+neighbours per query), loads them into each backend, then reports build time,
+query latency (p50/p95/mean over single queries), recall@k against exact
+float32 search, and size on disk.
+
+Run from the backend folder:
+    python -m benchmarks.vector_store_benchmark --chunks 100000 --queries 200 --output vectors.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+BACKENDS = ("chroma", "numpy-float16", "numpy-int8")
+
+
+def make_dataset(chunks: int, dim: int, queries: int, clusters: int, seed: int):
+    """
+    Unit vectors drawn around `clusters` centres; queries are perturbed copies of
+    random dataset vectors.
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, size=chunks)] + 0.6 * rng.normal(size=(chunks, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    picks = rng.integers(0, chunks, size=queries)
+    query_vectors = vectors[picks] + 0.3 / np.sqrt(dim) * rng.normal(size=(queries, dim)).astype(np.float32)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    return vectors, query_vectors
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, top_k: int) -> np.ndarray:
+    scores = queries @ vectors.T
+    top = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def dir_size_mb(path: str) -> float:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return round(total / (1024 * 1024), 1)
+
+
+def open_store(backend: str, path: str):
+    if backend == "chroma":
+        from services.vector_db import ChromaDBWrapper
+        return ChromaDBWrapper(persist_path=path, collection_name="bench_vectors")
+    from services.numpy_store import NumpyVectorStore
+    return NumpyVectorStore(path, dtype=backend.split("-", 1)[1])
+
+
+def run_backend(backend: str, workdir: str, vectors: np.ndarray, queries: np.ndarray,
+                truth: np.ndarray, top_k: int, batch_size: int) -> dict:
+    path = os.path.join(workdir, backend)
+    store = open_store(backend, path)
+    ids = [f"chunk-{i}" for i in range(len(vectors))]
+
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), batch_size):
+        end = offset + batch_size
+        store.add_chunks(
+            [f"chunk {i}" for i in range(offset, min(end, len(vectors)))],
+            vectors[offset:end].tolist(),
+            [{"source": f"file_{i // 20}.py"} for i in range(offset, min(end, len(vectors)))],
+            ids=ids[offset:end],
+        )
+    build_s = time.perf_counter() - start
+
+    # One untimed query so lazy index loading doesn't count as latency
+    store.similarity_search(queries[0].tolist(), top_k=top_k)
+
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        results = store.similarity_search(query.tolist(), top_k=top_k)
+        latencies.append(time.perf_counter() - start)
+        found = {int(doc_id.rsplit("-", 1)[1]) for doc_id in results["ids"][0]}
+        hits += len(found & set(expected.tolist()))
+
+    latencies_ms = np.asarray(latencies) * 1000
+    record = {
+        "backend": backend,
+        "build_s": round(build_s, 3),
+        "query_ms_p50": round(float(np.percentile(latencies_ms, 50)), 3),
+        "query_ms_p95": round(float(np.percentile(latencies_ms, 95)), 3),
+        "query_ms_mean": round(float(latencies_ms.mean()), 3),
+        f"recall_at_{top_k}": round(hits / (len(queries) * top_k), 4),
+        "disk_mb": dir_size_mb(path),
+    }
+    print(f"⏱️ {backend:<14} build {record['build_s']:8.2f}s  p50 {record['query_ms_p50']:8.3f} ms  "
+          f"p95 {record['query_ms_p95']:8.3f} ms  recall@{top_k} {record[f'recall_at_{top_k}']:.4f}  "
+          f"{record['disk_mb']} MB")
+    return record
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=100000, help="number of stored vectors")
+    parser.add_argument("--dim", type=int, default=384, help="embedding dimension (all-MiniLM-L6-v2: 384)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=500, help="number of synthetic topic clusters")
+    parser.add_argument("--batch-size", type=int, default=2000, help="chunks per add_chunks call")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help=f"comma-separated subset of {BACKENDS}")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default=None, help="where to put the stores (default: a temp dir)")
+    parser.add_argument("--output", default=None, help="write the JSON report here (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    backends = [name.strip() for name in args.backends.split(",") if name.strip()]
+    unknown = set(backends) - set(BACKENDS)
+    if unknown:
+        raise SystemExit(f"❌ Unknown backends: {', '.join(sorted(unknown))}")
+
+    print(f"🧪 Generating {args.chunks} vectors (dim {args.dim}) and {args.queries} queries")
+    vectors, queries = make_dataset(args.chunks, args.dim, args.queries, args.clusters, args.seed)
+    truth = exact_top_k(vectors, queries, args.top_k)
+
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="vector-bench-"))
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        records = [run_backend(backend, workdir, vectors, queries, truth, args.top_k, args.batch_size)
+                   for backend in backends]
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        "params": {
+            "chunks": args.chunks,
+            "dim": args.dim,
+            "queries": args.queries,
+            "top_k": args.top_k,
+            "clusters": args.clusters,
+            "seed": args.seed,
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "backends": records,
+    }
+
+    payload = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+        print(f"📝 Report written to {args.output}")
+    else:
+        print(payload)
+    return result
+
+
+if __name__ == "__main__":
+    main()
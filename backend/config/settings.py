@@ -0,0 +1,131 @@
+import os
+
+# ⚙️ Tunables for ingestion and retrieval (override via environment variables)
+
+# Number of chunks sent to the embedding model per encode() call
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+
+# Embedding backend: "sentence-transformers" (real model) or "hash", a deterministic
+# model-free stand-in used by benchmarks and offline runs
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+# Persistent embedding cache (set EMBED_CACHE_ENABLED=0 to disable)
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "1") == "1"
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "./embedding_cache/embeddings.sqlite3")
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "100000"))
+
+# Multi-repo namespaces: how many indexed repos to keep warm on disk, and how long
+# an unused repo may sit idle before it is evicted (0 disables the idle timeout).
+# Access times are kept in memory and written to the registry at most once per
+# REPO_TOUCH_FLUSH_SECONDS, so requests don't each rewrite it
+MAX_CACHED_REPOS = int(os.getenv("MAX_CACHED_REPOS", "10"))
+REPO_IDLE_TTL_SECONDS = int(os.getenv("REPO_IDLE_TTL_SECONDS", str(3 * 24 * 3600)))
+REPO_TOUCH_FLUSH_SECONDS = int(os.getenv("REPO_TOUCH_FLUSH_SECONDS", "300"))
+
+# Background ingestion jobs: concurrent workers, max queued + running jobs, and
+# how many finished jobs to keep around for status polling
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+MAX_PENDING_JOBS = int(os.getenv("MAX_PENDING_JOBS", "16"))
+JOB_HISTORY_LIMIT = int(os.getenv("JOB_HISTORY_LIMIT", "100"))
+
+# Parallel chunking: worker processes (1 = serial) and the minimum number of
+# files before a process pool is worth spinning up
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", str(os.cpu_count() or 1)))
+CHUNK_PARALLEL_MIN_FILES = int(os.getenv("CHUNK_PARALLEL_MIN_FILES", "64"))
+
+# In-process cache of query embeddings and top-k retrieval results
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "512"))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "300"))
+
+# Hybrid retrieval: fuse BM25 and vector rankings with reciprocal rank fusion.
+# Each side contributes top_k * HYBRID_CANDIDATE_FACTOR candidates.
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "1") == "1"
+HYBRID_CANDIDATE_FACTOR = int(os.getenv("HYBRID_CANDIDATE_FACTOR", "3"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Clone mode: depth-1 single-branch clone, sparse checkout of indexed extensions,
+# and an optional partial-clone blob size limit (e.g. "1m"; empty disables it)
+CLONE_SHALLOW = os.getenv("CLONE_SHALLOW", "1") == "1"
+CLONE_SPARSE = os.getenv("CLONE_SPARSE", "1") == "1"
+CLONE_BLOB_LIMIT = os.getenv("CLONE_BLOB_LIMIT", "")
+
+# Start-up warm-up of shared services: "background" (serve immediately, load in a
+# thread), "blocking" (finish loading before serving) or "off" (load on first use)
+WARMUP_MODE = os.getenv("WARMUP_MODE", "background")
+
+
+# Repository scanner: files larger than SCAN_MAX_FILE_BYTES are skipped, as are
+# files whose first 8 KB average more than SCAN_MAX_LINE_LENGTH bytes per line,
+# nearly all of it on a single line (minified)
+SCAN_MAX_FILE_BYTES = int(os.getenv("SCAN_MAX_FILE_BYTES", str(1024 * 1024)))
+SCAN_MAX_LINE_LENGTH = int(os.getenv("SCAN_MAX_LINE_LENGTH", "1000"))
+
+# Lazy file tree: cached per-repo/commit snapshots and directory page sizes
+TREE_SNAPSHOT_CACHE_SIZE = int(os.getenv("TREE_SNAPSHOT_CACHE_SIZE", "32"))
+TREE_PAGE_SIZE = int(os.getenv("TREE_PAGE_SIZE", "200"))
+TREE_MAX_PAGE_SIZE = int(os.getenv("TREE_MAX_PAGE_SIZE", "1000"))
+
+# File viewer: files above VIEW_STREAM_THRESHOLD bytes are streamed in blocks of
+# VIEW_BLOCK_SIZE instead of being read into memory
+VIEW_STREAM_THRESHOLD = int(os.getenv("VIEW_STREAM_THRESHOLD", str(1024 * 1024)))
+VIEW_BLOCK_SIZE = int(os.getenv("VIEW_BLOCK_SIZE", str(64 * 1024)))
+
+# Vector store writes: max chunks per upsert call (also capped by the client's limit)
+VECTOR_WRITE_BATCH_SIZE = int(os.getenv("VECTOR_WRITE_BATCH_SIZE", "512"))
+
+# Chunking mode: "syntax" splits supported languages on top-level symbols
+# (falling back to "text" splitting elsewhere); "text" uses separators only.
+# Syntax chunks are merged/split to stay under SYNTAX_CHUNK_MAX_CHARS.
+CHUNK_MODE = os.getenv("CHUNK_MODE", "syntax")
+SYNTAX_CHUNK_MAX_CHARS = int(os.getenv("SYNTAX_CHUNK_MAX_CHARS", "1500"))
+
+# Retrieved context is packed into at most CONTEXT_TOKEN_BUDGET tokens
+# (counted with the CONTEXT_TOKENIZER tiktoken encoding) before prompting
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "cl100k_base")
+
+# LLM response cache: exact matches on (model, prompt hash), plus an optional
+# semantic tier reusing an answer for a near-identical query (cosine similarity
+# >= RESPONSE_CACHE_SEMANTIC_THRESHOLD) on the same repo commit and tool
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "./response_cache/responses.sqlite3")
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+RESPONSE_CACHE_SEMANTIC = os.getenv("RESPONSE_CACHE_SEMANTIC", "0") == "1"
+RESPONSE_CACHE_SEMANTIC_THRESHOLD = float(os.getenv("RESPONSE_CACHE_SEMANTIC_THRESHOLD", "0.95"))
+
+# Intent router: answer clear single-tool questions directly instead of going
+# through the agent. Embedding-only matches need ROUTER_MIN_SIMILARITY and a lead
+# of ROUTER_MIN_MARGIN over the runner-up tool.
+INTENT_ROUTER = os.getenv("INTENT_ROUTER", "1") == "1"
+ROUTER_MIN_SIMILARITY = float(os.getenv("ROUTER_MIN_SIMILARITY", "0.45"))
+ROUTER_MIN_MARGIN = float(os.getenv("ROUTER_MIN_MARGIN", "0.05"))
+
+# Async tools: blocking embedding runs on EMBED_WORKERS threads and Chroma /
+# lexical index access on VECTOR_IO_WORKERS threads, so the event loop stays free
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "2"))
+VECTOR_IO_WORKERS = int(os.getenv("VECTOR_IO_WORKERS", "8"))
+
+# Batch analysis (/analyze): at most ANALYSIS_CONCURRENCY tool prompts of one
+# request are sent to Gemini at the same time
+ANALYSIS_CONCURRENCY = int(os.getenv("ANALYSIS_CONCURRENCY", "4"))
+
+# Vector store backend: "chroma" (PersistentClient) or "numpy" (in-process,
+# memory-mapped float16/int8 matrix plus an SQLite side table per repo under
+# NUMPY_STORE_PATH). NUMPY_STORE_DTYPE ("int8" or "float16") applies to newly
+# created stores; int8 halves the disk size, float16 keeps recall closer to exact.
+# Large stores are split into k-means lists and a query scans only the
+# NUMPY_STORE_PROBES closest ones: more probes = closer to exact, but slower.
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+NUMPY_STORE_PATH = os.getenv("NUMPY_STORE_PATH", "./numpy_store")
+NUMPY_STORE_DTYPE = os.getenv("NUMPY_STORE_DTYPE", "int8")
+NUMPY_STORE_PROBES = int(os.getenv("NUMPY_STORE_PROBES", "8"))
+
+# Retrieval reranking: fetch RETRIEVAL_CANDIDATES chunks, then pick the top-k
+# with Maximal Marginal Relevance (MMR_LAMBDA: 1.0 = relevance only, lower =
+# more diverse) taking at most MAX_CHUNKS_PER_FILE chunks of any one file
+MMR_RERANK = os.getenv("MMR_RERANK", "1") == "1"
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "50"))
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+MAX_CHUNKS_PER_FILE = int(os.getenv("MAX_CHUNKS_PER_FILE", "3"))
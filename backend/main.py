@@ -1,13 +1,52 @@
+import time
+
+# Measured from here so the cold-start metric includes importing every route
+_BOOT_STARTED = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routes import upload_repo, chat, file_viewer
+from starlette.concurrency import run_in_threadpool
+from routes import upload_repo, chat, analyze, file_viewer, repos, jobs, metrics
+from services.container import container
+from services.chunker import shutdown_chunk_pool
+from services.metrics import Gauge
+from config.settings import WARMUP_MODE
+import logging
 import os
+import threading
 import uvicorn
 
+STARTUP_SECONDS = Gauge("repo_companion_startup_seconds", "Process start-up time by phase.", ["phase"])
+_IMPORT_SECONDS = time.perf_counter() - _BOOT_STARTED
+
+
+def _timed_warm_up():
+    start = time.perf_counter()
+    container.warm_up()
+    STARTUP_SECONDS.set(round(time.perf_counter() - start, 4), phase="warm_up")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    STARTUP_SECONDS.set(round(_IMPORT_SECONDS, 4), phase="import")
+    if WARMUP_MODE == "blocking":
+        await run_in_threadpool(_timed_warm_up)
+    elif WARMUP_MODE == "background":
+        threading.Thread(target=_timed_warm_up, name="warm-up", daemon=True).start()
+
+    ready = time.perf_counter() - _BOOT_STARTED
+    STARTUP_SECONDS.set(round(ready, 4), phase="ready")
+    logging.info(f"🚀 Ready to serve in {ready:.2f}s (imports {_IMPORT_SECONDS:.2f}s, warm-up: {WARMUP_MODE})")
+    yield
+    shutdown_chunk_pool()
+
+
 app = FastAPI(
     title="GitHub Repo AI Chatbot",
     description="Chat with any GitHub repository using RAG + Gemini",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 origins = [
@@ -29,7 +68,11 @@ app.add_middleware(
 
 app.include_router(upload_repo.router)
 app.include_router(chat.router)
+app.include_router(analyze.router)
 app.include_router(file_viewer.router)
+app.include_router(repos.router)
+app.include_router(jobs.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 async def root():
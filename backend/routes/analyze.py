@@ -0,0 +1,119 @@
+import asyncio
+from typing import List
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from services.repo_registry import current_repo_id, resolve_repo_id, get_repo, touch_repo
+from services.streaming import event_sink, format_sse
+from services.metrics import timed
+from tools.multi_tool import TOOL_PROMPTS, analyze_async
+from tools.tool_registory import TOOL_KEYS
+
+router = APIRouter()
+
+DEFAULT_ANALYSES = ["bug_finder", "security_auditor", "performance_optimizer"]
+
+
+def _parse_request(data: dict):
+    """
+    Validates an analysis request; returns (query, repo_id, tool keys, concurrency).
+    Tools can be given by agent name ("BugFinder") or key ("bug_finder").
+    """
+    query = data.get("query")
+    if not query:
+        raise HTTPException(status_code=400, detail="❌ No query provided.")
+
+    repo_id = resolve_repo_id(data.get("repo_id"))
+    if not repo_id or get_repo(repo_id) is None:
+        raise HTTPException(status_code=404, detail="❌ Unknown repository. Upload it first.")
+
+    requested = data.get("tools") or DEFAULT_ANALYSES
+    if not isinstance(requested, list):
+        raise HTTPException(status_code=400, detail="❌ `tools` must be a list of tool names.")
+    names: List[str] = []
+    for tool in requested:
+        name = TOOL_KEYS.get(tool, tool)
+        if name not in TOOL_PROMPTS:
+            raise HTTPException(status_code=400, detail=f"❌ Unknown tool: {tool}")
+        if name not in names:
+            names.append(name)
+
+    concurrency = data.get("concurrency")
+    if concurrency is not None and (not isinstance(concurrency, int) or concurrency < 1):
+        raise HTTPException(status_code=400, detail="❌ `concurrency` must be a positive integer.")
+    return query, repo_id, names, concurrency
+
+
+@router.post("/analyze")
+async def analyze(request: Request):
+    """
+    Runs several analyses (e.g. bugs, security, performance) of the same code in
+    one request, sharing a single retrieval. Results are keyed by tool.
+    """
+    query, repo_id, names, concurrency = _parse_request(await request.json())
+    touch_repo(repo_id)
+    token = current_repo_id.set(repo_id)
+    try:
+        results, seconds = {}, {}
+        with timed("analysis"):
+            async for name, answer, elapsed in analyze_async(query, names, concurrency):
+                results[name], seconds[name] = answer, elapsed
+        return {
+            "repo_id": repo_id,
+            "results": {name: results[name] for name in names},
+            "seconds": {name: seconds[name] for name in names},
+        }
+    finally:
+        current_repo_id.reset(token)
+
+
+@router.post("/analyze/stream")
+async def analyze_stream(request: Request):
+    """
+    Streaming variant of /analyze using Server-Sent Events. Emits `start`,
+    `retrieval`, answer `token`s tagged with their `tool`, one `result` per tool
+    as soon as it finishes, then `done` (or `error` followed by `done`).
+    """
+    query, repo_id, names, concurrency = _parse_request(await request.json())
+    touch_repo(repo_id)
+
+    async def events():
+        yield format_sse("start", {"repo_id": repo_id, "tools": names})
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def emit(event: str, payload: dict):
+            loop.call_soon_threadsafe(queue.put_nowait, (event, payload))
+
+        async def run_analyses():
+            try:
+                with timed("analysis"):
+                    async for name, answer, elapsed in analyze_async(query, names, concurrency):
+                        emit("result", {"tool": name, "answer": answer, "seconds": elapsed})
+            except Exception as e:
+                emit("error", {"message": f"❌ Error: {str(e)}"})
+            finally:
+                emit("done", {})
+
+        # The task copies the current context, so the tools see the repo and the sink
+        repo_token = current_repo_id.set(repo_id)
+        sink_token = event_sink.set(emit)
+        task = asyncio.create_task(run_analyses())
+        event_sink.reset(sink_token)
+        current_repo_id.reset(repo_token)
+
+        try:
+            while True:
+                event, payload = await queue.get()
+                yield format_sse(event, payload)
+                if event == "done":
+                    break
+        finally:
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,8 +1,28 @@
+import asyncio
 from fastapi import APIRouter, Request
-from tools.agent_executor import get_agent_executor
+from fastapi.responses import StreamingResponse
+from langchain_core.callbacks import BaseCallbackHandler
+from services.container import container
+from services.repo_registry import current_repo_id, resolve_repo_id, get_repo, touch_repo
+from services.streaming import event_sink, format_sse
+from services.metrics import timed
+from services.embedder import embed_pool
+from services.async_pool import run_in_pool
+from tools.intent_router import route_query
+from config.settings import INTENT_ROUTER
 
 router = APIRouter()
-agent_executor = get_agent_executor()
+
+
+def _pick_route(query: str, data: dict):
+    """
+    The tool to answer with directly, or None to go through the agent
+    (also when the client sends `"use_agent": true`).
+    """
+    if not INTENT_ROUTER or data.get("use_agent"):
+        return None
+    return route_query(query)
+
 
 @router.post("/chat")
 async def chat_with_repo(request: Request):
@@ -12,8 +32,114 @@ async def chat_with_repo(request: Request):
     if not query:
         return {"answer": "❌ No query provided."}
 
+    repo_id = resolve_repo_id(data.get("repo_id"))
+    if not repo_id or get_repo(repo_id) is None:
+        return {"answer": "❌ Unknown repository. Upload it first."}
+
+    touch_repo(repo_id)
+    token = current_repo_id.set(repo_id)
     try:
-        result = await agent_executor.ainvoke({"input": query})
-        return {"answer": result.get("output")}
+        # Routing embeds the query, so it waits on the embedding pool
+        decision = await run_in_pool(embed_pool, _pick_route, query, data)
+        if decision:
+            with timed("routed_tool"):
+                answer = await decision.coroutine(query)
+            return {"answer": answer, "repo_id": repo_id, "route": decision.tool}
+
+        with timed("agent"):
+            result = await container.agent_executor.ainvoke({"input": query})
+        return {"answer": result.get("output"), "repo_id": repo_id, "route": "agent"}
     except Exception as e:
         return {"answer": f"❌ Error: {str(e)}"}
+    finally:
+        current_repo_id.reset(token)
+
+
+class AgentStepStreamer(BaseCallbackHandler):
+    """
+    Forwards the agent's tool choices and tool completions to the SSE stream.
+    """
+
+    def __init__(self, emit):
+        self.emit = emit
+
+    def on_agent_action(self, action, **kwargs):
+        self.emit("tool", {"tool": action.tool, "input": str(action.tool_input)})
+
+    def on_tool_end(self, output, **kwargs):
+        self.emit("tool_end", {"chars": len(str(output))})
+
+
+@router.post("/chat/stream")
+async def chat_with_repo_stream(request: Request):
+    """
+    Streaming variant of /chat using Server-Sent Events. Emits `start`, then agent
+    steps (`tool`, `retrieval`, `tool_end`), the tool's answer as `token` events,
+    and finally `final` (or `error`) followed by `done`. Questions the intent
+    router can answer with a single tool skip the agent (`tool` has `routed: true`).
+    """
+    data = await request.json()
+    query = data.get("query")
+    repo_id = resolve_repo_id(data.get("repo_id"))
+
+    async def events():
+        if not query:
+            yield format_sse("error", {"message": "❌ No query provided."})
+            return
+        if not repo_id or get_repo(repo_id) is None:
+            yield format_sse("error", {"message": "❌ Unknown repository. Upload it first."})
+            return
+
+        touch_repo(repo_id)
+        yield format_sse("start", {"repo_id": repo_id})
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def emit(event: str, payload: dict):
+            # Events also come from worker threads, so always hop back onto the event loop
+            loop.call_soon_threadsafe(queue.put_nowait, (event, payload))
+
+        async def run_agent():
+            try:
+                decision = await run_in_pool(embed_pool, _pick_route, query, data)
+                if decision:
+                    emit("tool", {"tool": decision.tool, "input": query, "routed": True})
+                    with timed("routed_tool"):
+                        answer = await decision.coroutine(query)
+                    emit("tool_end", {"chars": len(answer)})
+                    emit("final", {"answer": answer})
+                    return
+
+                with timed("agent"):
+                    result = await container.agent_executor.ainvoke(
+                        {"input": query}, config={"callbacks": [AgentStepStreamer(emit)]}
+                    )
+                emit("final", {"answer": result.get("output")})
+            except Exception as e:
+                emit("error", {"message": f"❌ Error: {str(e)}"})
+            finally:
+                emit("done", {})
+
+        # The task copies the current context, so tools see the repo and the sink
+        repo_token = current_repo_id.set(repo_id)
+        sink_token = event_sink.set(emit)
+        task = asyncio.create_task(run_agent())
+        event_sink.reset(sink_token)
+        current_repo_id.reset(repo_token)
+
+        try:
+            while True:
+                event, payload = await queue.get()
+                yield format_sse(event, payload)
+                if event == "done":
+                    break
+        finally:
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,22 +1,172 @@
-from fastapi import APIRouter, Query
-from fastapi.responses import PlainTextResponse
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from typing import Iterator, Optional, Tuple
+import mmap
 import os
+import re
+from services.repo_registry import get_repo, touch_repo
+from config.settings import VIEW_STREAM_THRESHOLD, VIEW_BLOCK_SIZE
 
 router = APIRouter()
 
+TEXT_MEDIA_TYPE = "text/plain; charset=utf-8"
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+# Universal newlines, as the chunker reads files: its start_line/end_line count these
+LINE_BREAK = re.compile(rb"\r\n?|\n")
+
+def resolve_repo_file(repo_id: str, file_path: str) -> Optional[str]:
+    """
+    Resolves `file_path` (relative to the repo root) inside ./temp/{repo_id},
+    refusing anything that escapes the repo folder.
+    """
+    repo_root = os.path.realpath(os.path.join("temp", repo_id))
+    full_path = os.path.realpath(os.path.join(repo_root, file_path.lstrip("/\\")))
+    if os.path.commonpath([repo_root, full_path]) != repo_root:
+        return None
+    return full_path
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    """
+    Weak validator from mtime + size: cheap to compute and changes whenever a
+    re-sync rewrites the file.
+    """
+    return f'W/"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison: W/"x" and "x" refer to the same representation
+    return "*" in candidates or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in candidates]
+
+
+def parse_byte_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single `bytes=start-end` range into a half-open (start, end) span.
+    Returns None when the range is malformed or unsatisfiable.
+    """
+    match = RANGE_PATTERN.match(range_header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size
+    else:
+        start = int(first)
+        end = min(int(last) + 1, size) if last else size
+    if start >= size or start >= end:
+        return None
+    return start, end
+
+
+def line_span(file_path: str, size: int, start_line: int, end_line: Optional[int]) -> Optional[Tuple[int, int]]:
+    """
+    Byte span (half-open) covering lines start_line..end_line (1-based, inclusive).
+    Line breaks (\n, \r\n or \r) are located through an mmap, so only the pages
+    up to the last requested line are touched. Returns None if start_line is past the end.
+    """
+    if size == 0:
+        return (0, 0) if start_line == 1 else None
+
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = 0
+        for _ in range(start_line - 1):
+            newline = LINE_BREAK.search(mm, pos)
+            if newline is None or newline.end() >= size:
+                return None
+            pos = newline.end()
+        start = pos
+
+        if end_line is None:
+            return start, size
+        for _ in range(end_line - start_line + 1):
+            newline = LINE_BREAK.search(mm, pos)
+            if newline is None:
+                return start, size
+            pos = newline.end()
+        return start, pos
+
+
+def _iter_file(file_path: str, start: int, end: int) -> Iterator[bytes]:
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(VIEW_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+def _file_response(file_path: str, start: int, end: int, status_code: int, headers: dict) -> Response:
+    """
+    Small spans are sent in one read; large ones are streamed in bounded blocks.
+    """
+    headers["Content-Length"] = str(end - start)
+    if end - start <= VIEW_STREAM_THRESHOLD:
+        with open(file_path, "rb") as f:
+            f.seek(start)
+            content = f.read(end - start)
+        return Response(content, status_code=status_code, media_type=TEXT_MEDIA_TYPE, headers=headers)
+    return StreamingResponse(_iter_file(file_path, start, end), status_code=status_code,
+                             media_type=TEXT_MEDIA_TYPE, headers=headers)
+
+
 @router.get("/view-file", response_class=PlainTextResponse)
-def view_file(file_path: str = Query(...)):
+def view_file(request: Request, file_path: str = Query(...), repo_id: Optional[str] = Query(None),
+              start_line: Optional[int] = Query(None, ge=1), end_line: Optional[int] = Query(None, ge=1)):
     """
-    Returns the raw contents of a file given its path (must be inside ./temp/)
+    Returns the raw contents of a file given its path. With `repo_id` the path is
+    relative to that repo's clone; without it, it must be inside ./temp/.
+
+    `start_line`/`end_line` (1-based, inclusive) return just those lines; a
+    `Range: bytes=...` header returns a byte range (206). Responses carry an ETag,
+    and a matching `If-None-Match` gets a 304 without reading the file.
     """
-    if not file_path.startswith("./temp/"):
+    if repo_id:
+        if get_repo(repo_id) is None:
+            return "❌ Unknown repository."
+        touch_repo(repo_id)
+        file_path = resolve_repo_file(repo_id, file_path)
+        if file_path is None:
+            return "❌ Invalid file path."
+    elif not file_path.startswith("./temp/"):
         return "❌ Invalid file path."
 
-    if not os.path.exists(file_path):
+    if not os.path.isfile(file_path):
         return "❌ File not found."
 
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return f.read()
+        stat_result = os.stat(file_path)
+        size = stat_result.st_size
+        etag = file_etag(stat_result)
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Accept-Ranges": "bytes"}
+
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        if start_line is not None or end_line is not None:
+            start_line = start_line or 1
+            if end_line is not None and end_line < start_line:
+                return PlainTextResponse("❌ end_line must not be before start_line.", status_code=400, headers=headers)
+            span = line_span(file_path, size, start_line, end_line)
+            if span is None:
+                return PlainTextResponse("❌ start_line is past the end of the file.", status_code=404, headers=headers)
+            return _file_response(file_path, *span, status_code=200, headers=headers)
+
+        range_header = request.headers.get("range")
+        if range_header:
+            span = parse_byte_range(range_header, size)
+            if span is None:
+                headers["Content-Range"] = f"bytes */{size}"
+                return PlainTextResponse("❌ Invalid range.", status_code=416, headers=headers)
+            headers["Content-Range"] = f"bytes {span[0]}-{span[1] - 1}/{size}"
+            return _file_response(file_path, *span, status_code=206, headers=headers)
+
+        return _file_response(file_path, 0, size, status_code=200, headers=headers)
     except Exception as e:
         return f"❌ Could not read file: {str(e)}"
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException, Request
+from services.jobs import job_manager, JobQueueFull
+from config.settings import EMBED_BATCH_SIZE
+
+router = APIRouter()
+
+@router.post("/jobs/ingest", status_code=202)
+async def submit_ingest_job(request: Request):
+    """
+    Queues a repo for background ingestion and returns the job to poll.
+    """
+    data = await request.json()
+    repo_url = data.get("repo_url")
+
+    if not repo_url or not repo_url.startswith("https://github.com/"):
+        raise HTTPException(status_code=400, detail="Invalid GitHub URL")
+
+    try:
+        job = job_manager.submit(
+            repo_url,
+            incremental=data.get("incremental"),
+            batch_size=int(data.get("batch_size") or EMBED_BATCH_SIZE),
+        )
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return job.to_dict()
+
+@router.get("/jobs")
+def list_jobs():
+    return {"jobs": [job.to_dict() for job in job_manager.list()]}
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """
+    Returns the job's status, current stage, file/chunk counters and ETA.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
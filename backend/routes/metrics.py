@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from services.metrics import render
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Exposes stage latency histograms, counters and cache statistics in the
+    Prometheus text format.
+    """
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,35 @@
+import os
+from fastapi import APIRouter, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+from services.repo_registry import list_repos, get_repo, touch_repo
+from tools.file_tree_builder import get_tree_snapshot
+from config.settings import TREE_PAGE_SIZE, TREE_MAX_PAGE_SIZE
+
+router = APIRouter()
+
+@router.get("/repos")
+def get_repos():
+    """
+    Lists the repositories currently indexed on this server, most recently used first.
+    """
+    return {"repos": list_repos()}
+
+
+@router.get("/repos/{repo_id}/tree")
+async def get_repo_tree(repo_id: str, path: str = "", offset: int = Query(0, ge=0),
+                        limit: int = Query(TREE_PAGE_SIZE, ge=1, le=TREE_MAX_PAGE_SIZE)):
+    """
+    Lists one folder of the repo (folders first, with child counts), a page at a
+    time. Expand a folder by requesting its `path`.
+    """
+    repo = get_repo(repo_id)
+    if repo is None:
+        raise HTTPException(status_code=404, detail="Unknown repository.")
+    touch_repo(repo_id)
+
+    # The first request for a commit scans the clone; later ones hit the cached snapshot
+    snapshot = await run_in_threadpool(get_tree_snapshot, os.path.join("temp", repo_id), repo.get("commit"))
+    listing = snapshot.list_dir(path, offset=offset, limit=limit)
+    if listing is None:
+        raise HTTPException(status_code=404, detail="Folder not found.")
+    return {"repo_id": repo_id, "commit": repo.get("commit"), **listing}
@@ -1,31 +1,15 @@
+import asyncio
 import logging
 from fastapi import APIRouter, HTTPException, Request
-from services.repo_processor import clone_repo, get_relevant_files
-from services.chunker import chunk_file
-from services.embedder import get_embedding
-from services.vector_db import ChromaDBWrapper
-from tools.file_tree_builder import build_file_tree
-import os
+from starlette.concurrency import run_in_threadpool
+from services.jobs import job_manager, JobQueueFull, SUCCEEDED, CANCELLED
+from tools.file_tree_builder import get_tree_snapshot
+from config.settings import EMBED_BATCH_SIZE, TREE_PAGE_SIZE
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
 router = APIRouter()
-db = ChromaDBWrapper()
-
-SKIP_FILENAMES = {"package-lock.json", "yarn.lock", "pnpm-lock.yaml"}
-SKIP_DIR_NAMES = {"node_modules", "__pycache__", ".git", ".venv", "venv"}
-
-def is_file_allowed(file_path: str) -> bool:
-    filename = os.path.basename(file_path)
-    if filename in SKIP_FILENAMES:
-        logging.info(f"⏭️ Skipping unwanted file: {filename}")
-        return False
-    parts = set(file_path.split(os.sep))
-    if parts.intersection(SKIP_DIR_NAMES):
-        logging.info(f"⏭️ Skipping file inside ignored dir: {file_path}")
-        return False
-    return True
 
 @router.post("/upload-repo")
 async def upload_repo(request: Request):
@@ -35,61 +19,58 @@ async def upload_repo(request: Request):
 
         if not repo_url or not repo_url.startswith("https://github.com/"):
             raise HTTPException(status_code=400, detail="Invalid GitHub URL")
-        
-        db.clear()
-
-        logging.info(f"📦 Cloning repo from {repo_url}")
-        repo_path = clone_repo(repo_url)
-        logging.info(f"✅ Repo cloned at {repo_path}")
-
-
-
-        files = get_relevant_files(repo_path)
-        files = [f for f in files if is_file_allowed(f)]
-
-        logging.info(f"🔍 {len(files)} relevant files found after filtering.")
-        for file_path in files:
-            logging.info(f"➡ File: {file_path}")
-
-        if not files:
-            raise HTTPException(status_code=400, detail="No relevant files found.")
-
-        all_chunks, all_embeddings, all_meta = [], [], []
 
-        for file_path in files:
-            logging.info(f"📄 Processing file: {file_path}")
-            preamble = f"This chunk is from the file: {file_path}\n\n"
-            chunks = chunk_file(file_path, preamble=preamble)
-
-            if not chunks:
-                logging.warning(f"⚠️ No chunks generated from {file_path}")
-                continue
-
-            logging.info(f"✂️ {len(chunks)} chunks created from {file_path}")
-
-            for i, chunk in enumerate(chunks):
-                logging.info(f"🧩 Chunk {i+1}/{len(chunks)} from {file_path}:\n{chunk.page_content[:300]}...\n")
-                all_chunks.append(chunk.page_content)
-
-                try:
-                    embedding = get_embedding(chunk.page_content)
-                    all_embeddings.append(embedding)
-                    all_meta.append(chunk.metadata)
-                except Exception as embed_err:
-                    logging.error(f"❌ Embedding failed for {file_path}: {embed_err}")
-                    continue
-
-        logging.info(f"📦 Total chunks to store: {len(all_chunks)}")
-        db.add_chunks(all_chunks, all_embeddings, all_meta)
-
-        file_tree = build_file_tree(repo_path)
+        batch_size = int(data.get("batch_size") or EMBED_BATCH_SIZE)
+        incremental = data.get("incremental")
+
+        # Ingestion is blocking (git, disk, CPU embedding): run it as a job on the
+        # bounded ingestion pool and wait for it, so uploads can't starve other requests
+        try:
+            job = job_manager.submit(repo_url, incremental=incremental, batch_size=batch_size)
+        except JobQueueFull as e:
+            raise HTTPException(status_code=429, detail=str(e))
+        # wait() rather than await: a job cancelled while queued cancels its future
+        await asyncio.wait([asyncio.wrap_future(job.future)])
+        if job.status == CANCELLED:
+            raise HTTPException(status_code=409, detail="Ingestion was cancelled.")
+        if job.status != SUCCEEDED:
+            if isinstance(job.exception, ValueError):
+                raise HTTPException(status_code=400, detail=str(job.exception))
+            raise HTTPException(status_code=500, detail=f"Error: {job.error}")
+        summary = job.result
+
+        # Only the top level is returned; folders are expanded via /repos/{repo_id}/tree
+        snapshot = await run_in_threadpool(get_tree_snapshot, summary["repo_path"], summary["commit"])
+        root = snapshot.list_dir("", limit=TREE_PAGE_SIZE)
+        file_tree = {
+            "name": summary["repo_id"],
+            "type": "folder",
+            "children": root["entries"],
+            "total": root["total"],
+            "has_more": root["has_more"],
+        }
         logging.info("🌲 File tree built.")
 
+        if summary["mode"] == "incremental":
+            message = (
+                f"✅ Re-synced {summary['added']} added, {summary['modified']} modified and "
+                f"{summary['removed']} removed files ({summary['chunks']} chunks)."
+            )
+        else:
+            message = f"✅ Processed {summary['chunks']} chunks."
+
         return {
-            "message": f"✅ Processed {len(all_chunks)} chunks.",
+            "message": message,
+            "job_id": job.job_id,
+            "repo_id": summary["repo_id"],
+            "commit": summary["commit"],
+            "skipped": summary["skipped"],
+            "failed": summary["failed"],
             "file_tree": file_tree
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error("🔥 Exception in /upload-repo", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error: {e}")
@@ -0,0 +1,27 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+# ⚙️ Bounded worker pools that let coroutines offload blocking work
+
+T = TypeVar("T")
+
+
+def bounded_pool(name: str, max_workers: int) -> ThreadPoolExecutor:
+    """
+    A dedicated pool: blocking work of one kind (e.g. embedding) queues up here
+    instead of starving the event loop's default executor.
+    """
+    return ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix=name)
+
+
+async def run_in_pool(pool: ThreadPoolExecutor, func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Runs func(*args, **kwargs) in `pool` and awaits the result. Like
+    asyncio.to_thread, the caller's context (current repo, event sink) is copied.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(pool, functools.partial(context.run, func, *args, **kwargs))
@@ -1,39 +1,295 @@
 import os
+import logging
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from typing import List
+from typing import Iterable, Iterator, List, Optional, Tuple
 from langchain.docstore.document import Document
+from services.syntax_chunker import (Segment, split_into_symbols, split_lines, python_members, brace_members,
+                                     BRACE_EXTENSIONS)
+from services.metrics import FILE_READ_ERRORS
+from config.settings import CHUNK_WORKERS, CHUNK_PARALLEL_MIN_FILES, CHUNK_MODE, SYNTAX_CHUNK_MAX_CHARS
 
-def chunk_file(file_path: str, preamble: str = "") -> List[Document]:
+# Prepended to the first chunk of every file so its embedding knows the path
+PREAMBLE_TEMPLATE = "This chunk is from the file: {path}\n\n"
+
+SEPARATORS = {
+    ".md": ["\n#", "\n##", "\n\n", "\n", " ", ""],
+    ".py": ["\ndef ", "\nclass ", "\n\n", "\n", " ", ""],
+    ".js": ["\nfunction ", "\nclass ", "\nexport ", "\n\n", "\n", " ", ""],
+    ".ts": ["\nfunction ", "\nclass ", "\nexport ", "\ninterface ", "\n\n", "\n", " ", ""],
+    ".java": ["\nclass ", "\n    public ", "\n    private ", "\n    protected ", "\n\n", "\n", " ", ""],
+    ".cpp": ["\nclass ", "\nstruct ", "\nnamespace ", "\n\n", "\n", " ", ""],
+    ".go": ["\nfunc ", "\ntype ", "\n\n", "\n", " ", ""]
+}
+DEFAULT_SEPARATORS = ["\n\n", "\n", " ", ""]
+
+# One long-lived worker pool shared by all ingestions, so each worker's cached
+# splitters survive between jobs. Created on first use.
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_splitter(extension: str) -> RecursiveCharacterTextSplitter:
+    """
+    Returns a splitter for the extension, built once per process and reused.
+    """
+    return RecursiveCharacterTextSplitter(
+        chunk_size=800,
+        chunk_overlap=100,
+        add_start_index=True,
+        separators=SEPARATORS.get(extension, DEFAULT_SEPARATORS)
+    )
+
+
+@lru_cache(maxsize=None)
+def get_symbol_splitter(extension: str) -> RecursiveCharacterTextSplitter:
+    """
+    Splitter for symbols too large for one chunk (no overlap: neighbours are whole symbols).
+    """
+    return RecursiveCharacterTextSplitter(
+        chunk_size=SYNTAX_CHUNK_MAX_CHARS,
+        chunk_overlap=0,
+        add_start_index=True,
+        separators=SEPARATORS.get(extension, DEFAULT_SEPARATORS)
+    )
+
+
+def _segment_pieces(content: str, lines: List[str], line_offsets: List[int],
+                    segment: Segment, extension: str) -> List[dict]:
+    """
+    Turns a symbol segment into one or more pieces no longer than SYNTAX_CHUNK_MAX_CHARS,
+    descending into class members first and falling back to text splitting.
+    """
+    text = "".join(lines[segment.start_line - 1:segment.end_line])
+    piece = {"symbol": segment.symbol, "kind": segment.kind, "start_line": segment.start_line,
+             "end_line": segment.end_line, "start_index": line_offsets[segment.start_line - 1], "text": text}
+    if len(text) <= SYNTAX_CHUNK_MAX_CHARS:
+        return [piece]
+
+    members = None
+    if extension == ".py" and segment.kind == "class":
+        members = python_members(content, segment)
+    elif extension in BRACE_EXTENSIONS and segment.kind == "class":
+        members = brace_members([line.rstrip("\r\n") for line in lines], segment)
+    if members and len(members) > 1:
+        return [p for member in members for p in _segment_pieces(content, lines, line_offsets, member, extension)]
+
+    pieces = []
+    for part in get_symbol_splitter(extension).create_documents([text]):
+        offset = part.metadata["start_index"]
+        start_line = segment.start_line + text.count("\n", 0, offset)
+        pieces.append({**piece, "start_line": start_line, "end_line": start_line + part.page_content.count("\n"),
+                       "start_index": piece["start_index"] + offset, "text": part.page_content, "split": True})
+    return pieces
+
+
+def _merge_pieces(pieces: List[dict]) -> List[dict]:
+    """
+    Packs neighbouring small pieces (imports, one-liners, short functions) together
+    while they fit in one chunk. Parts of a split symbol are never merged: the
+    splitter trims whitespace between them, so they aren't contiguous text.
+    """
+    merged = []
+    for piece in pieces:
+        if not piece["text"].strip():
+            continue
+        last = merged[-1] if merged else None
+        if last and not last.get("split") and not piece.get("split") \
+                and len(last["text"]) + len(piece["text"]) <= SYNTAX_CHUNK_MAX_CHARS:
+            last["symbols"].append(piece["symbol"])
+            last["kinds"].append(piece["kind"])
+            last["end_line"] = piece["end_line"]
+            last["text"] += piece["text"]
+        else:
+            merged.append({**piece, "symbols": [piece["symbol"]], "kinds": [piece["kind"]]})
+
+    for piece in merged:
+        kinds = set(piece.pop("kinds")) - {"module"}
+        piece["symbol"] = ", ".join(dict.fromkeys(s for s in piece.pop("symbols") if s))
+        piece["kind"] = kinds.pop() if len(kinds) == 1 else ("mixed" if kinds else "module")
+        piece.pop("split", None)
+    return merged
+
+
+def syntax_chunks(content: str, file_path: str, preamble: str = "") -> Optional[List[Document]]:
+    """
+    Structure-aware chunking: one chunk per top-level symbol (small neighbours merged,
+    oversize ones split), each tagged with symbol, kind and start/end line.
+    Returns None for languages without a symbol splitter.
+    """
+    extension = os.path.splitext(file_path)[1]
+    segments = split_into_symbols(content, extension)
+    if segments is None:
+        return None
+
+    lines = split_lines(content, keepends=True)
+    line_offsets = [0]
+    for line in lines:
+        line_offsets.append(line_offsets[-1] + len(line))
+
+    pieces = [p for segment in segments for p in _segment_pieces(content, lines, line_offsets, segment, extension)]
+    chunks = []
+    for piece in _merge_pieces(pieces):
+        text = piece["text"]
+        # Drop surrounding blank lines, keeping the line span and offset exact
+        leading = len(text) - len(text.lstrip("\r\n"))
+        start_line = piece["start_line"] + text.count("\n", 0, leading)
+        text = text.strip("\r\n")
+        if not text.strip():
+            continue
+        metadata = {
+            "source": file_path,
+            "symbol": piece["symbol"],
+            "kind": piece["kind"],
+            "start_line": start_line,
+            "end_line": start_line + text.count("\n"),
+            "start_index": piece["start_index"] + leading,
+        }
+        # Like text mode, only the first chunk of the file carries the preamble
+        chunks.append(Document(page_content=(preamble if not chunks else "") + text, metadata=metadata))
+    return chunks
+
+
+def _read_file(file_path: str) -> Optional[str]:
     try:
         with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+            return f.read()
     except Exception as e:
-        print(f"❌ Failed to read {file_path}: {e}")
+        logging.warning(f"⚠️ Failed to read {file_path}: {e}")
+        return None
+
+
+def chunk_file(file_path: str, preamble: str = "") -> List[Document]:
+    content = _read_file(file_path)
+    if content is None:
+        FILE_READ_ERRORS.inc()
         return []
+    return _chunk_content(content, file_path, preamble)
 
+
+def _chunk_content(content: str, file_path: str, preamble: str = "") -> List[Document]:
     if not content.strip():
-        print(f"⚠️ Skipping empty/whitespace-only file: {file_path}")
+        logging.debug(f"⚠️ Skipping empty/whitespace-only file: {file_path}")
         return []
 
+    if CHUNK_MODE == "syntax":
+        chunks = syntax_chunks(content, file_path, preamble)
+        if chunks is not None:
+            logging.debug(f"✅ Chunked {len(chunks)} symbol chunks from {file_path}")
+            return chunks
+
     content = preamble + content
 
     extension = os.path.splitext(file_path)[1]
-    separators = {
-        ".md": ["\n#", "\n##", "\n\n", "\n", " ", ""],
-        ".py": ["\ndef ", "\nclass ", "\n\n", "\n", " ", ""],
-        ".js": ["\ndef ", "\nclass ", "\n\n", "\n", " ", ""],
-        ".ts": ["\ndef ", "\nclass ", "\n\n", "\n", " ", ""],
-        ".java": ["\nclass ", "\n\n", "\n", " ", ""],
-        ".cpp": ["\n", " ", ""],
-        ".go": ["\n", " ", ""]
-    }.get(extension, ["\n\n", "\n", " ", ""])
-
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=800,
-        chunk_overlap=100,
-        separators=separators
-    )
+    splitter = get_splitter(extension)
 
     chunks = splitter.create_documents([content], metadatas=[{"source": file_path}])
-    print(f"✅ Chunked {len(chunks)} chunks from {file_path}")
+    # Make start_index an offset into the file itself, not into preamble + file
+    for chunk in chunks:
+        chunk.metadata["start_index"] = max(chunk.metadata.get("start_index", 0) - len(preamble), 0)
+    logging.debug(f"✅ Chunked {len(chunks)} chunks from {file_path}")
+    return chunks
+
+
+def _chunk_with_template(file_path: str, preamble_template: str) -> Optional[List[Document]]:
+    # None when the file can't be read: workers are separate processes, so the
+    # caller counts the failure in its own metrics
+    content = _read_file(file_path)
+    if content is None:
+        return None
+    return _chunk_content(content, file_path, preamble_template.format(path=file_path))
+
+
+def _counted(chunks: Optional[List[Document]]) -> List[Document]:
+    if chunks is None:
+        FILE_READ_ERRORS.inc()
+        return []
     return chunks
+
+
+def _start_method() -> str:
+    # Never fork: ingestions run on threads, and forking a threaded process can
+    # copy a lock held by another thread into the child
+    return "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def get_chunk_pool(workers: int = CHUNK_WORKERS) -> ProcessPoolExecutor:
+    """
+    Returns the shared chunking pool, (re)creating it if it doesn't exist yet,
+    has a different size, or broke because a worker died.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None and (_pool_workers != workers or getattr(_pool, "_broken", False)):
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            method = _start_method()
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+            _pool_workers = workers
+            logging.info(f"🧵 Started chunking pool with {workers} workers ({method}).")
+        return _pool
+
+
+def shutdown_chunk_pool():
+    """
+    Stops the shared chunking pool's workers (on application shutdown).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def chunk_files(files: Iterable[str], preamble_template: str = "",
+                workers: int = CHUNK_WORKERS) -> Iterator[Tuple[str, List[Document]]]:
+    """
+    Chunks many files, fanning them out across the shared process pool.
+
+    Results are yielded as (file_path, chunks) in the same order as `files`. Only a
+    bounded window of files is in flight at once, so a slow consumer (e.g. the
+    embedder) doesn't make finished chunks pile up in memory.
+
+    Args:
+        files: Paths of the files to chunk.
+        preamble_template: Text prepended to each file; `{path}` is replaced by its path.
+        workers: Number of worker processes. 1 chunks serially in this process.
+    """
+    files = list(files)
+    if workers <= 1 or len(files) < CHUNK_PARALLEL_MIN_FILES:
+        for file_path in files:
+            yield file_path, _counted(_chunk_with_template(file_path, preamble_template))
+        return
+
+    window = workers * 4
+    executor = get_chunk_pool(workers)
+    pending = deque()
+    try:
+        file_iter = iter(files)
+        for file_path in file_iter:
+            pending.append((file_path, executor.submit(_chunk_with_template, file_path, preamble_template)))
+            if len(pending) >= window:
+                break
+
+        while pending:
+            file_path, future = pending.popleft()
+            next_path = next(file_iter, None)
+            if next_path is not None:
+                pending.append((next_path, executor.submit(_chunk_with_template, next_path, preamble_template)))
+            yield file_path, _counted(future.result())
+    except BrokenProcessPool:
+        logging.error("❌ A chunking worker died; the pool is restarted on next use.")
+        raise
+    finally:
+        # Also reached when the consumer stops early (e.g. a cancelled ingestion);
+        # the pool is shared, so only this call's queued files are dropped
+        for _, future in pending:
+            future.cancel()
@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable
+from services.metrics import Gauge
+
+CHAT_MODEL_NAME = "gemini-2.0-flash"
+
+SERVICE_INIT_SECONDS = Gauge(
+    "repo_companion_service_init_seconds", "Time taken to initialize each shared service.", ["service"]
+)
+
+
+def _load_embedding_model():
+    from services.embedder import load_model
+    return load_model()
+
+
+def _load_embedding_cache():
+    from services.embedding_cache import EmbeddingCache
+    from config.settings import EMBED_CACHE_ENABLED, EMBED_CACHE_PATH, EMBED_CACHE_MAX_ENTRIES
+    return EmbeddingCache(EMBED_CACHE_PATH, EMBED_CACHE_MAX_ENTRIES) if EMBED_CACHE_ENABLED else None
+
+
+def _load_response_cache():
+    from services.response_cache import ResponseCache
+    from config.settings import (RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_ENTRIES,
+                                 RESPONSE_CACHE_TTL_SECONDS)
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    return ResponseCache(RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS)
+
+
+def _load_chroma_client():
+    from services.vector_db import get_client
+    return get_client()
+
+
+def _load_chat_model():
+    import google.generativeai as genai
+    from config.env import GEMINI_API_KEY
+    genai.configure(api_key=GEMINI_API_KEY)
+    return genai.GenerativeModel(CHAT_MODEL_NAME)
+
+
+def _load_agent_executor():
+    from tools.agent_executor import get_agent_executor
+    return get_agent_executor()
+
+
+class ServiceContainer:
+    """
+    Creates each heavy shared resource once, on first use (or during warm-up),
+    and hands the same instance to every route and service.
+    """
+
+    FACTORIES: Dict[str, Callable] = {
+        "embedding_model": _load_embedding_model,
+        "embedding_cache": _load_embedding_cache,
+        "response_cache": _load_response_cache,
+        "chroma_client": _load_chroma_client,
+        "chat_model": _load_chat_model,
+        "agent_executor": _load_agent_executor,
+    }
+
+    def __init__(self):
+        self._instances = {}
+        self._locks = {name: threading.Lock() for name in self.FACTORIES}
+        self.init_seconds: Dict[str, float] = {}
+
+    def get(self, name: str):
+        if name in self._instances:
+            return self._instances[name]
+        # One lock per service: a slow model load doesn't block e.g. the Chroma client
+        with self._locks[name]:
+            if name not in self._instances:
+                start = time.perf_counter()
+                self._instances[name] = self.FACTORIES[name]()
+                elapsed = time.perf_counter() - start
+                self.init_seconds[name] = elapsed
+                SERVICE_INIT_SECONDS.set(round(elapsed, 4), service=name)
+                logging.info(f"🚀 Initialized {name} in {elapsed:.2f}s")
+        return self._instances[name]
+
+    def is_ready(self, name: str) -> bool:
+        return name in self._instances
+
+    def warm_up(self, names: Iterable[str] = ("embedding_model", "embedding_cache", "response_cache", "chroma_client")):
+        """
+        Eagerly creates the given services; failures are logged and retried on first use.
+        """
+        for name in names:
+            try:
+                self.get(name)
+            except Exception as e:
+                logging.error(f"❌ Warm-up of {name} failed: {e}")
+
+    @property
+    def embedding_model(self):
+        return self.get("embedding_model")
+
+    @property
+    def embedding_cache(self):
+        return self.get("embedding_cache")
+
+    @property
+    def response_cache(self):
+        return self.get("response_cache")
+
+    @property
+    def chroma_client(self):
+        return self.get("chroma_client")
+
+    @property
+    def chat_model(self):
+        return self.get("chat_model")
+
+    @property
+    def agent_executor(self):
+        return self.get("agent_executor")
+
+
+container = ServiceContainer()
@@ -0,0 +1,162 @@
+import logging
+import re
+import threading
+from typing import List, Optional, Tuple
+from services.chunker import PREAMBLE_TEMPLATE
+from config.settings import CONTEXT_TOKEN_BUDGET, CONTEXT_TOKENIZER
+
+# 🧱 Packs retrieved chunks into a prompt-sized, de-duplicated context block
+
+PREAMBLE_PATTERN = re.compile(
+    "^" + re.escape(PREAMBLE_TEMPLATE).replace(re.escape("{path}"), r"[^\n]*")
+)
+# Chunks of the same file at most this many characters apart (the blank lines
+# the splitter trims) are merged
+MERGE_GAP_CHARS = 4
+# Don't bother adding a truncated block with less room than this
+MIN_BLOCK_TOKENS = 64
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(CONTEXT_TOKENIZER)
+                except Exception as e:
+                    # e.g. the BPE file can't be downloaded: estimate instead of failing retrieval
+                    logging.warning(f"⚠️ tiktoken encoding {CONTEXT_TOKENIZER} unavailable ({e}), estimating tokens.")
+                    _encoding = False
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    encoding = _get_encoding()
+    if encoding:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    return text[:max_tokens * 4]
+
+
+def strip_preamble(text: str) -> str:
+    return PREAMBLE_PATTERN.sub("", text, count=1)
+
+
+def source_label(meta: dict) -> str:
+    """
+    "path" for text chunks, "path (lines a-b, symbol)" for syntax-aware chunks.
+    """
+    label = str(meta.get("source"))
+    if meta.get("start_line"):
+        details = f"lines {meta['start_line']}-{meta.get('end_line', meta['start_line'])}"
+        if meta.get("symbol"):
+            details += f", {meta['symbol']}"
+        label += f" ({details})"
+    return label
+
+
+def _merge_block(block: dict, chunk: dict):
+    """
+    Appends `chunk` (which starts at or after `block`) to `block`, dropping the
+    text they share.
+    """
+    overlap = block["end"] - chunk["start"]
+    if overlap >= len(chunk["text"]):
+        pass  # fully contained
+    elif overlap > 0:
+        block["text"] += chunk["text"][overlap:]
+    else:
+        block["text"] += ("\n" if overlap == 0 else "\n\n") + chunk["text"]
+    block["end"] = max(block["end"], chunk["end"])
+    block["rank"] = min(block["rank"], chunk["rank"])
+    meta, other = block["meta"], chunk["meta"]
+    if other.get("end_line"):
+        meta["end_line"] = max(meta.get("end_line", 0), other["end_line"])
+    if other.get("symbol"):
+        symbols = [s for s in (meta.get("symbol", ""), other["symbol"]) if s]
+        meta["symbol"] = ", ".join(dict.fromkeys(", ".join(symbols).split(", ")))
+
+
+def merge_chunks(documents: List[str], metadatas: List[dict]) -> List[dict]:
+    """
+    Strips file preambles and merges overlapping/adjacent chunks of the same file
+    into blocks. Each block keeps the best (lowest) rank of its chunks.
+    """
+    by_source = {}
+    for rank, (doc, meta) in enumerate(zip(documents, metadatas)):
+        meta = dict(meta or {})
+        text = strip_preamble(doc).strip("\n")
+        start = meta.get("start_index")
+        chunk = {"text": text, "meta": meta, "rank": rank,
+                 "start": start, "end": start + len(text) if start is not None else None}
+        by_source.setdefault(meta.get("source"), []).append(chunk)
+
+    blocks = []
+    for chunks in by_source.values():
+        # Chunks without offsets (older indexes) can't be placed, keep them as-is
+        blocks.extend(chunk for chunk in chunks if chunk["start"] is None)
+        placed = sorted((chunk for chunk in chunks if chunk["start"] is not None), key=lambda c: c["start"])
+        for chunk in placed:
+            last = blocks[-1] if blocks and blocks[-1]["start"] is not None \
+                and blocks[-1]["meta"].get("source") == chunk["meta"].get("source") else None
+            if last and chunk["start"] <= last["end"] + MERGE_GAP_CHARS:
+                _merge_block(last, chunk)
+            else:
+                blocks.append(chunk)
+
+    # Identical text retrieved twice (e.g. copies of a file) is only sent once
+    seen, unique = set(), []
+    for block in sorted(blocks, key=lambda b: b["rank"]):
+        if block["text"] and block["text"] not in seen:
+            seen.add(block["text"])
+            unique.append(block)
+    return unique
+
+
+def assemble_context(documents: List[str], metadatas: List[dict],
+                     budget: Optional[int] = None) -> Tuple[str, dict]:
+    """
+    Builds the prompt context from ranked chunks: merges same-file overlaps, drops
+    duplicate preambles, then adds blocks by relevance until the token budget is
+    spent (truncating a block only when it is the first one).
+
+    Args:
+        documents: Chunk texts, most relevant first.
+        metadatas: Matching chunk metadata (source, start_index, lines, symbol).
+        budget: Max tokens of context. Defaults to CONTEXT_TOKEN_BUDGET.
+
+    Returns:
+        (context, stats): The context string and counts of chunks, blocks and tokens.
+    """
+    budget = budget or CONTEXT_TOKEN_BUDGET
+    blocks = merge_chunks(documents, metadatas)
+
+    parts, used, dropped = [], 0, 0
+    for block in blocks:
+        text = f"From {source_label(block['meta'])}:\n{block['text']}"
+        separator_tokens = 1 if parts else 0
+        tokens = count_tokens(text)
+        remaining = budget - used - separator_tokens
+        if tokens > remaining:
+            if parts or remaining < MIN_BLOCK_TOKENS:
+                dropped += 1
+                continue
+            text = truncate_to_tokens(text, remaining)
+            tokens = count_tokens(text)
+        parts.append(text)
+        used += tokens + separator_tokens
+
+    stats = {"chunks": len(documents), "blocks": len(parts), "dropped": dropped, "tokens": used, "budget": budget}
+    logging.info(f"🧱 Packed {len(documents)} chunks into {len(parts)} blocks, {used}/{budget} tokens.")
+    return "\n\n".join(parts), stats
@@ -1,22 +1,120 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
-from typing import List
+from typing import List, Union
+import hashlib
 import logging
+import re
+from services.container import container
+from services.metrics import register_collector
+from services.async_pool import bounded_pool, run_in_pool
+from config.settings import EMBEDDING_BACKEND, EMBEDDING_MODEL, EMBED_WORKERS
 
-embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
 
-def get_embeddings(text_chunks: List[str]) -> List[List[float]]:
+class HashingEmbedder:
+    """
+    Deterministic, model-free embedder using the hashing trick over word tokens.
+    Texts sharing words get similar vectors, which is enough for benchmarks and
+    offline runs without downloading a model.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        if isinstance(texts, str):
+            return self._embed_one(texts)
+        return np.stack([self._embed_one(text) for text in texts]) if texts else np.zeros((0, self.dim), dtype=np.float32)
+
+
+def load_model():
+    if EMBEDDING_BACKEND == "hash":
+        logging.info("🧪 Using the deterministic hashing embedder (no model download).")
+        return HashingEmbedder()
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+
+# The cache key includes the backend so stub vectors never mix with real ones
+MODEL_NAME = "hash-384" if EMBEDDING_BACKEND == "hash" else EMBEDDING_MODEL
+
+# The model and cache are created lazily by the shared service container
+
+# Encoding is CPU-bound: coroutines queue it on a small pool of its own, so a
+# burst of queries can't take every thread the event loop offloads to
+embed_pool = bounded_pool("embed", EMBED_WORKERS)
+
+
+def _encode(text_chunks: List[str], batch_size: int) -> List[List[float]]:
+    embeddings = container.embedding_model.encode(text_chunks, batch_size=batch_size, show_progress_bar=False)
+    return embeddings.tolist() if isinstance(embeddings, np.ndarray) else embeddings
+
+
+def _encode_with_cache(text_chunks: List[str], batch_size: int) -> List[List[float]]:
+    """
+    Serves cached vectors and only runs the model on texts it has not seen yet.
+    """
+    embedding_cache = container.embedding_cache
+    if embedding_cache is None:
+        return _encode(text_chunks, batch_size)
+
+    results = embedding_cache.get_many(MODEL_NAME, text_chunks)
+
+    # Deduplicate misses so identical chunks in one batch are encoded once
+    missing = {}
+    for i, vector in enumerate(results):
+        if vector is None:
+            missing.setdefault(text_chunks[i], []).append(i)
+
+    if missing:
+        texts = list(missing)
+        vectors = _encode(texts, batch_size)
+        embedding_cache.put_many(MODEL_NAME, texts, vectors)
+        for text, vector in zip(texts, vectors):
+            for i in missing[text]:
+                results[i] = vector
+
+    return results
+
+
+def get_cache_stats() -> dict:
+    # Don't open the cache just to report on it
+    if not container.is_ready("embedding_cache") or container.embedding_cache is None:
+        return {}
+    return container.embedding_cache.stats()
+
+
+register_collector(lambda: [
+    (f"repo_companion_embedding_cache_{key}", f"Embedding cache {key.replace('_', ' ')}.", value)
+    for key, value in get_cache_stats().items()
+])
+
+
+def get_embeddings(text_chunks: List[str], batch_size: int = 32) -> List[List[float]]:
     try:
-        embeddings = embedding_model.encode(text_chunks, show_progress_bar=True)
-        return embeddings.tolist() if isinstance(embeddings, np.ndarray) else embeddings
+        return _encode_with_cache(text_chunks, batch_size)
     except Exception as e:
         logging.error(f"❌ Batch embedding failed: {e}")
         return []
 
 def get_embedding(text: str) -> List[float]:
     try:
-        embedding = embedding_model.encode(text)
-        return embedding.tolist() if isinstance(embedding, np.ndarray) else embedding
+        return _encode_with_cache([text], batch_size=1)[0]
     except Exception as e:
         logging.error(f"❌ Single embedding failed: {e}")
         return []
+
+
+async def get_embeddings_async(text_chunks: List[str], batch_size: int = 32) -> List[List[float]]:
+    return await run_in_pool(embed_pool, get_embeddings, text_chunks, batch_size)
+
+
+async def get_embedding_async(text: str) -> List[float]:
+    return await run_in_pool(embed_pool, get_embedding, text)
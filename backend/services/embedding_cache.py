@@ -0,0 +1,137 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Sequence
+import numpy as np
+
+# SQLite caps the number of bound parameters per statement
+_SQL_BATCH = 500
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", errors="ignore")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by (model name, SHA-256 of the chunk text).
+
+    Vectors are stored as raw float32 blobs in SQLite. When the cache grows past
+    `max_entries`, the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        logging.info(f"🗃️ Embedding cache at {path} holds {self._size} vectors.")
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Looks up every text and returns its cached vector, or None on a miss.
+        """
+        hashes = [text_hash(text) for text in texts]
+        found = {}
+        now = time.time()
+
+        with self._lock:
+            for start in range(0, len(hashes), _SQL_BATCH):
+                batch = list(set(hashes[start:start + _SQL_BATCH]))
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, key) for key in found],
+                )
+                self._conn.commit()
+
+            results = [found.get(key) for key in hashes]
+            hit_count = sum(1 for vector in results if vector is not None)
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+
+        return results
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """
+        Stores vectors for the given texts, evicting old entries if the cache is full.
+        """
+        if not texts:
+            return
+        now = time.time()
+        rows = [
+            (model, text_hash(text), np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, text_hash, vector, last_access) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._size += self._conn.total_changes - before
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self):
+        overflow = self._size - self.max_entries
+        if overflow <= 0:
+            return
+        # Evict a little extra so we don't pay for an eviction on every insert
+        to_evict = overflow + self.max_entries // 10
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+            (to_evict,),
+        )
+        evicted = self._conn.execute("SELECT changes()").fetchone()[0]
+        self._size -= evicted
+        self.evictions += evicted
+        logging.info(f"🧹 Evicted {evicted} least recently used embeddings from cache.")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,342 @@
+import logging
+import os
+import time
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+from langchain.docstore.document import Document
+from services.chunker import chunk_files, PREAMBLE_TEMPLATE
+from services.embedder import get_embeddings, get_cache_stats
+from services.repo_processor import clone_repo, get_head_commit
+from services.repo_scanner import scan_repo
+from services.manifest import load_manifest, save_manifest, delete_manifest, hash_files, diff_manifest
+from services.vector_db import get_repo_db, content_chunk_id, open_staging_db, promote_staging_db, discard_staging_db
+from services.metrics import timed, FILES_CHUNKED, CHUNKS_STORED
+from services.lexical_index import BM25Index, get_lexical_index, staging_lexical_index, install_lexical_index
+from services.repo_registry import repo_id_from_url, get_repo, register_repo, evict_idle_repos
+from services.response_cache import invalidate_repo_responses
+from config.settings import EMBED_BATCH_SIZE
+
+
+class IngestionCancelled(Exception):
+    pass
+
+
+class IngestProgress:
+    """
+    Receives progress updates from the ingestion pipeline. The base class is a
+    no-op; background jobs override it to expose stage/counters and to cancel.
+    """
+
+    def set_stage(self, stage: str, files_total: Optional[int] = None):
+        pass
+
+    def file_done(self):
+        pass
+
+    def chunks_stored(self, count: int):
+        pass
+
+    def check_cancelled(self):
+        pass
+
+
+def iter_file_chunks(files: Iterable[str], progress: Optional[IngestProgress] = None) -> Iterator[Document]:
+    """
+    Lazily chunks each file (in parallel worker processes for large repos) and
+    yields its chunks one by one, so the whole repo never has to be held in
+    memory before embedding starts.
+    """
+    progress = progress or IngestProgress()
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+    results = chunk_files(files, preamble_template=PREAMBLE_TEMPLATE)
+    while True:
+        # Time spent waiting on the (possibly parallel) chunker for the next file
+        with timed("chunk"):
+            file_path, chunks = next(results, (None, None))
+        if file_path is None:
+            break
+
+        progress.check_cancelled()
+        progress.file_done()
+        FILES_CHUNKED.inc()
+
+        if not chunks:
+            logging.warning(f"⚠️ No chunks generated from {file_path}")
+            continue
+
+        logging.debug(f"✂️ {len(chunks)} chunks created from {file_path}")
+        for i, chunk in enumerate(chunks):
+            if debug:
+                logging.debug(f"🧩 Chunk {i+1}/{len(chunks)} from {file_path}:\n{chunk.page_content[:300]}...\n")
+            chunk.metadata["chunk_index"] = i
+            yield chunk
+
+
+def chunk_id(chunk: Document, repo: str = "") -> str:
+    """
+    Content-addressed vector ID from (repo, file, offset in file, content hash), so
+    unchanged chunks keep their ID across runs and never collide between files or repos.
+    """
+    return content_chunk_id(repo, chunk.metadata["source"], chunk.metadata.get("start_index", 0),
+                            chunk.page_content)
+
+
+def iter_batches(items: Iterable, batch_size: int) -> Iterator[List]:
+    """
+    Groups an iterable into lists of at most `batch_size` items.
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def embed_and_store(files: Iterable[str], db, batch_size: int = EMBED_BATCH_SIZE,
+                    progress: Optional[IngestProgress] = None, lexical: Optional[BM25Index] = None,
+                    repo: str = "", failed: Optional[Set[str]] = None) -> int:
+    """
+    Streams chunks from `files` into fixed-size batches, embeds each batch with a
+    single model call and writes it to the vector DB.
+
+    Args:
+        files: Paths of the files to ingest.
+        db: The vector store to write into (see get_repo_db).
+        batch_size: Number of chunks per embedding call.
+        progress: Optional progress/cancellation hooks.
+        lexical: Optional BM25 index to feed alongside the vector DB.
+        repo: Repo name mixed into the chunk IDs.
+        failed: Optional set that collects the source paths of chunks that could
+            not be embedded or written, so the caller can retry those files.
+
+    Returns:
+        int: Number of chunks stored.
+    """
+    progress = progress or IngestProgress()
+    batch_size = max(1, batch_size)
+    total_stored = 0
+    pipeline_start = time.perf_counter()
+
+    for batch_no, batch in enumerate(iter_batches(iter_file_chunks(files, progress), batch_size), start=1):
+        progress.check_cancelled()
+        texts = [chunk.page_content for chunk in batch]
+
+        start = time.perf_counter()
+        with timed("embed"):
+            embeddings = get_embeddings(texts, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+
+        if len(embeddings) != len(texts):
+            logging.error(f"❌ Embedding failed for batch {batch_no} ({len(texts)} chunks), skipping.")
+            if failed is not None:
+                failed.update(chunk.metadata["source"] for chunk in batch)
+            continue
+
+        logging.info(
+            f"⚡ Batch {batch_no}: embedded {len(texts)} chunks in {elapsed:.2f}s "
+            f"({len(texts) / max(elapsed, 1e-9):.1f} chunks/s)"
+        )
+
+        ids = [chunk_id(chunk, repo) for chunk in batch]
+        with timed("vector_write"):
+            not_written = set(db.add_chunks(texts, embeddings, [chunk.metadata for chunk in batch], ids=ids) or [])
+        if not_written:
+            logging.error(f"❌ Batch {batch_no}: {len(not_written)} of {len(texts)} chunks were not stored.")
+            if failed is not None:
+                failed.update(chunk.metadata["source"] for chunk, chunk_key in zip(batch, ids)
+                              if chunk_key in not_written)
+        stored = [(chunk_key, text, chunk.metadata["source"])
+                  for chunk, chunk_key, text in zip(batch, ids, texts) if chunk_key not in not_written]
+        CHUNKS_STORED.inc(len(stored))
+        if lexical is not None and stored:
+            lexical.add_many(*map(list, zip(*stored)))
+        total_stored += len(stored)
+        progress.chunks_stored(len(stored))
+
+    total_elapsed = time.perf_counter() - pipeline_start
+    logging.info(f"📦 Stored {total_stored} chunks in {total_elapsed:.2f}s (batch size {batch_size}).")
+    cache_stats = get_cache_stats()
+    if cache_stats:
+        logging.info(f"🗃️ Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                     f"{cache_stats['entries']} entries.")
+    return total_stored
+
+
+def manifest_hashes(old_files: Dict[str, str], hashes: Dict[str, str], failed: Iterable[str]) -> Dict[str, str]:
+    """
+    File hashes to record after a sync. A file that failed keeps the hash of the
+    last run that stored it (or is left out), so the next incremental pass sees it
+    as added/modified/removed again and retries it.
+    """
+    recorded = dict(hashes)
+    for path in failed:
+        if path in old_files:
+            recorded[path] = old_files[path]
+        else:
+            recorded.pop(path, None)
+    return recorded
+
+
+def ingest_repo(repo_url: str, db, incremental: bool = False,
+                batch_size: int = EMBED_BATCH_SIZE, repo_name: str = "cloned_repo",
+                progress: Optional[IngestProgress] = None, lexical: Optional[BM25Index] = None) -> dict:
+    """
+    Clones (or updates) a repo and indexes it into `db` (and the BM25 index
+    `lexical`, if given).
+
+    In incremental mode the manifest of the previous run is used to re-chunk and
+    re-embed only added/modified files and to drop vectors of removed files.
+    Without a usable manifest it falls back to a full re-index, which builds a
+    fresh store (and BM25 index) and swaps it in for `db` only once it completes,
+    so a failed or cancelled run leaves the previous index in place.
+
+    Files whose chunks could not be stored are left out of the manifest (listed
+    under "failed") so the next incremental run picks them up again.
+
+    Returns:
+        dict: Summary with repo_path, commit, mode, file counts and chunks stored.
+    """
+    progress = progress or IngestProgress()
+    manifest = load_manifest(repo_name) if incremental else None
+    if manifest and manifest.get("repo_url") != repo_url:
+        logging.info(f"🔁 Manifest belongs to {manifest.get('repo_url')}, doing a full re-index.")
+        manifest = None
+
+    progress.set_stage("cloning")
+    logging.info(f"📦 Cloning repo from {repo_url}")
+    with timed("clone"):
+        repo_path = clone_repo(repo_url, repo_name=repo_name, reuse=manifest is not None)
+    logging.info(f"✅ Repo cloned at {repo_path}")
+    commit = get_head_commit(repo_path)
+    progress.check_cancelled()
+
+    progress.set_stage("scanning")
+    with timed("walk"):
+        scan = scan_repo(repo_path)
+    files = scan.files
+    logging.info(f"🔍 {len(files)} relevant files found after filtering.")
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        for file_path in files:
+            logging.debug(f"➡ File: {file_path}")
+
+    summary = {"repo_path": repo_path, "commit": commit, "files": len(files), "skipped": scan.skip_counts()}
+
+    if manifest is None:
+        if not files:
+            raise ValueError("No relevant files found.")
+        hashes = hash_files(repo_path, files)
+        failed: Set[str] = set()
+        staging = open_staging_db(repo_name)
+        staging_lexical = staging_lexical_index(repo_name) if lexical is not None else None
+        try:
+            progress.set_stage("embedding", files_total=len(files))
+            total_chunks = embed_and_store(files, staging, batch_size=batch_size, progress=progress,
+                                           lexical=staging_lexical, repo=repo_name, failed=failed)
+            progress.check_cancelled()
+        except BaseException:
+            discard_staging_db(repo_name, staging)
+            raise
+
+        progress.set_stage("finalizing")
+        # Drop the manifest first so an interrupted swap can't leave it describing the old index
+        delete_manifest(repo_name)
+        promote_staging_db(repo_name, staging)
+        if staging_lexical is not None:
+            install_lexical_index(repo_name, staging_lexical)
+        failed_paths = sorted(os.path.relpath(path, repo_path) for path in failed)
+        if failed_paths:
+            logging.warning(f"⚠️ {len(failed_paths)} files were not fully indexed; the next sync retries them.")
+        # No commit while files are missing, so the next sync doesn't report "nothing to do"
+        save_manifest(repo_name, repo_url, None if failed_paths else commit,
+                      manifest_hashes({}, hashes, failed_paths))
+        summary.update(mode="full", chunks=total_chunks, failed=failed_paths)
+        return summary
+
+    if commit is not None and commit == manifest.get("commit"):
+        logging.info(f"✅ {repo_url} already indexed at {commit}, nothing to do.")
+        summary.update(mode="incremental", added=0, modified=0, removed=0, chunks=0, failed=[])
+        return summary
+
+    progress.set_stage("hashing")
+    hashes = hash_files(repo_path, files)
+    added, modified, removed = diff_manifest(manifest.get("files", {}), hashes)
+    logging.info(f"🔁 Incremental sync: {len(added)} added, {len(modified)} modified, {len(removed)} removed.")
+
+    failed: Set[str] = set()
+    stale_sources = [os.path.join(repo_path, path) for path in modified + removed]
+    if stale_sources:
+        failed.update(db.delete_by_source(stale_sources) or [])
+        if lexical is not None:
+            lexical.remove_sources(stale_sources)
+
+    changed_files = [os.path.join(repo_path, path) for path in added + modified]
+    progress.set_stage("embedding", files_total=len(changed_files))
+    total_chunks = embed_and_store(changed_files, db, batch_size=batch_size, progress=progress,
+                                   lexical=lexical, repo=repo_name, failed=failed) if changed_files else 0
+
+    progress.set_stage("finalizing")
+    if lexical is not None:
+        lexical.save()
+    failed_paths = sorted(os.path.relpath(path, repo_path) for path in failed)
+    if failed_paths:
+        logging.warning(f"⚠️ {len(failed_paths)} files were not fully indexed; the next sync retries them.")
+    save_manifest(repo_name, repo_url, None if failed_paths else commit,
+                  manifest_hashes(manifest.get("files", {}), hashes, failed_paths))
+    summary.update(mode="incremental", added=len(added), modified=len(modified),
+                   removed=len(removed), chunks=total_chunks, failed=failed_paths)
+    return summary
+
+
+_repo_locks: Dict[str, threading.Lock] = {}
+_repo_locks_guard = threading.Lock()
+
+
+def _repo_lock(repo_id: str) -> threading.Lock:
+    with _repo_locks_guard:
+        return _repo_locks.setdefault(repo_id, threading.Lock())
+
+
+def active_repo_ids() -> List[str]:
+    """
+    Repos with an ingestion currently in progress; these must never be evicted.
+    """
+    with _repo_locks_guard:
+        return [repo_id for repo_id, lock in _repo_locks.items() if lock.locked()]
+
+
+def index_repo(repo_url: str, incremental: Optional[bool] = None, batch_size: int = EMBED_BATCH_SIZE,
+               progress: Optional[IngestProgress] = None) -> dict:
+    """
+    Indexes a GitHub repo into its own namespace and registers it as warm.
+    Runs synchronously; callers on the event loop should offload it to a thread.
+
+    Args:
+        repo_url: GitHub URL of the repo.
+        incremental: Re-sync instead of re-ingest. Defaults to True when the repo
+            is already indexed on this server.
+        batch_size: Number of chunks per embedding call.
+        progress: Optional progress/cancellation hooks.
+
+    Returns:
+        dict: ingest_repo's summary plus the repo_id.
+    """
+    repo_id = repo_id_from_url(repo_url)
+    if incremental is None:
+        incremental = get_repo(repo_id) is not None
+
+    # Serialize ingestions of the same repo; different repos index in parallel
+    with _repo_lock(repo_id):
+        summary = ingest_repo(repo_url, get_repo_db(repo_id), incremental=incremental,
+                              batch_size=batch_size, repo_name=repo_id, progress=progress,
+                              lexical=get_lexical_index(repo_id))
+        register_repo(repo_id, repo_url, summary["commit"])
+        if summary["mode"] == "full" or summary["added"] or summary["modified"] or summary["removed"]:
+            # Cached answers were built from the old chunks
+            invalidate_repo_responses(repo_id)
+
+    evict_idle_repos(keep=[repo_id, *active_repo_ids()])
+    summary["repo_id"] = repo_id
+    return summary
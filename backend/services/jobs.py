@@ -0,0 +1,183 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from services.ingestion import IngestProgress, IngestionCancelled, index_repo
+from config.settings import EMBED_BATCH_SIZE, INGEST_WORKERS, MAX_PENDING_JOBS, JOB_HISTORY_LIMIT
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+ACTIVE_STATUSES = {QUEUED, RUNNING}
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+@dataclass
+class IngestJob(IngestProgress):
+    """
+    One background ingestion of a repo. Doubles as the pipeline's progress sink.
+    """
+    job_id: str
+    repo_url: str
+    incremental: Optional[bool] = None
+    batch_size: int = EMBED_BATCH_SIZE
+    status: str = QUEUED
+    stage: str = "queued"
+    files_total: int = 0
+    files_done: int = 0
+    chunks_done: int = 0
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    stage_started_at: Optional[float] = None
+    error: Optional[str] = None
+    exception: Optional[Exception] = field(default=None, repr=False)
+    result: Optional[dict] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    future: Optional[Future] = field(default=None, repr=False)
+
+    # IngestProgress hooks (called from the worker thread)
+    def set_stage(self, stage: str, files_total: Optional[int] = None):
+        self.stage = stage
+        self.stage_started_at = time.time()
+        if files_total is not None:
+            self.files_total = files_total
+            self.files_done = 0
+
+    def file_done(self):
+        self.files_done += 1
+
+    def chunks_stored(self, count: int):
+        self.chunks_done += count
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise IngestionCancelled(f"Job {self.job_id} was cancelled")
+
+    def eta_seconds(self) -> Optional[float]:
+        """
+        Extrapolates the remaining embedding time from the file throughput so far.
+        """
+        if self.stage != "embedding" or not self.files_done or not self.stage_started_at:
+            return None
+        elapsed = time.time() - self.stage_started_at
+        remaining = max(self.files_total - self.files_done, 0)
+        return round(elapsed / self.files_done * remaining, 1)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "repo_url": self.repo_url,
+            "status": self.status,
+            "stage": self.stage,
+            "files_total": self.files_total,
+            "files_done": self.files_done,
+            "chunks_done": self.chunks_done,
+            "eta_seconds": self.eta_seconds(),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+class IngestJobManager:
+    """
+    Runs ingestion jobs on a bounded thread pool so the API stays responsive.
+    """
+
+    def __init__(self, max_workers: int = INGEST_WORKERS, max_pending: int = MAX_PENDING_JOBS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._max_pending = max_pending
+        self._jobs: Dict[str, IngestJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, repo_url: str, incremental: Optional[bool] = None,
+               batch_size: int = EMBED_BATCH_SIZE) -> IngestJob:
+        """
+        Queues an ingestion. If the same repo is already queued or running, that
+        job is returned instead of starting a duplicate.
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job.repo_url == repo_url and job.status in ACTIVE_STATUSES:
+                    return job
+
+            pending = sum(1 for job in self._jobs.values() if job.status in ACTIVE_STATUSES)
+            if pending >= self._max_pending:
+                raise JobQueueFull(f"Too many ingestion jobs in flight ({pending}).")
+
+            job = IngestJob(job_id=uuid.uuid4().hex, repo_url=repo_url,
+                            incremental=incremental, batch_size=batch_size)
+            self._jobs[job.job_id] = job
+            self._prune_locked()
+            job.future = self._executor.submit(self._run, job)
+
+        logging.info(f"🧾 Queued ingestion job {job.job_id} for {repo_url}")
+        return job
+
+    def _run(self, job: IngestJob):
+        if job.cancel_event.is_set():
+            # Cancelled after a worker picked it up, when future.cancel() no longer works
+            job.status = CANCELLED
+            job.stage = "cancelled"
+            job.finished_at = time.time()
+            logging.info(f"🛑 Ingestion job {job.job_id} cancelled before it started.")
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = index_repo(job.repo_url, incremental=job.incremental,
+                                    batch_size=job.batch_size, progress=job)
+            job.status = SUCCEEDED
+            job.stage = "done"
+            logging.info(f"✅ Ingestion job {job.job_id} finished: {job.result}")
+        except IngestionCancelled:
+            job.status = CANCELLED
+            job.stage = "cancelled"
+            logging.info(f"🛑 Ingestion job {job.job_id} cancelled.")
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            job.exception = e
+            logging.error(f"❌ Ingestion job {job.job_id} failed", exc_info=True)
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[IngestJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[IngestJob]:
+        """
+        Cancels a queued job immediately; a running job stops at its next checkpoint.
+        """
+        job = self.get(job_id)
+        if job is None or job.status not in ACTIVE_STATUSES:
+            return job
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            job.status = CANCELLED
+            job.stage = "cancelled"
+            job.finished_at = time.time()
+        return job
+
+    def _prune_locked(self):
+        finished = sorted(
+            (job for job in self._jobs.values() if job.status not in ACTIVE_STATUSES),
+            key=lambda job: job.created_at,
+        )
+        for job in finished[:max(len(finished) - JOB_HISTORY_LIMIT, 0)]:
+            del self._jobs[job.job_id]
+
+
+job_manager = IngestJobManager()
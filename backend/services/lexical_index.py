@@ -0,0 +1,183 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+# 🔤 Per-repo BM25 indexes live next to the Chroma store
+LEXICAL_STORE_DIR = "./lexical_store"
+
+_WORD_RE = re.compile(r"[A-Za-z0-9_]+")
+# Splits camelCase / PascalCase / acronyms: "parseHTTPResponse2" -> parse, HTTP, Response, 2
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+
+def tokenize_code(text: str) -> List[str]:
+    """
+    Code-aware tokenizer: keeps each identifier whole (lowercased) and also emits
+    its snake_case and camelCase parts, so both `get_user_id` and "user id" match.
+    """
+    tokens = []
+    for word in _WORD_RE.findall(text):
+        lowered = word.lower()
+        if len(lowered) > 1:
+            tokens.append(lowered)
+        parts = [p for piece in word.split("_") for p in _CAMEL_RE.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(p.lower() for p in parts if len(p) > 1)
+    return tokens
+
+
+class BM25Index:
+    """
+    Small in-memory BM25 index over chunk text, persisted as JSON per repo.
+    Documents are keyed by the same IDs used in the vector store.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._docs: Dict[str, dict] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_len = 0
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                docs = json.load(f)
+        except Exception as e:
+            logging.warning(f"⚠️ Ignoring unreadable lexical index {self.path}: {e}")
+            return
+        for doc_id, doc in docs.items():
+            self._index_doc(doc_id, doc["source"], doc["tf"])
+        logging.info(f"🔤 Loaded lexical index with {len(self._docs)} chunks from {self.path}")
+
+    def _index_doc(self, doc_id: str, source: str, tf: Dict[str, int]):
+        self._docs[doc_id] = {"source": source, "tf": tf, "len": sum(tf.values())}
+        self._total_len += self._docs[doc_id]["len"]
+        for term, count in tf.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+
+    def _remove_doc(self, doc_id: str):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self._total_len -= doc["len"]
+        for term in doc["tf"]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def add_many(self, ids: List[str], texts: List[str], sources: List[str]):
+        with self._lock:
+            for doc_id, text, source in zip(ids, texts, sources):
+                self._remove_doc(doc_id)
+                self._index_doc(doc_id, source, dict(Counter(tokenize_code(text))))
+
+    def remove_sources(self, sources: Iterable[str]):
+        sources = set(sources)
+        with self._lock:
+            for doc_id in [d for d, doc in self._docs.items() if doc["source"] in sources]:
+                self._remove_doc(doc_id)
+
+    def clear(self):
+        with self._lock:
+            self._docs.clear()
+            self._postings.clear()
+            self._total_len = 0
+
+    def save(self):
+        with self._lock:
+            payload = {doc_id: {"source": doc["source"], "tf": doc["tf"]} for doc_id, doc in self._docs.items()}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self.path)
+        logging.info(f"🔤 Saved lexical index with {len(payload)} chunks to {self.path}")
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Returns up to `top_k` (doc_id, bm25 score) pairs, best first.
+        """
+        terms = set(tokenize_code(query))
+        with self._lock:
+            n_docs = len(self._docs)
+            if not n_docs or not terms:
+                return []
+            avg_len = self._total_len / n_docs
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    doc_len = self._docs[doc_id]["len"]
+                    norm = tf + self.k1 * (1 - self.b + self.b * doc_len / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+
+_indexes: Dict[str, BM25Index] = {}
+_lock = threading.Lock()
+
+
+def lexical_index_path(repo_id: str) -> str:
+    return os.path.join(LEXICAL_STORE_DIR, f"{repo_id}.json")
+
+
+def get_lexical_index(repo_id: str) -> BM25Index:
+    with _lock:
+        if repo_id not in _indexes:
+            _indexes[repo_id] = BM25Index(lexical_index_path(repo_id))
+        return _indexes[repo_id]
+
+
+def staging_lexical_index(repo_id: str) -> BM25Index:
+    """
+    Empty index for a full rebuild of `repo_id`; install_lexical_index makes it live.
+    """
+    path = f"{lexical_index_path(repo_id)}.next"
+    if os.path.exists(path):
+        os.remove(path)
+    return BM25Index(path)
+
+
+def install_lexical_index(repo_id: str, index: BM25Index):
+    """
+    Persists a rebuilt index under `repo_id`'s path and serves it from now on.
+    """
+    index.path = lexical_index_path(repo_id)
+    index.save()
+    with _lock:
+        _indexes[repo_id] = index
+
+
+def drop_lexical_index(repo_id: str):
+    with _lock:
+        _indexes.pop(repo_id, None)
+    path = lexical_index_path(repo_id)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    """
+    Fuses several best-first ID rankings: score(d) = sum over rankings of 1 / (k + rank).
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda doc_id: scores[doc_id], reverse=True)
@@ -1,12 +1,15 @@
-import google.generativeai as genai
-from config.env import GEMINI_API_KEY
+import asyncio
+from typing import Optional
+from services.container import container, CHAT_MODEL_NAME
+from services.streaming import is_streaming, emit_event
+from services.metrics import timed, LLM_CALLS, RESPONSE_CACHE_LOOKUPS, register_collector
+from services.repo_registry import resolve_repo_id, get_repo
+from services.retrival import embed_query
+from config.settings import RESPONSE_CACHE_SEMANTIC, RESPONSE_CACHE_SEMANTIC_THRESHOLD
+import logging
 import re
 
-# Configure the Gemini API
-genai.configure(api_key=GEMINI_API_KEY)
-
-# Initialize the Gemini model
-chat_model = genai.GenerativeModel("gemini-2.0-flash")
+# The Gemini model is configured on first use by the shared service container
 
 
 def clean_response(text: str) -> str:
@@ -16,12 +19,155 @@ def clean_response(text: str) -> str:
     return re.sub(r'^AI Assistant.*\n?', '', text).strip()
 
 
-def generate_response_from_prompt(prompt: str) -> str:
+def _repo_version(repo_id: Optional[str]) -> Optional[str]:
+    repo = get_repo(repo_id) if repo_id else None
+    return repo.get("commit") if repo else None
+
+
+def _cached_response(prompt: str, query: Optional[str], scope: Optional[str]) -> Optional[str]:
+    """
+    Exact (model + prompt) lookup first, then the semantic tier when enabled.
+    """
+    cache = container.response_cache
+    if cache is None:
+        return None
+    response = cache.get(CHAT_MODEL_NAME, prompt)
+    if response is not None:
+        RESPONSE_CACHE_LOOKUPS.inc(result="exact_hit")
+        return response
+
+    repo_id = resolve_repo_id()
+    if RESPONSE_CACHE_SEMANTIC and query and scope and repo_id:
+        query_vector = embed_query(query)
+        if query_vector:
+            response = cache.get_similar(CHAT_MODEL_NAME, repo_id, _repo_version(repo_id), scope,
+                                         query_vector, RESPONSE_CACHE_SEMANTIC_THRESHOLD)
+            if response is not None:
+                RESPONSE_CACHE_LOOKUPS.inc(result="semantic_hit")
+                return response
+    RESPONSE_CACHE_LOOKUPS.inc(result="miss")
+    return None
+
+
+def _store_response(prompt: str, response: str, query: Optional[str], scope: Optional[str]):
+    cache = container.response_cache
+    if cache is None:
+        return
+    repo_id = resolve_repo_id()
+    query_vector = None
+    if RESPONSE_CACHE_SEMANTIC and query and scope:
+        query_vector = embed_query(query)
+    cache.put(CHAT_MODEL_NAME, prompt, response, repo_id=repo_id, repo_version=_repo_version(repo_id),
+              scope=scope, query_vector=query_vector)
+
+
+def _lookup_cache(prompt: str, query: Optional[str], scope: Optional[str]) -> Optional[str]:
+    try:
+        return _cached_response(prompt, query, scope)
+    except Exception as e:
+        logging.warning(f"⚠️ Response cache lookup failed: {e}")
+        return None
+
+
+def _save_to_cache(prompt: str, text: str, query: Optional[str], scope: Optional[str]):
+    if not text:
+        return
+    try:
+        _store_response(prompt, text, query, scope)
+    except Exception as e:
+        logging.warning(f"⚠️ Could not cache response: {e}")
+
+
+def generate_response_from_prompt(prompt: str, query: Optional[str] = None, scope: Optional[str] = None) -> str:
     """
     Sends a pre-formatted prompt to Gemini and returns the cleaned response.
+
+    Answers are cached per (model, prompt); with `query` and `scope` (the tool
+    name) they can also be reused for semantically equivalent questions about
+    the same repo commit (see RESPONSE_CACHE_SEMANTIC).
+    """
+    cached = _lookup_cache(prompt, query, scope)
+    if cached is not None:
+        if is_streaming():
+            emit_event("token", {"text": cached})
+        return cached
+
+    try:
+        with timed("llm_call"):
+            if is_streaming():
+                text = _stream_response(prompt)
+            else:
+                text = clean_response(container.chat_model.generate_content(prompt).text)
+        LLM_CALLS.inc(status="ok")
+    except Exception as e:
+        LLM_CALLS.inc(status="error")
+        return f"❌ Error in LLM response: {e}"
+
+    _save_to_cache(prompt, text, query, scope)
+    return text
+
+
+async def generate_response_from_prompt_async(prompt: str, query: Optional[str] = None,
+                                              scope: Optional[str] = None) -> str:
+    """
+    Async variant of generate_response_from_prompt using Gemini's
+    generate_content_async, so waiting on the model holds no thread. Cache
+    lookups (SQLite, maybe a query embedding) run off the event loop.
     """
+    cached = await asyncio.to_thread(_lookup_cache, prompt, query, scope)
+    if cached is not None:
+        if is_streaming():
+            emit_event("token", {"text": cached})
+        return cached
+
     try:
-        response = chat_model.generate_content(prompt)
-        return clean_response(response.text)
+        with timed("llm_call"):
+            if is_streaming():
+                text = await _stream_response_async(prompt)
+            else:
+                response = await container.chat_model.generate_content_async(prompt)
+                text = clean_response(response.text)
+        LLM_CALLS.inc(status="ok")
     except Exception as e:
+        LLM_CALLS.inc(status="error")
         return f"❌ Error in LLM response: {e}"
+
+    await asyncio.to_thread(_save_to_cache, prompt, text, query, scope)
+    return text
+
+
+def _stream_response(prompt: str) -> str:
+    """
+    Streams Gemini's answer to the current request as `token` events while
+    collecting the full text for the caller.
+    """
+    parts = []
+    for chunk in container.chat_model.generate_content(prompt, stream=True):
+        text = chunk.text
+        if text:
+            parts.append(text)
+            emit_event("token", {"text": text})
+    return clean_response("".join(parts))
+
+
+async def _stream_response_async(prompt: str) -> str:
+    parts = []
+    async for chunk in await container.chat_model.generate_content_async(prompt, stream=True):
+        text = chunk.text
+        if text:
+            parts.append(text)
+            emit_event("token", {"text": text})
+    return clean_response("".join(parts))
+
+
+def get_response_cache_stats() -> dict:
+    # Don't open the cache just to report on it
+    if not container.is_ready("response_cache") or container.response_cache is None:
+        return {}
+    return container.response_cache.stats()
+
+
+register_collector(lambda: [
+    (f"repo_companion_response_cache_{key}", f"LLM response cache {key.replace('_', ' ')}.", value)
+    for key, value in get_response_cache_stats().items()
+])
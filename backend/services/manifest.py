@@ -0,0 +1,85 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+# 📒 Per-repo manifests of indexed file hashes live next to the clones
+MANIFEST_DIR = os.path.join("temp", "manifests")
+
+
+def manifest_path(repo_name: str) -> str:
+    return os.path.join(MANIFEST_DIR, f"{repo_name}.json")
+
+
+def load_manifest(repo_name: str) -> Optional[dict]:
+    """
+    Loads the manifest written by the last successful ingestion of `repo_name`.
+    Returns None if the repo was never indexed or the manifest is unreadable.
+    """
+    path = manifest_path(repo_name)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logging.warning(f"⚠️ Ignoring unreadable manifest {path}: {e}")
+        return None
+
+
+def save_manifest(repo_name: str, repo_url: str, commit: Optional[str], files: Dict[str, str]):
+    """
+    Persists the indexed state of a repo: its URL, last indexed commit and a
+    map of relative file path -> content hash.
+    """
+    os.makedirs(MANIFEST_DIR, exist_ok=True)
+    path = manifest_path(repo_name)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"repo_url": repo_url, "commit": commit, "files": files}, f)
+    os.replace(tmp_path, path)
+    logging.info(f"📒 Saved manifest for {repo_name} ({len(files)} files) at commit {commit}")
+
+
+def delete_manifest(repo_name: str):
+    path = manifest_path(repo_name)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def hash_file(file_path: str, block_size: int = 1 << 20) -> str:
+    """
+    Returns the SHA-256 hex digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_files(repo_path: str, files: List[str]) -> Dict[str, str]:
+    """
+    Hashes every file and keys the result by its path relative to `repo_path`.
+    """
+    hashes = {}
+    for file_path in files:
+        try:
+            hashes[os.path.relpath(file_path, repo_path)] = hash_file(file_path)
+        except OSError as e:
+            logging.warning(f"⚠️ Could not hash {file_path}: {e}")
+    return hashes
+
+
+def diff_manifest(old_files: Dict[str, str], new_files: Dict[str, str]) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Compares two path -> hash maps.
+
+    Returns:
+        (added, modified, removed) lists of relative paths.
+    """
+    added = [path for path in new_files if path not in old_files]
+    modified = [path for path in new_files if path in old_files and old_files[path] != new_files[path]]
+    removed = [path for path in old_files if path not in new_files]
+    return added, modified, removed
@@ -0,0 +1,510 @@
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+from services.vector_store import VectorStore, next_version, normalize_rows
+from services.vector_db import content_chunk_id
+from config.settings import NUMPY_STORE_DTYPE, NUMPY_STORE_PROBES
+
+# 🧮 In-process vector store: a memory-mapped float16/int8 matrix of normalized
+# embeddings, searched with a matrix product over the rows of the closest
+# k-means lists and argpartition for top-k
+
+DTYPES = {"float16": np.float16, "int8": np.int8}
+# Rows copied or assigned to lists at a time
+COPY_BLOCK_ROWS = 8192
+INITIAL_CAPACITY = 1024
+# Below this many chunks every query scans all rows; above it rows are split
+# into ~sqrt(n) k-means lists, retrained whenever the store has grown 4x
+PARTITION_MIN_ROWS = 4096
+TRAIN_ITERATIONS = 10
+TRAIN_SAMPLE_PER_LIST = 64
+# NumPy's float16 -> float32 cast is slow; a 256 KB lookup table is about twice as fast
+_FLOAT16_TO_FLOAT32 = np.arange(1 << 16, dtype=np.uint16).view(np.float16).astype(np.float32)
+# SQLite's default limit on host parameters per statement is 999
+_SQL_BATCH = 500
+
+
+def _batches(items: List, size: int = _SQL_BATCH):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _spherical_kmeans(vectors: np.ndarray, lists: int, iterations: int = TRAIN_ITERATIONS) -> np.ndarray:
+    """
+    Unit-length centroids of `lists` clusters of the unit `vectors`, by cosine similarity.
+    """
+    rng = np.random.default_rng(0)
+    centroids = vectors[rng.choice(len(vectors), lists, replace=False)].copy()
+    for _ in range(iterations):
+        assigned = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assigned, vectors)
+        # A list that lost all its vectors keeps its old centroid
+        filled = np.bincount(assigned, minlength=lists) > 0
+        centroids[filled] = normalize_rows(sums[filled])
+    return centroids
+
+
+def _map_file(path: str, dtype, rows: int, dim: int = 0) -> np.memmap:
+    """
+    Opens `path` as a writable (rows, dim) memmap, growing the file with zeros if needed.
+    """
+    row_bytes = np.dtype(dtype).itemsize * (dim or 1)
+    with open(path, "ab") as f:
+        if f.tell() < rows * row_bytes:
+            f.truncate(rows * row_bytes)
+    shape = (rows, dim) if dim else (rows,)
+    return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Keeps one repo's vectors in `path`:
+
+    - vectors.bin: (capacity, dim) float16 matrix of unit vectors, or int8 rows
+      with a per-row float32 scale in scales.bin
+    - chunks.sqlite3: row number, ID, source, document and metadata per chunk
+
+    - lists.bin / centroids.npy: the k-means list of each row and the list
+      centroids, once the store holds PARTITION_MIN_ROWS chunks
+
+    A query scores only the rows of its NUMPY_STORE_PROBES closest lists, read
+    straight from the compact matrix, so its cost grows with ~sqrt(n) rather than n.
+    Deleted rows are masked out and reclaimed by compaction once they make up
+    half of the matrix. Searches run under the store lock, so a concurrent write
+    never shows them half-updated rows.
+    """
+
+    def __init__(self, path: str, dtype: str = NUMPY_STORE_DTYPE):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.name = os.path.basename(os.path.normpath(path))
+        self._lock = threading.RLock()
+
+        self._conn = sqlite3.connect(os.path.join(path, "chunks.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks (row INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, "
+            "source TEXT, document TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks(source)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+        info = dict(self._conn.execute("SELECT key, value FROM info").fetchall())
+        self.dtype = info.get("dtype", dtype)
+        if self.dtype not in DTYPES:
+            raise ValueError(f"Unsupported vector dtype: {self.dtype} (expected one of {sorted(DTYPES)})")
+        self.dim: Optional[int] = int(info["dim"]) if "dim" in info else None
+        self._rows = int(info.get("rows", 0))  # rows in use, deleted ones included
+        self._matrix: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._lists: Optional[np.memmap] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._probe_index = None  # (rows sorted by list, list offsets), rebuilt after writes
+        self._live = np.zeros(0, dtype=bool)
+        self._row_ids: List[Optional[str]] = []
+        if self.dim:
+            self._open(max(self._rows, INITIAL_CAPACITY))
+            self._load_rows()
+            self._load_centroids()
+
+        self.version = next_version()
+        logging.info(f"📚 Opened NumPy vector store at {path} ({self.live_count} chunks, {self.dtype}).")
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._matrix is None else self._matrix.shape[0]
+
+    @property
+    def live_count(self) -> int:
+        return int(self._live[:self._rows].sum())
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _open(self, capacity: int):
+        self._matrix = _map_file(self._file("vectors.bin"), DTYPES[self.dtype], capacity, self.dim)
+        if self.dtype == "int8":
+            self._scales = _map_file(self._file("scales.bin"), np.float32, capacity)
+        self._lists = _map_file(self._file("lists.bin"), np.int32, capacity)
+        live = np.zeros(capacity, dtype=bool)
+        live[:len(self._live)] = self._live[:capacity]
+        self._live = live
+        self._row_ids.extend([None] * (capacity - len(self._row_ids)))
+
+    def _load_rows(self):
+        for row, chunk_id in self._conn.execute("SELECT row, id FROM chunks"):
+            if row < self.capacity:
+                self._live[row] = True
+                self._row_ids[row] = chunk_id
+
+    def _load_centroids(self):
+        path = self._file("centroids.npy")
+        if os.path.exists(path):
+            centroids = np.load(path)
+            if centroids.ndim == 2 and centroids.shape[1] == self.dim:
+                self._centroids = centroids
+    def _ensure_capacity(self, rows: int):
+        if rows <= self.capacity:
+            return
+        capacity = max(rows, self.capacity * 2, INITIAL_CAPACITY)
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._lists.flush()
+        self._open(capacity)
+
+    def _save_info(self):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO info (key, value) VALUES (?, ?)",
+            [("dim", str(self.dim)), ("dtype", self.dtype), ("rows", str(self._rows))],
+        )
+
+    def _rollback(self):
+        # Drops uncommitted rows; rows reserved by the failed write are reused next time
+        with self._lock:
+            self._conn.rollback()
+            info = dict(self._conn.execute("SELECT key, value FROM info").fetchall())
+            self._rows = int(info.get("rows", 0))
+            self._probe_index = None
+
+    def _quantize(self, vectors: np.ndarray):
+        """
+        Unit float32 vectors -> stored rows (and per-row scales for int8).
+        """
+        if self.dtype == "float16":
+            return vectors.astype(np.float16), None
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+    def add_chunks(self, chunks: List[str], embeddings: List[List[float]], metadatas: List[dict],
+                   ids: Optional[List[str]] = None, batch_size: Optional[int] = None) -> List[str]:
+        """
+        Upserts chunks: an existing ID keeps its row and gets the new vector and
+        metadata. `batch_size` is accepted for interface parity; all rows are
+        written in one pass, so on failure every ID is returned as not written.
+        """
+        if not chunks:
+            logging.warning("⚠️ No chunks to add to the NumPy vector store.")
+            return []
+
+        if ids is None:
+            ids = [
+                content_chunk_id(self.name, meta.get("source", ""), meta.get("start_index", 0), chunk)
+                for chunk, meta in zip(chunks, metadatas)
+            ]
+        # Last write wins for IDs repeated within the call
+        latest: Dict[str, int] = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        order = list(latest.values())
+        logging.info(f"📥 Upserting {len(order)} documents to the NumPy vector store.")
+        try:
+            vectors = normalize_rows(np.asarray([embeddings[i] for i in order], dtype=np.float32))
+            with self._lock:
+                if self.dim is None:
+                    self.dim = vectors.shape[1]
+                    self._open(max(len(order), INITIAL_CAPACITY))
+                elif vectors.shape[1] != self.dim:
+                    raise ValueError(f"embedding dimension {vectors.shape[1]} does not match the store's {self.dim}")
+
+                existing = {}
+                for batch in _batches([ids[i] for i in order]):
+                    placeholders = ",".join("?" * len(batch))
+                    existing.update(self._conn.execute(
+                        f"SELECT id, row FROM chunks WHERE id IN ({placeholders})", batch
+                    ).fetchall())
+                rows = []
+                for i in order:
+                    if ids[i] not in existing:
+                        existing[ids[i]] = self._rows
+                        self._rows += 1
+                    rows.append(existing[ids[i]])
+                self._ensure_capacity(self._rows)
+
+                stored, scales = self._quantize(vectors)
+                rows_array = np.asarray(rows)
+                self._matrix[rows_array] = stored
+                if scales is not None:
+                    self._scales[rows_array] = scales
+                if self._centroids is not None:
+                    self._lists[rows_array] = self._assign(vectors)
+                self._probe_index = None
+                self._matrix.flush()
+                if self._scales is not None:
+                    self._scales.flush()
+                self._lists.flush()
+
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO chunks (row, id, source, document, metadata) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (row, ids[i], (metadatas[i] or {}).get("source"), chunks[i], json.dumps(metadatas[i] or {}))
+                        for row, i in zip(rows, order)
+                    ],
+                )
+                self._save_info()
+                self._conn.commit()
+                for row, i in zip(rows, order):
+                    self._live[row] = True
+                    self._row_ids[row] = ids[i]
+                self._maybe_partition()
+                self.version = next_version()
+            logging.info("✅ Chunks added to the NumPy vector store.")
+            return []
+        except Exception as e:
+            self._rollback()
+            self.version = next_version()
+            logging.error(f"❌ Failed to add to the NumPy vector store: {e}")
+            return list(ids)
+
+    def _upcast(self, rows: np.ndarray) -> np.ndarray:
+        stored = self._matrix.view(np.ndarray)[rows]
+        if self.dtype == "float16":
+            return np.take(_FLOAT16_TO_FLOAT32, stored.view(np.uint16))
+        return stored.astype(np.float32)
+
+    def _vectors(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Stored rows back as float32 unit vectors (dequantized for int8).
+        """
+        vectors = self._upcast(rows)
+        return vectors * self._scales[rows][:, None] if self._scales is not None else vectors
+
+    def _scores(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        # int8 rows are rescaled after the product: one multiply per row, not per value
+        scores = self._upcast(rows) @ query
+        return scores * self._scales[rows] if self._scales is not None else scores
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Index of the closest centroid for each unit vector.
+        """
+        lists = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), COPY_BLOCK_ROWS):
+            block = vectors[start:start + COPY_BLOCK_ROWS]
+            lists[start:start + len(block)] = np.argmax(block @ self._centroids.T, axis=1)
+        return lists
+
+    def _maybe_partition(self):
+        """
+        (Re)trains the k-means lists once the store is big enough, or has grown
+        4x since the last training. On failure queries keep scanning all rows.
+        """
+        live = self.live_count
+        if live < PARTITION_MIN_ROWS:
+            return
+        if self._centroids is not None and live <= 4 * len(self._centroids) ** 2:
+            return
+        try:
+            live_rows = np.flatnonzero(self._live[:self._rows])
+            lists = int(np.sqrt(len(live_rows)))
+            rng = np.random.default_rng(0)
+            sample = np.sort(rng.choice(live_rows, min(len(live_rows), lists * TRAIN_SAMPLE_PER_LIST), replace=False))
+            self._centroids = _spherical_kmeans(self._vectors(sample), lists)
+            for start in range(0, self._rows, COPY_BLOCK_ROWS):
+                rows = np.arange(start, min(start + COPY_BLOCK_ROWS, self._rows))
+                self._lists[rows] = self._assign(self._vectors(rows))
+            self._lists.flush()
+            with open(self._file("centroids.npy.tmp"), "wb") as f:
+                np.save(f, self._centroids)
+            os.replace(self._file("centroids.npy.tmp"), self._file("centroids.npy"))
+            self._probe_index = None
+            logging.info(f"🧭 Partitioned {live} vectors into {lists} lists.")
+        except Exception as e:
+            self._centroids = self._probe_index = None
+            logging.warning(f"⚠️ Could not partition the NumPy vector store, scanning all rows: {e}")
+
+    def _candidates(self, query: np.ndarray, top_k: int) -> np.ndarray:
+        """
+        Live rows to score: those of the closest lists, or all of them for small
+        (or unpartitioned) stores and when the probed lists hold fewer than `top_k`.
+        """
+        live = self._live[:self._rows]
+        if self._centroids is not None:
+            if self._probe_index is None:
+                lists = np.asarray(self._lists[:self._rows])
+                order = np.argsort(lists, kind="stable")
+                self._probe_index = (order, np.searchsorted(lists[order], np.arange(len(self._centroids) + 1)))
+            order, offsets = self._probe_index
+            probes = min(NUMPY_STORE_PROBES, len(self._centroids))
+            closest = np.argpartition(-(self._centroids @ query), probes - 1)[:probes]
+            rows = np.concatenate([order[offsets[l]:offsets[l + 1]] for l in closest])
+            rows = rows[live[rows]]
+            if len(rows) >= top_k:
+                return rows
+        return np.flatnonzero(live)
+
+    def similarity_search(self, query_embedding: List[float], top_k=5, include_embeddings: bool = False) -> dict:
+        try:
+            empty = {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+            if not query_embedding:
+                return empty
+            query = normalize_rows(np.asarray(query_embedding, dtype=np.float32))
+            with self._lock:
+                if self._matrix is None or not self._rows:
+                    return empty
+                if self._centroids is None:
+                    self._maybe_partition()
+                rows = self._candidates(query, top_k)
+                k = min(top_k, len(rows))
+                if k <= 0:
+                    return empty
+                scores = self._scores(rows, query)
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top], kind="stable")]
+                top_rows = rows[top]
+                ranked_ids = [self._row_ids[row] for row in top_rows]
+                embedding_by_id = dict(zip(ranked_ids, self._vectors(top_rows).tolist())) if include_embeddings else {}
+            score_by_id = dict(zip(ranked_ids, scores[top].tolist()))
+
+            results = self.get_by_ids(ranked_ids)
+            logging.info(f"🔍 Retrieved {len(results['ids'])} documents.")
+            found = {
+                "ids": [results["ids"]],
+                "documents": [results["documents"]],
+                "metadatas": [results["metadatas"]],
+                # Squared L2 distance between unit vectors, as Chroma reports by default
+                "distances": [[max(0.0, 2.0 - 2.0 * score_by_id[doc_id]) for doc_id in results["ids"]]],
+            }
+            if include_embeddings:
+                found["embeddings"] = [[embedding_by_id[doc_id] for doc_id in results["ids"]]]
+            return found
+        except Exception as e:
+            logging.error(f"❌ Failed similarity search: {e}")
+            return {}
+
+    def get_by_ids(self, ids: List[str], include_embeddings: bool = False) -> dict:
+        if not ids:
+            return {"ids": [], "documents": [], "metadatas": []}
+        try:
+            by_id = {}
+            with self._lock:
+                for batch in _batches(list(ids)):
+                    placeholders = ",".join("?" * len(batch))
+                    for chunk_id, row, document, metadata in self._conn.execute(
+                        f"SELECT id, row, document, metadata FROM chunks WHERE id IN ({placeholders})", batch
+                    ):
+                        by_id[chunk_id] = (document, json.loads(metadata), row)
+                found = [chunk_id for chunk_id in ids if chunk_id in by_id]
+                fetched = {
+                    "ids": found,
+                    "documents": [by_id[chunk_id][0] for chunk_id in found],
+                    "metadatas": [by_id[chunk_id][1] for chunk_id in found],
+                }
+                if include_embeddings:
+                    rows = np.asarray([by_id[chunk_id][2] for chunk_id in found], dtype=int)
+                    fetched["embeddings"] = self._vectors(rows).tolist() if found else []
+            return fetched
+        except Exception as e:
+            logging.error(f"❌ Failed to fetch documents by id: {e}")
+            return {"ids": [], "documents": [], "metadatas": []}
+
+    def delete_by_source(self, sources: List[str], batch_size: Optional[int] = None) -> List[str]:
+        if not sources:
+            return []
+        try:
+            with self._lock:
+                rows = []
+                for batch in _batches(list(sources)):
+                    placeholders = ",".join("?" * len(batch))
+                    rows.extend(row for (row,) in self._conn.execute(
+                        f"SELECT row FROM chunks WHERE source IN ({placeholders})", batch
+                    ))
+                    self._conn.execute(f"DELETE FROM chunks WHERE source IN ({placeholders})", batch)
+                self._conn.commit()
+                # Copy-on-write: searches holding the old mask are unaffected
+                live = self._live.copy()
+                live[rows] = False
+                self._live = live
+                if self._rows - self.live_count > max(INITIAL_CAPACITY, self._rows // 2):
+                    self.compact()
+                self.version = next_version()
+            logging.info(f"🗑️ Deleted chunks of {len(sources)} files from the NumPy vector store.")
+            return []
+        except Exception as e:
+            self._rollback()
+            logging.error(f"❌ Failed to delete chunks by source: {e}")
+            return list(sources)
+
+    def compact(self):
+        """
+        Rewrites the matrix (and row lists) without deleted rows; new files replace the old ones.
+        """
+        with self._lock:
+            if self._matrix is None:
+                return
+            keep = np.flatnonzero(self._live[:self._rows])
+            capacity = max(len(keep), INITIAL_CAPACITY)
+
+            matrix = _map_file(self._file("vectors.bin.tmp"), DTYPES[self.dtype], capacity, self.dim)
+            scales = _map_file(self._file("scales.bin.tmp"), np.float32, capacity) if self._scales is not None else None
+            lists = _map_file(self._file("lists.bin.tmp"), np.int32, capacity)
+            for start in range(0, len(keep), COPY_BLOCK_ROWS):
+                rows = keep[start:start + COPY_BLOCK_ROWS]
+                matrix[start:start + len(rows)] = self._matrix[rows]
+                lists[start:start + len(rows)] = self._lists[rows]
+                if scales is not None:
+                    scales[start:start + len(rows)] = self._scales[rows]
+            matrix.flush()
+            lists.flush()
+            if scales is not None:
+                scales.flush()
+
+            # Rows only move down and are renumbered in order, so no UPDATE collides
+            row_ids = [self._row_ids[row] for row in keep]
+            self._conn.executemany("UPDATE chunks SET row = ? WHERE id = ?", list(enumerate(row_ids)))
+            self._rows = len(keep)
+            self._save_info()
+            self._conn.commit()
+
+            os.replace(self._file("vectors.bin.tmp"), self._file("vectors.bin"))
+            os.replace(self._file("lists.bin.tmp"), self._file("lists.bin"))
+            if scales is not None:
+                os.replace(self._file("scales.bin.tmp"), self._file("scales.bin"))
+            self._matrix, self._scales, self._lists = matrix, scales, lists
+            self._probe_index = None
+            self._live = np.zeros(capacity, dtype=bool)
+            self._live[:self._rows] = True
+            self._row_ids = row_ids + [None] * (capacity - self._rows)
+            logging.info(f"🧹 Compacted NumPy vector store to {self._rows} rows.")
+
+    def clear(self):
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM chunks")
+                self._conn.execute("DELETE FROM info")
+                self._conn.commit()
+                self._matrix = self._scales = self._lists = None
+                self._centroids = self._probe_index = None
+                for name in ("vectors.bin", "scales.bin", "lists.bin", "centroids.npy"):
+                    if os.path.exists(self._file(name)):
+                        os.remove(self._file(name))
+                self.dim, self._rows = None, 0
+                self._live, self._row_ids = np.zeros(0, dtype=bool), []
+                self.version = next_version()
+            logging.info("🧹 Cleared all existing documents from the NumPy vector store.")
+        except Exception as e:
+            logging.error(f"❌ Failed to clear the NumPy vector store: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+                self._lists.flush()
+            self._matrix = self._scales = self._lists = None
+            self._centroids = self._probe_index = None
+            self._conn.close()
+
+
+def drop_store(path: str, store: Optional[NumpyVectorStore] = None):
+    """
+    Deletes a store's files (closing `store` first if it is open).
+    """
+    if store is not None:
+        store.close()
+    shutil.rmtree(path, ignore_errors=True)
@@ -1,16 +1,20 @@
 import os
 import shutil
 import time
+import logging
 from git import Repo
-from typing import List
+from typing import List, Optional
 import stat
+from config.settings import CLONE_SHALLOW, CLONE_SPARSE, CLONE_BLOB_LIMIT
 
 # ✅ Extensions you want to keep
 VALID_EXTENSIONS = [".py", ".js", ".ts", ".java", ".go", ".cpp", ".md", ".txt", ".json", ".yaml", ".yml"]
 
-# ✅ Unwanted directories to skip
+# ✅ Unwanted directories to skip (also used by the repo scanner)
 SKIP_DIRS = {".git", "__pycache__", ".venv", "venv", "node_modules"}
 
+SKIP_FILENAMES = {"package-lock.json", "yarn.lock", "pnpm-lock.yaml"}
+
 
 def handle_remove_readonly(func, path, exc):
     """
@@ -23,43 +27,145 @@ def handle_remove_readonly(func, path, exc):
         print(f"⚠️ Failed to delete: {path}, even after removing read-only. Error: {e}")
 
 
-def clone_repo(repo_url: str, repo_name: str = "cloned_repo") -> str:
+def _remove_dir(path: str):
+    print(f"🧹 Removing existing folder: {path}")
+    try:
+        shutil.rmtree(path, onexc=handle_remove_readonly)
+    except Exception as e:
+        print(f"⚠️ Could not remove folder, retrying after delay: {e}")
+        time.sleep(1)
+        shutil.rmtree(path, onexc=handle_remove_readonly)
+
+
+def _source_url(repo_url: str) -> str:
+    """
+    Local repos are cloned through file:// so git honours --depth/--filter
+    (plain local paths use hardlinks and ignore them).
+    """
+    if os.path.isdir(repo_url):
+        return "file://" + os.path.abspath(repo_url)
+    return repo_url
+
+
+def sparse_patterns() -> List[str]:
+    """
+    Sparse-checkout patterns that materialize only the files we index
+    (plus .gitignore files, which the scanner honours).
+    """
+    return [f"*{ext}" for ext in VALID_EXTENSIONS] + [".gitignore"]
+
+
+def _update_existing_clone(source_url: str, temp_dir: str, shallow: bool) -> bool:
+    """
+    Fast-forwards an existing clone of `source_url` to the remote's latest commit
+    with a fetch (depth 1 in shallow mode) instead of re-cloning.
+    Returns False if the folder is not a usable clone of that URL.
+    """
+    try:
+        repo = Repo(temp_dir)
+        origin = repo.remotes.origin
+        if origin.url != source_url:
+            print(f"⚠️ Existing clone points at {origin.url}, not {source_url}")
+            return False
+
+        branch = repo.active_branch.name
+        print(f"🔄 Fetching latest changes for {branch} ...")
+        fetch_kwargs = {"depth": 1} if shallow else {}
+        origin.fetch(refspec=branch, **fetch_kwargs)
+        repo.head.reset("FETCH_HEAD", index=True, working_tree=True)
+        repo.git.clean("-fdx")
+        print("✅ Existing clone updated.")
+        return True
+    except Exception as e:
+        print(f"⚠️ Could not update existing clone, falling back to a fresh clone: {e}")
+        return False
+
+
+def clone_repo(repo_url: str, repo_name: str = "cloned_repo", reuse: bool = False,
+               shallow: bool = CLONE_SHALLOW, sparse: bool = CLONE_SPARSE,
+               blob_limit: str = CLONE_BLOB_LIMIT) -> str:
     """
     Clones the repo from GitHub to ./temp/{repo_name}, cleaning up the old one safely.
+    With `reuse=True` an existing clone of the same URL is updated in place instead.
+
+    Args:
+        repo_url: GitHub URL (or a local/bare repo path, e.g. for offline tests).
+        repo_name: Folder name under ./temp.
+        reuse: Update an existing clone with a fetch rather than re-cloning.
+        shallow: Depth-1, single-branch clone (no history).
+        sparse: Check out only files with indexed extensions.
+        blob_limit: Partial-clone filter, e.g. "1m" skips downloading larger blobs
+            until they are actually checked out. Empty disables it.
     """
     temp_dir = os.path.join("temp", repo_name)
+    source_url = _source_url(repo_url)
     print(f"📁 Target directory: {temp_dir}")
 
+    if reuse and os.path.isdir(os.path.join(temp_dir, ".git")):
+        if _update_existing_clone(source_url, temp_dir, shallow):
+            return temp_dir
+
     if os.path.exists(temp_dir):
-        print(f"🧹 Removing existing folder: {temp_dir}")
-        try:
-            shutil.rmtree(temp_dir, onexc=handle_remove_readonly)
-        except Exception as e:
-            print(f"⚠️ Could not remove folder, retrying after delay: {e}")
-            time.sleep(1)
-            shutil.rmtree(temp_dir, onexc=handle_remove_readonly)
-
-    print(f"📦 Cloning repo {repo_url} into {temp_dir} ...")
-    Repo.clone_from(repo_url, temp_dir)
+        _remove_dir(temp_dir)
+
+    clone_kwargs = {}
+    if shallow:
+        clone_kwargs.update(depth=1, single_branch=True)
+    if blob_limit:
+        clone_kwargs["filter"] = f"blob:limit={blob_limit}"
+    if sparse:
+        clone_kwargs["no_checkout"] = True
+
+    print(f"📦 Cloning repo {repo_url} into {temp_dir} ({clone_kwargs or 'full clone'}) ...")
+    repo = Repo.clone_from(source_url, temp_dir, **clone_kwargs)
+
+    if sparse:
+        repo.git.sparse_checkout("set", "--no-cone", *sparse_patterns())
+        repo.git.checkout(repo.active_branch.name)
     print("✅ Clone complete.")
 
     return temp_dir
 
 
-def get_relevant_files(repo_path: str) -> List[str]:
+def delete_clone(repo_name: str):
     """
-    Walks through the repo and collects only relevant code/text files, skipping system dirs.
+    Removes the working copy at ./temp/{repo_name}, if any.
     """
-    relevant_files = []
+    temp_dir = os.path.join("temp", repo_name)
+    if os.path.exists(temp_dir):
+        _remove_dir(temp_dir)
 
-    for root, dirs, files in os.walk(repo_path):
-        # Remove unwanted directories from traversal
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
 
-        for file in files:
-            if any(file.endswith(ext) for ext in VALID_EXTENSIONS):
-                full_path = os.path.join(root, file)
-                relevant_files.append(full_path)
+def get_head_commit(repo_path: str) -> Optional[str]:
+    """
+    Returns the commit SHA checked out in `repo_path`, or None if unavailable.
+    """
+    try:
+        return Repo(repo_path).head.commit.hexsha
+    except Exception as e:
+        print(f"⚠️ Could not read HEAD commit of {repo_path}: {e}")
+        return None
+
+
+def is_file_allowed(file_path: str) -> bool:
+    filename = os.path.basename(file_path)
+    if filename in SKIP_FILENAMES:
+        logging.debug(f"⏭️ Skipping unwanted file: {filename}")
+        return False
+    parts = set(file_path.split(os.sep))
+    if parts.intersection(SKIP_DIRS):
+        logging.debug(f"⏭️ Skipping file inside ignored dir: {file_path}")
+        return False
+    return True
+
+
+def get_relevant_files(repo_path: str) -> List[str]:
+    """
+    Collects the relevant code/text files of the repo, skipping system dirs,
+    .gitignore'd paths and large, binary, generated or minified files.
+    """
+    from services.repo_scanner import scan_repo
 
+    relevant_files = scan_repo(repo_path).files
     print(f"🔍 Found {len(relevant_files)} relevant files for processing.")
     return relevant_files
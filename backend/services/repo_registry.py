@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional
+from config.settings import MAX_CACHED_REPOS, REPO_IDLE_TTL_SECONDS, REPO_TOUCH_FLUSH_SECONDS
+
+# 🗂️ Registry of repos that are cloned + indexed on this server
+REGISTRY_PATH = os.path.join("temp", "repos.json")
+
+# Repo the current request is working on; read by retrieval inside agent tools
+current_repo_id: ContextVar[Optional[str]] = ContextVar("current_repo_id", default=None)
+
+_lock = threading.RLock()
+# last_access times not yet written to REGISTRY_PATH; overlaid on every load
+_touched: Dict[str, float] = {}
+_last_flush = 0.0
+
+
+def repo_id_from_url(repo_url: str) -> str:
+    """
+    Derives a filesystem- and collection-safe repo identifier from a GitHub URL,
+    e.g. https://github.com/Owner/Name.git -> owner__name
+    """
+    path = re.sub(r"^https?://github\.com/", "", repo_url.strip()).strip("/")
+    if path.endswith(".git"):
+        path = path[:-4]
+    parts = [p for p in path.split("/") if p][:2]
+    slug = "__".join(re.sub(r"[^a-z0-9._-]", "-", p.lower()) for p in parts)
+    if not slug:
+        raise ValueError(f"Cannot derive repo id from {repo_url}")
+    return slug
+
+
+def _load() -> dict:
+    if not os.path.exists(REGISTRY_PATH):
+        return {}
+    try:
+        with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
+            registry = json.load(f)
+    except Exception as e:
+        logging.warning(f"⚠️ Ignoring unreadable repo registry: {e}")
+        return {}
+    for repo_id, last_access in _touched.items():
+        if repo_id in registry:
+            registry[repo_id]["last_access"] = max(last_access, registry[repo_id].get("last_access", 0))
+    return registry
+
+
+def _save(registry: dict):
+    """
+    Writes the registry (built by _load, so pending access times are included).
+    """
+    global _last_flush
+    os.makedirs(os.path.dirname(REGISTRY_PATH), exist_ok=True)
+    # Per-process temp file, so two server processes never interleave writes
+    tmp_path = f"{REGISTRY_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(registry, f, indent=2)
+    os.replace(tmp_path, REGISTRY_PATH)
+    _touched.clear()
+    _last_flush = time.time()
+
+
+def register_repo(repo_id: str, repo_url: str, commit: Optional[str] = None):
+    with _lock:
+        registry = _load()
+        entry = registry.get(repo_id, {})
+        entry.update(repo_url=repo_url, commit=commit, last_access=time.time())
+        registry[repo_id] = entry
+        _save(registry)
+
+
+def touch_repo(repo_id: str):
+    """
+    Marks a repo as recently used so the LRU policy keeps it warm. The time is
+    recorded in memory and written out at most every REPO_TOUCH_FLUSH_SECONDS.
+    """
+    now = time.time()
+    with _lock:
+        _touched[repo_id] = now
+        if now - _last_flush >= REPO_TOUCH_FLUSH_SECONDS:
+            registry = _load()
+            if repo_id in registry:
+                _save(registry)
+
+
+def get_repo(repo_id: str) -> Optional[dict]:
+    with _lock:
+        return _load().get(repo_id)
+
+
+def list_repos() -> List[dict]:
+    with _lock:
+        registry = _load()
+    repos = [{"repo_id": repo_id, **entry} for repo_id, entry in registry.items()]
+    return sorted(repos, key=lambda r: r.get("last_access", 0), reverse=True)
+
+
+def resolve_repo_id(repo_id: Optional[str] = None) -> Optional[str]:
+    """
+    Picks the repo to operate on: the explicit id, then the one bound to the
+    current request, then the most recently used repo.
+    """
+    repo_id = repo_id or current_repo_id.get()
+    if repo_id:
+        return repo_id
+    repos = list_repos()
+    return repos[0]["repo_id"] if repos else None
+
+
+def evict_idle_repos(keep: Iterable[str] = ()) -> List[str]:
+    """
+    Drops repos that have been idle longer than REPO_IDLE_TTL_SECONDS and, beyond
+    that, the least recently used ones until at most MAX_CACHED_REPOS remain.
+    Evicted repos lose their clone, manifest, vector collection, BM25 index and
+    cached LLM answers.
+    """
+    # Imported lazily to avoid a cycle: vector_db/repo_processor don't need the registry
+    from services.repo_processor import delete_clone
+    from services.manifest import delete_manifest
+    from services.vector_db import drop_repo_collection
+    from services.lexical_index import drop_lexical_index
+    from services.response_cache import invalidate_repo_responses
+
+    keep = set(keep)
+    now = time.time()
+    with _lock:
+        registry = _load()
+        by_age = sorted(registry.items(), key=lambda item: item[1].get("last_access", 0))
+
+        evict = []
+        if REPO_IDLE_TTL_SECONDS > 0:
+            evict = [rid for rid, entry in by_age
+                     if rid not in keep and now - entry.get("last_access", 0) > REPO_IDLE_TTL_SECONDS]
+        remaining = [rid for rid, _ in by_age if rid not in evict]
+        while len(remaining) > MAX_CACHED_REPOS:
+            candidates = [rid for rid in remaining if rid not in keep]
+            if not candidates:
+                break
+            evict.append(candidates[0])
+            remaining.remove(candidates[0])
+
+        for repo_id in evict:
+            logging.info(f"♻️ Evicting idle repo {repo_id}")
+            for cleanup in (delete_clone, delete_manifest, drop_repo_collection, drop_lexical_index,
+                            invalidate_repo_responses):
+                try:
+                    cleanup(repo_id)
+                except Exception as e:
+                    logging.error(f"❌ {cleanup.__name__} failed while evicting {repo_id}: {e}")
+            registry.pop(repo_id, None)
+
+        if evict:
+            _save(registry)
+    return evict
@@ -0,0 +1,236 @@
+import logging
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional, Pattern, Tuple
+from services.repo_processor import VALID_EXTENSIONS, SKIP_DIRS, SKIP_FILENAMES
+from config.settings import SCAN_MAX_FILE_BYTES, SCAN_MAX_LINE_LENGTH
+
+EXTENSIONS = frozenset(VALID_EXTENSIONS)
+MINIFIED_SUFFIXES = (".min.js", ".min.css", ".bundle.js", ".chunk.js", ".min.json")
+GENERATED_MARKERS = (b"@generated", b"Code generated", b"DO NOT EDIT", b"AUTO-GENERATED", b"autogenerated")
+# Markers only count inside a comment in the file's leading header, like Go's
+# "// Code generated ... DO NOT EDIT." line
+GENERATED_HEADER_LINES = 5
+COMMENT_PREFIXES = (b"#", b"//", b"/*", b"*", b"<!--", b"--", b";")
+SNIFF_BYTES = 8192
+# Minified: the longest line holds at least this share of the sampled bytes
+MINIFIED_LINE_SHARE = 0.8
+
+
+@dataclass
+class ScanResult:
+    files: List[str] = field(default_factory=list)
+    skipped: List[Tuple[str, str]] = field(default_factory=list)
+
+    def skip_counts(self) -> dict:
+        return dict(Counter(reason for _, reason in self.skipped))
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """
+    Translates a gitignore glob into a regex fragment ('*' and '?' stay within one
+    path segment, '**' spans segments).
+    """
+    out, i = [], 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(pattern[i]))
+                i += 1
+            else:
+                body = pattern[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+class GitIgnore:
+    """
+    Rules from one .gitignore file, matched against paths relative to its folder.
+    Supports comments, negation, directory-only rules, anchoring and '**'.
+    """
+
+    def __init__(self, rules: List[Tuple[Pattern, bool, bool]]):
+        self.rules = rules
+
+    @classmethod
+    def from_file(cls, path: str) -> Optional["GitIgnore"]:
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return None
+
+        rules = []
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            if line.startswith("\\"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            regex = _glob_to_regex(line.lstrip("/"))
+            prefix = "^" if anchored else "^(?:.*/)?"
+            rules.append((re.compile(prefix + regex + "$"), negate, dir_only))
+        return cls(rules) if rules else None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Returns True if ignored, False if explicitly re-included, None if no rule applies.
+        """
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                result = not negate
+        return result
+
+
+def _is_ignored(ignores: List[Tuple[str, GitIgnore]], rel_path: str, is_dir: bool) -> bool:
+    ignored = False
+    # Parent .gitignore files first; deeper files override them
+    for base, gitignore in ignores:
+        sub_path = rel_path[len(base) + 1:] if base else rel_path
+        result = gitignore.match(sub_path, is_dir)
+        if result is not None:
+            ignored = result
+    return ignored
+
+
+def _has_generated_header(head: bytes) -> bool:
+    for line in head.split(b"\n", GENERATED_HEADER_LINES)[:GENERATED_HEADER_LINES]:
+        line = line.strip()
+        if line.startswith(COMMENT_PREFIXES) and any(marker in line for marker in GENERATED_MARKERS):
+            return True
+    return False
+
+
+def _looks_minified(head: bytes) -> bool:
+    """
+    A bundle/minified blob: a large sample with an average line length above
+    SCAN_MAX_LINE_LENGTH, nearly all of it on one line. Files with a few long
+    lines (README badges, long string literals) don't qualify.
+    """
+    if len(head) < SNIFF_BYTES // 2:
+        return False
+    lines = head.split(b"\n")
+    if len(head) / len(lines) <= SCAN_MAX_LINE_LENGTH:
+        return False
+    return max(len(line) for line in lines) >= MINIFIED_LINE_SHARE * len(head)
+
+
+def _sniff(path: str, name: str) -> Optional[str]:
+    """
+    Classifies a file from its first bytes: binary, generated or minified.
+    """
+    if name.endswith(MINIFIED_SUFFIXES):
+        return "minified"
+    try:
+        with open(path, "rb") as f:
+            head = f.read(SNIFF_BYTES)
+    except OSError:
+        return "unreadable"
+    if b"\0" in head:
+        return "binary"
+    if _has_generated_header(head):
+        return "generated"
+    if _looks_minified(head):
+        return "minified"
+    return None
+
+
+def scan_repo(repo_path: str, max_file_size: int = SCAN_MAX_FILE_BYTES, respect_gitignore: bool = True) -> ScanResult:
+    """
+    Single-pass scandir walk collecting indexable files and recording why every
+    other file was skipped.
+
+    Skips: ignored directories, .gitignore'd paths, unsupported extensions,
+    lockfiles, files over `max_file_size`, and binary, generated or minified files.
+    """
+    result = ScanResult()
+    # (absolute dir, dir relative to repo root, active .gitignore rules)
+    stack = [(repo_path, "", [])]
+
+    while stack:
+        dir_path, rel_dir, ignores = stack.pop()
+
+        if respect_gitignore:
+            gitignore = GitIgnore.from_file(os.path.join(dir_path, ".gitignore"))
+            if gitignore is not None:
+                ignores = ignores + [(rel_dir, gitignore)]
+
+        try:
+            entries = sorted(os.scandir(dir_path), key=lambda e: e.name)
+        except OSError as e:
+            logging.warning(f"⚠️ Could not scan {dir_path}: {e}")
+            continue
+
+        subdirs = []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name in SKIP_DIRS:
+                    result.skipped.append((entry.path, "ignored_dir"))
+                elif ignores and _is_ignored(ignores, rel_path, True):
+                    result.skipped.append((entry.path, "gitignored"))
+                else:
+                    subdirs.append((entry.path, rel_path, ignores))
+                continue
+
+            if not entry.is_file(follow_symlinks=False):
+                continue
+
+            reason = None
+            if os.path.splitext(entry.name)[1] not in EXTENSIONS:
+                reason = "extension"
+            elif entry.name in SKIP_FILENAMES:
+                reason = "lockfile"
+            elif ignores and _is_ignored(ignores, rel_path, False):
+                reason = "gitignored"
+            elif entry.stat(follow_symlinks=False).st_size > max_file_size:
+                reason = "too_large"
+            else:
+                reason = _sniff(entry.path, entry.name)
+
+            if reason:
+                result.skipped.append((entry.path, reason))
+            else:
+                result.files.append(entry.path)
+
+        # Reverse so directories are visited in name order (stack is LIFO)
+        stack.extend(reversed(subdirs))
+
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        for path, reason in result.skipped:
+            logging.debug(f"⏭️ Skipped {path}: {reason}")
+    logging.info(f"🔍 Scan found {len(result.files)} files, skipped {result.skip_counts()}")
+    return result
@@ -0,0 +1,85 @@
+import logging
+from typing import List, Optional, Sequence
+import numpy as np
+from services.vector_store import first_result, normalize_rows
+from config.settings import MMR_LAMBDA, MAX_CHUNKS_PER_FILE
+
+# 🎯 Diversity reranking of over-fetched retrieval candidates
+
+
+def mmr_select(query_embedding: Sequence[float], embeddings: Sequence[Sequence[float]], sources: List[str],
+               top_k: int, lambda_mult: float = MMR_LAMBDA, max_per_source: int = MAX_CHUNKS_PER_FILE,
+               relevance: Optional[Sequence[float]] = None) -> List[int]:
+    """
+    Maximal Marginal Relevance: repeatedly picks the candidate maximizing
+    lambda * relevance - (1 - lambda) * (max similarity to the picks so far),
+    taking at most `max_per_source` chunks per file while other files remain.
+
+    Args:
+        query_embedding: The query vector.
+        embeddings: One vector per candidate.
+        sources: The file of each candidate.
+        top_k: How many candidates to pick.
+        lambda_mult: 1.0 = pure relevance, 0.0 = pure diversity.
+        max_per_source: Per-file cap (0 = no cap).
+        relevance: Relevance per candidate; defaults to cosine similarity to the query.
+
+    Returns:
+        Indices of the picked candidates, in pick order.
+    """
+    n = len(embeddings)
+    if n == 0 or top_k <= 0:
+        return []
+    vectors = normalize_rows(np.asarray(embeddings, dtype=np.float32))
+    if relevance is None:
+        relevance = vectors @ normalize_rows(np.asarray(query_embedding, dtype=np.float32))
+    relevance = np.asarray(relevance, dtype=np.float32)
+    # Candidate-to-candidate similarity, computed once: n is small (tens)
+    similarity = vectors @ vectors.T
+
+    _, source_ids = np.unique(np.asarray(sources, dtype=object).astype(str), return_inverse=True)
+    per_source = np.zeros(source_ids.max() + 1, dtype=int)
+    max_similarity = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    picks = []
+
+    for _ in range(min(top_k, n)):
+        allowed = available.copy()
+        if max_per_source > 0:
+            capped = allowed & (per_source[source_ids] < max_per_source)
+            # Only files over the cap are left: fill with their next best chunks
+            if capped.any():
+                allowed = capped
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~allowed] = -np.inf
+        best = int(np.argmax(scores))
+        picks.append(best)
+        available[best] = False
+        per_source[source_ids[best]] += 1
+        max_similarity = np.maximum(max_similarity, similarity[best])
+    return picks
+
+
+def mmr_rerank(query_embedding: Sequence[float], results: dict, top_k: int,
+               relevance: Optional[Sequence[float]] = None) -> dict:
+    """
+    Reranks over-fetched results (Chroma's query() shape, with "embeddings") down
+    to `top_k` diverse ones. Returns the same shape without the embeddings.
+    Without usable embeddings it keeps the first `top_k` as ranked.
+    """
+    ids, documents, metadatas, embeddings = (
+        first_result(results, key) for key in ("ids", "documents", "metadatas", "embeddings")
+    )
+
+    if len(embeddings) == len(ids) and all(e is not None and len(e) for e in embeddings) and query_embedding:
+        sources = [str((meta or {}).get("source")) for meta in metadatas]
+        picks = mmr_select(query_embedding, embeddings, sources, top_k, relevance=relevance)
+        logging.info(f"🎯 MMR picked {len(picks)} of {len(ids)} candidates from {len(set(sources[i] for i in picks))} files.")
+    else:
+        picks = list(range(min(top_k, len(ids))))
+
+    return {
+        "ids": [[ids[i] for i in picks]],
+        "documents": [[documents[i] for i in picks]],
+        "metadatas": [[metadatas[i] for i in picks]],
+    }
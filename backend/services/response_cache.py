@@ -0,0 +1,192 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Sequence
+import numpy as np
+from services.embedding_cache import text_hash
+
+# Semantic lookups compare against at most this many recent answers per repo/tool
+_SEMANTIC_CANDIDATES = 1000
+
+
+class ResponseCache:
+    """
+    Persistent cache of LLM answers.
+
+    Exact tier: keyed by (model, SHA-256 of the full prompt).
+    Semantic tier: answers also store the query embedding, the repo and its
+    commit, and the tool (`scope`); a new query on the same repo commit and tool
+    whose embedding is close enough reuses the answer.
+
+    Entries expire after `ttl` seconds; past `max_entries` the least recently
+    used ones are evicted. Re-indexing a repo drops all of its entries.
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000, ttl: float = 7 * 24 * 3600):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                model TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                response TEXT NOT NULL,
+                repo_id TEXT,
+                repo_version TEXT,
+                scope TEXT,
+                query_vector BLOB,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, prompt_hash)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_created_at ON responses(created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_repo ON responses(repo_id, repo_version, scope)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        logging.info(f"🗃️ Response cache at {path} holds {self._size} answers.")
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        """
+        Exact lookup: the cached answer to this very prompt, or None.
+        """
+        key = text_hash(prompt)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE model = ? AND prompt_hash = ? AND created_at > ?",
+                (model, key, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE model = ? AND prompt_hash = ?", (now, model, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return row[0]
+
+    def get_similar(self, model: str, repo_id: str, repo_version: Optional[str], scope: str,
+                    query_vector: Sequence[float], threshold: float) -> Optional[str]:
+        """
+        Semantic lookup: the answer whose query embedding is most similar to
+        `query_vector` (cosine >= threshold) for the same repo version and tool.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT prompt_hash, query_vector, response FROM responses "
+                "WHERE model = ? AND repo_id = ? AND repo_version IS ? AND scope = ? "
+                "AND query_vector IS NOT NULL AND created_at > ? "
+                "ORDER BY last_access DESC LIMIT ?",
+                (model, repo_id, repo_version, scope, now - self.ttl, _SEMANTIC_CANDIDATES),
+            ).fetchall()
+            if not rows:
+                return None
+
+            matrix = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob, _ in rows])
+            query = np.asarray(query_vector, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+            scores = matrix @ query / np.where(norms == 0, 1.0, norms)
+            best = int(np.argmax(scores))
+            if scores[best] < threshold:
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE model = ? AND prompt_hash = ?", (now, model, rows[best][0])
+            )
+            self._conn.commit()
+            self.semantic_hits += 1
+        logging.info(f"🧠 Semantic cache hit (similarity {scores[best]:.3f}) for {repo_id}/{scope}.")
+        return rows[best][2]
+
+    def put(self, model: str, prompt: str, response: str, repo_id: Optional[str] = None,
+            repo_version: Optional[str] = None, scope: Optional[str] = None,
+            query_vector: Optional[Sequence[float]] = None):
+        now = time.time()
+        vector = np.asarray(query_vector, dtype=np.float32).tobytes() if query_vector else None
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(model, prompt_hash, response, repo_id, repo_version, scope, query_vector, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (model, text_hash(prompt), response, repo_id, repo_version, scope, vector, now, now),
+            )
+            # INSERT OR REPLACE counts a replacement as a change too; recount instead
+            if self._conn.total_changes != before:
+                self._size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            self._evict_locked(now)
+            self._conn.commit()
+
+    def invalidate_repo(self, repo_id: str) -> int:
+        """
+        Drops every answer produced for `repo_id` (called when it is re-indexed or evicted).
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE repo_id = ?", (repo_id,))
+            removed = self._conn.execute("SELECT changes()").fetchone()[0]
+            self._conn.commit()
+            self._size -= removed
+        if removed:
+            logging.info(f"🧹 Invalidated {removed} cached answers for {repo_id}.")
+        return removed
+
+    def _evict_locked(self, now: float):
+        self._conn.execute("DELETE FROM responses WHERE created_at <= ?", (now - self.ttl,))
+        expired = self._conn.execute("SELECT changes()").fetchone()[0]
+        self._size -= expired
+
+        overflow = self._size - self.max_entries
+        evicted = 0
+        if overflow > 0:
+            # Evict a little extra so we don't pay for an eviction on every insert
+            self._conn.execute(
+                "DELETE FROM responses WHERE rowid IN "
+                "(SELECT rowid FROM responses ORDER BY last_access ASC LIMIT ?)",
+                (overflow + self.max_entries // 10,),
+            )
+            evicted = self._conn.execute("SELECT changes()").fetchone()[0]
+            self._size -= evicted
+        self.evictions += expired + evicted
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            # Semantic hits are a subset of the exact-tier misses
+            "hit_rate": round((self.hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+def invalidate_repo_responses(repo_id: str) -> int:
+    """
+    Drops the cached answers of `repo_id` from the shared cache, if it is enabled.
+    """
+    from services.container import container
+    cache = container.response_cache
+    return cache.invalidate_repo(repo_id) if cache is not None else 0
@@ -1,10 +1,201 @@
-from services.vector_db import ChromaDBWrapper
-from services.embedder import get_embedding
+import asyncio
+from typing import List, Optional
+import numpy as np
+from services.vector_db import get_repo_db, vector_io_pool
+from services.vector_store import first_result
+from services.embedder import get_embedding, get_embedding_async
+from services.async_pool import run_in_pool
+from services.repo_registry import resolve_repo_id
+from services.streaming import emit_event
+from services.query_cache import TTLCache, normalize_query
+from services.metrics import timed, register_collector
+from services.lexical_index import get_lexical_index, reciprocal_rank_fusion
+from services.context_assembler import assemble_context
+from services.reranker import mmr_rerank
+from config.settings import (QUERY_CACHE_SIZE, QUERY_CACHE_TTL_SECONDS, HYBRID_RETRIEVAL, HYBRID_CANDIDATE_FACTOR, RRF_K,
+                             MMR_RERANK, RETRIEVAL_CANDIDATES)
 
-# Initialize ChromaDB instance
-db = ChromaDBWrapper()
+# Agent runs often call several tools with the same input; don't re-embed / re-search
+query_embedding_cache = TTLCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL_SECONDS)
+search_result_cache = TTLCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL_SECONDS)
 
-def retrieve_relevant_context(query: str, top_k: int = 10) -> str:
+register_collector(lambda: [
+    ("repo_companion_query_cache_hits", "Query embedding cache hits.", query_embedding_cache.hits),
+    ("repo_companion_query_cache_misses", "Query embedding cache misses.", query_embedding_cache.misses),
+    ("repo_companion_search_cache_hits", "Retrieval result cache hits.", search_result_cache.hits),
+    ("repo_companion_search_cache_misses", "Retrieval result cache misses.", search_result_cache.misses),
+])
+
+
+def embed_query(query: str) -> List[float]:
+    key = normalize_query(query)
+    embedding = query_embedding_cache.get(key)
+    if embedding is None:
+        with timed("query_embed"):
+            embedding = get_embedding(key)
+        if embedding:
+            query_embedding_cache.set(key, embedding)
+    return embedding
+
+
+async def embed_query_async(query: str) -> List[float]:
+    key = normalize_query(query)
+    embedding = query_embedding_cache.get(key)
+    if embedding is None:
+        with timed("query_embed"):
+            embedding = await get_embedding_async(key)
+        if embedding:
+            query_embedding_cache.set(key, embedding)
+    return embedding
+
+
+def _lexical_ids(repo_id: str, query: str, n_candidates: int) -> List[str]:
+    with timed("lexical_search"):
+        return [doc_id for doc_id, _ in get_lexical_index(repo_id).search(query, top_k=n_candidates)]
+
+
+def _fuse(vector_results: dict, lexical_ids: List[str], top_k: int):
+    """
+    RRF-fuses the two rankings. Returns the fused ids, the (document, metadata,
+    embedding) entries already known from the vector results, and the ids still to fetch.
+    """
+    vector_ids = first_result(vector_results, "ids")
+    embeddings = first_result(vector_results, "embeddings")
+    if len(embeddings) != len(vector_ids):
+        embeddings = [None] * len(vector_ids)
+    known = dict(zip(vector_ids, zip(first_result(vector_results, "documents"), first_result(vector_results, "metadatas"),
+                                     embeddings)))
+    fused_ids = reciprocal_rank_fusion([vector_ids, lexical_ids], k=RRF_K)[:top_k]
+    return fused_ids, known, [doc_id for doc_id in fused_ids if doc_id not in known]
+
+
+def _fused_results(fused_ids: List[str], known: dict, fetched: Optional[dict]) -> dict:
+    if fetched:
+        embeddings = fetched.get("embeddings") or [None] * len(fetched["ids"])
+        known.update(zip(fetched["ids"], zip(fetched["documents"], fetched["metadatas"], embeddings)))
+    fused_ids = [doc_id for doc_id in fused_ids if doc_id in known]
+    results = {
+        "ids": [fused_ids],
+        "documents": [[known[doc_id][0] for doc_id in fused_ids]],
+        "metadatas": [[known[doc_id][1] for doc_id in fused_ids]],
+    }
+    if any(known[doc_id][2] is not None for doc_id in fused_ids):
+        results["embeddings"] = [[known[doc_id][2] for doc_id in fused_ids]]
+    return results
+
+
+def hybrid_search(db, repo_id: str, query: str, top_k: int, include_embeddings: bool = False) -> dict:
+    """
+    Fuses vector and BM25 rankings with reciprocal rank fusion. Exact identifier
+    matches that the embedding ranks poorly still make it into the top-k.
+
+    Returns results in Chroma's query() shape: {"ids": [[...]], "documents": [[...]], "metadatas": [[...]]}
+    (plus "embeddings" when `include_embeddings` is set).
+    """
+    n_candidates = top_k * HYBRID_CANDIDATE_FACTOR
+    query_embedding = embed_query(query)
+    with timed("vector_search"):
+        vector_results = db.similarity_search(query_embedding, top_k=n_candidates,
+                                              include_embeddings=include_embeddings) or {}
+    lexical_ids = _lexical_ids(repo_id, query, n_candidates)
+
+    fused_ids, known, missing = _fuse(vector_results, lexical_ids, top_k)
+    fetched = db.get_by_ids(missing, include_embeddings=include_embeddings) if missing else None
+    return _fused_results(fused_ids, known, fetched)
+
+
+async def hybrid_search_async(db, repo_id: str, query: str, top_k: int, include_embeddings: bool = False) -> dict:
+    """
+    hybrid_search without blocking the event loop; the vector and BM25 searches
+    run concurrently.
+    """
+    n_candidates = top_k * HYBRID_CANDIDATE_FACTOR
+    query_embedding = await embed_query_async(query)
+
+    async def vector_search():
+        with timed("vector_search"):
+            return await db.similarity_search_async(query_embedding, top_k=n_candidates,
+                                                    include_embeddings=include_embeddings) or {}
+
+    vector_results, lexical_ids = await asyncio.gather(
+        vector_search(), run_in_pool(vector_io_pool, _lexical_ids, repo_id, query, n_candidates)
+    )
+    fused_ids, known, missing = _fuse(vector_results, lexical_ids, top_k)
+    fetched = await db.get_by_ids_async(missing, include_embeddings=include_embeddings) if missing else None
+    return _fused_results(fused_ids, known, fetched)
+
+
+def _candidate_count(top_k: int) -> int:
+    return max(RETRIEVAL_CANDIDATES, top_k) if MMR_RERANK else top_k
+
+
+def _rerank(query_embedding: List[float], results: dict, top_k: int) -> dict:
+    """
+    Narrows over-fetched candidates to a diverse top-k (MMR with a per-file cap).
+    Fused hybrid candidates have no common similarity score, so their relevance
+    is taken from the fused rank.
+    """
+    if not MMR_RERANK or not results:
+        return results
+    with timed("rerank"):
+        relevance = None
+        if HYBRID_RETRIEVAL:
+            count = len(first_result(results, "ids"))
+            relevance = 1.0 - np.arange(count, dtype=np.float32) / max(count, 1)
+        return mmr_rerank(query_embedding, results, top_k, relevance=relevance)
+
+
+def cached_search(db, repo_id: str, query: str, top_k: int) -> dict:
+    """
+    Runs (or reuses) a top-k search. Entries are keyed on the collection version,
+    so any write by ingestion makes older results unreachable. With MMR_RERANK,
+    RETRIEVAL_CANDIDATES chunks are fetched and reranked down to top_k.
+    """
+    key = (repo_id, db.version, normalize_query(query), top_k)
+    results = search_result_cache.get(key)
+    if results is None:
+        n_fetch = _candidate_count(top_k)
+        query_embedding = embed_query(query)
+        if HYBRID_RETRIEVAL:
+            results = hybrid_search(db, repo_id, query, n_fetch, include_embeddings=MMR_RERANK)
+        else:
+            with timed("vector_search"):
+                results = db.similarity_search(query_embedding, top_k=n_fetch, include_embeddings=MMR_RERANK)
+        results = _rerank(query_embedding, results, top_k)
+        if results:
+            search_result_cache.set(key, results)
+    return results
+
+
+async def cached_search_async(db, repo_id: str, query: str, top_k: int) -> dict:
+    key = (repo_id, db.version, normalize_query(query), top_k)
+    results = search_result_cache.get(key)
+    if results is None:
+        n_fetch = _candidate_count(top_k)
+        query_embedding = await embed_query_async(query)
+        if HYBRID_RETRIEVAL:
+            results = await hybrid_search_async(db, repo_id, query, n_fetch, include_embeddings=MMR_RERANK)
+        else:
+            with timed("vector_search"):
+                results = await db.similarity_search_async(query_embedding, top_k=n_fetch,
+                                                           include_embeddings=MMR_RERANK)
+        results = _rerank(query_embedding, results, top_k)
+        if results:
+            search_result_cache.set(key, results)
+    return results
+
+
+def _pack_context(search_results: dict) -> str:
+    documents = search_results["documents"][0]
+    metadatas = search_results["metadatas"][0]
+
+    # Step 3: Merge overlapping chunks and pack them into the token budget
+    full_context, stats = assemble_context(documents, metadatas)
+    emit_event("retrieval", {**stats, "sources": sorted({meta.get("source") for meta in metadatas})})
+    return full_context
+
+
+def retrieve_relevant_context(query: str, top_k: int = 10, repo_id: Optional[str] = None) -> str:
     """
     Retrieves the top-k most relevant code/document chunks from the vector DB
     using the RAG pipeline.
@@ -12,27 +203,41 @@ def retrieve_relevant_context(query: str, top_k: int = 10) -> str:
     Args:
         query (str): The user query (natural language or code-related).
         top_k (int): Number of top similar chunks to retrieve.
+        repo_id (str, optional): Repo to search. Defaults to the repo bound to the
+            current request, then to the most recently used repo.
 
     Returns:
-        str: Combined formatted context string from retrieved chunks.
+        str: Context string of the retrieved chunks, at most CONTEXT_TOKEN_BUDGET tokens.
     """
+    repo_id = resolve_repo_id(repo_id)
+    if repo_id is None:
+        return "❌ No repository has been indexed yet."
+
     try:
-        # Step 1: Embed the query
-        query_embedding = get_embedding(query)
-
-        # Step 2: Perform similarity search
-        search_results = db.similarity_search(query_embedding, top_k=top_k)
-
-        documents = search_results["documents"][0]
-        metadatas = search_results["metadatas"][0]
-
-        # Step 3: Format context
-        context_blocks = [
-            f"From {meta.get('source')}:\n{doc.strip()}"
-            for doc, meta in zip(documents, metadatas)
-        ]
-        full_context = "\n\n".join(context_blocks)
-        return full_context
+        db = get_repo_db(repo_id)
+
+        # Step 1 + 2: Embed the query and perform hybrid search (cached)
+        search_results = cached_search(db, repo_id, query, top_k)
+        return _pack_context(search_results)
     
     except Exception as e:
         return f"❌ Retrieval error: {str(e)}"
+
+
+async def retrieve_relevant_context_async(query: str, top_k: int = 10, repo_id: Optional[str] = None) -> str:
+    """
+    Async variant of retrieve_relevant_context: embedding and vector store calls
+    run on their bounded pools while the event loop serves other requests.
+    """
+    repo_id = resolve_repo_id(repo_id)
+    if repo_id is None:
+        return "❌ No repository has been indexed yet."
+
+    try:
+        # Opening a collection the first time touches disk too
+        db = await run_in_pool(vector_io_pool, get_repo_db, repo_id)
+        search_results = await cached_search_async(db, repo_id, query, top_k)
+        return _pack_context(search_results)
+
+    except Exception as e:
+        return f"❌ Retrieval error: {str(e)}"
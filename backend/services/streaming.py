@@ -0,0 +1,27 @@
+import json
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+# Callback forwarding (event, data) pairs to a streaming response, if one is listening.
+# It is bound per request and inherited by the threads that run agent tools.
+event_sink: ContextVar[Optional[Callable[[str, dict], None]]] = ContextVar("event_sink", default=None)
+
+
+def is_streaming() -> bool:
+    return event_sink.get() is not None
+
+
+def emit_event(event: str, data: dict):
+    """
+    Sends an event to the current request's stream; a no-op outside streaming requests.
+    """
+    sink = event_sink.get()
+    if sink is not None:
+        sink(event, data)
+
+
+def format_sse(event: str, data: dict) -> str:
+    """
+    Serializes one Server-Sent Events message.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,243 @@
+import ast
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+# ✂️ Splits source files on real top-level symbol boundaries (functions, classes, ...)
+
+BRACE_EXTENSIONS = {".js", ".ts", ".java", ".go", ".cpp"}
+SYNTAX_EXTENSIONS = BRACE_EXTENSIONS | {".py"}
+
+# First match wins; group 1 is the symbol name
+SYMBOL_PATTERNS = [
+    ("class", re.compile(r"\b(?:class|interface|enum|struct|record|namespace)\s+([A-Za-z_$][\w$]*)")),
+    ("type", re.compile(r"^\s*(?:export\s+)?type\s+([A-Za-z_$][\w$]*)")),
+    ("function", re.compile(r"\bfunc\s+(?:\([^)]*\)\s*)?([A-Za-z_]\w*)")),
+    ("function", re.compile(r"\bfunction\s*\*?\s*([A-Za-z_$][\w$]*)")),
+    ("function", re.compile(r"\b(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s*)?(?:\([^)]*\)|[\w$]+)\s*=>")),
+    ("variable", re.compile(r"\b(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=")),
+    # Java/C++ methods and functions: `... name(args) {`
+    ("function", re.compile(r"([A-Za-z_~][\w:~]*)\s*\([^;]*\)\s*(?:const\s*)?(?:throws\s+[\w.,\s]+)?\{?\s*$")),
+]
+STRING_OR_COMMENT = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`(?:\\.|[^`\\])*`|//.*$')
+
+
+def split_lines(text: str, keepends: bool = False) -> List[str]:
+    r"""
+    Splits on "\n" only. Files are read with universal newlines (\r\n and \r
+    become \n), so line numbers match ast, editors and the file viewer, unlike
+    str.splitlines(), which also breaks on form feeds, \x1c-\x1e, \x85, \u2028...
+    """
+    lines = text.split("\n")
+    last = lines.pop()
+    if keepends:
+        lines = [line + "\n" for line in lines]
+    return lines + [last] if last else lines
+
+
+@dataclass
+class Segment:
+    symbol: str
+    kind: str
+    start_line: int  # 1-based, inclusive
+    end_line: int    # 1-based, inclusive
+
+
+def _python_segments(content: str) -> Optional[List[Segment]]:
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+
+    segments = []
+    for node in tree.body:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        end = node.end_lineno or node.lineno
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            segments.append(Segment(node.name, "function", start, end))
+        elif isinstance(node, ast.ClassDef):
+            segments.append(Segment(node.name, "class", start, end))
+        else:
+            segments.append(Segment("", "module", start, end))
+    return segments
+
+
+def python_members(content: str, segment: Segment) -> Optional[List[Segment]]:
+    """
+    Splits an (oversize) Python class into its header and one segment per method.
+    """
+    lines = split_lines(content)[segment.start_line - 1:segment.end_line]
+    try:
+        tree = ast.parse("\n".join(lines))
+    except (SyntaxError, ValueError):
+        return None
+    if not tree.body or not isinstance(tree.body[0], ast.ClassDef):
+        return None
+
+    offset = segment.start_line - 1
+    members = []
+    for node in tree.body[0].body:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])]) + offset
+        end = (node.end_lineno or node.lineno) + offset
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            kind = "class" if isinstance(node, ast.ClassDef) else "method"
+            members.append(Segment(f"{segment.symbol}.{node.name}", kind, start, end))
+        else:
+            members.append(Segment(segment.symbol, "class", start, end))
+    return _fill_gaps(members, segment.start_line, segment.end_line) if members else None
+
+
+def _indent_segments(lines: List[str]) -> List[Segment]:
+    """
+    Fallback for Python that doesn't parse: a new segment starts at every
+    unindented `def`/`class`/decorator line.
+    """
+    starts = [0]
+    for i, line in enumerate(lines):
+        if i and re.match(r"(?:async\s+def|def|class)\s|@", line) and not re.match(r"@", lines[i - 1]):
+            starts.append(i)
+    segments = []
+    for start, end in zip(starts, starts[1:] + [len(lines)]):
+        match = re.match(r"(?:@.*\n)*(?:async\s+)?(def|class)\s+(\w+)", "\n".join(lines[start:end]))
+        kind, name = (("function" if match.group(1) == "def" else "class"), match.group(2)) if match else ("module", "")
+        segments.append(Segment(name, kind, start + 1, end))
+    return segments
+
+
+def _brace_deltas(lines: List[str]) -> List[int]:
+    """
+    Net `{`/`}` change per line, ignoring braces inside strings and comments.
+    """
+    deltas = []
+    in_block_comment = False
+    for line in lines:
+        if in_block_comment:
+            end = line.find("*/")
+            if end == -1:
+                deltas.append(0)
+                continue
+            line = line[end + 2:]
+            in_block_comment = False
+        line = STRING_OR_COMMENT.sub("", line)
+        line = re.sub(r"/\*.*?\*/", "", line)
+        start = line.find("/*")
+        if start != -1:
+            line = line[:start]
+            in_block_comment = True
+        deltas.append(line.count("{") - line.count("}"))
+    return deltas
+
+
+def _symbol_for(lines: List[str]) -> Tuple[str, str]:
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith(("//", "/*", "*", "@", "#")):
+            continue
+        for kind, pattern in SYMBOL_PATTERNS:
+            match = pattern.search(stripped)
+            if match:
+                return kind, match.group(1)
+        return "block", ""
+    return "module", ""
+
+
+def brace_segments(lines: List[str], first: int = 0, last: Optional[int] = None) -> List[Segment]:
+    """
+    Splits lines[first:last] into brace-balanced top-level blocks. Comment/annotation
+    lines directly above a block belong to it; everything else between blocks
+    (imports, one-line declarations) forms `module` segments.
+    """
+    last = len(lines) if last is None else last
+    deltas = _brace_deltas(lines[first:last])
+    spans = []  # (start, end, is_block), 0-based inclusive
+    depth = 0
+    floor = first  # first line not yet claimed by a finished block
+    glue_start = None
+    block_start = None
+
+    for i, delta in zip(range(first, last), deltas):
+        if depth == 0 and block_start is None:
+            if delta > 0:
+                # Pull in the contiguous non-blank lines right above (docs, annotations)
+                start = i
+                while start > floor and lines[start - 1].strip():
+                    start -= 1
+                if glue_start is not None and glue_start < start:
+                    spans.append((glue_start, start - 1, False))
+                glue_start = None
+                block_start = start
+            elif glue_start is None and lines[i].strip():
+                glue_start = i
+        depth = max(depth + delta, 0)
+        if block_start is not None and depth == 0:
+            spans.append((block_start, i, True))
+            block_start = None
+            floor = i + 1
+
+    if block_start is not None:
+        spans.append((block_start, last - 1, True))
+    elif glue_start is not None:
+        spans.append((glue_start, last - 1, False))
+
+    segments = []
+    for start, end, is_block in spans:
+        kind, name = _symbol_for(lines[start:end + 1]) if is_block else ("module", "")
+        segments.append(Segment(name, kind, start + 1, end + 1))
+    return segments
+
+
+def brace_members(lines: List[str], segment: Segment) -> Optional[List[Segment]]:
+    """
+    Splits an (oversize) brace block one level down, e.g. a Java class into methods.
+    The opening line(s) and closing brace stay with the first and last member.
+    """
+    start, end = segment.start_line - 1, segment.end_line - 1
+    deltas = _brace_deltas(lines[start:end + 1])
+    depth, body_start = 0, None
+    for i, delta in enumerate(deltas):
+        depth += delta
+        if depth > 0:
+            body_start = start + i + 1
+            break
+    if body_start is None or body_start >= end:
+        return None
+
+    members = brace_segments(lines, body_start, end)
+    if len(members) < 2:
+        return None
+    for member in members:
+        if member.symbol and segment.symbol:
+            member.symbol = f"{segment.symbol}.{member.symbol}"
+    if members[0].kind == "module":
+        # Fields etc. right after the opening line form the class header
+        members[0].symbol, members[0].kind = segment.symbol, segment.kind
+    return _fill_gaps(members, segment.start_line, segment.end_line)
+
+
+def _fill_gaps(segments: List[Segment], first_line: int, last_line: int) -> List[Segment]:
+    """
+    Stretches segments so together they cover first_line..last_line: stray lines
+    between symbols (comments, blank lines) join the symbol that follows them.
+    """
+    segments[0].start_line = first_line
+    for previous, segment in zip(segments, segments[1:]):
+        segment.start_line = previous.end_line + 1
+    segments[-1].end_line = last_line
+    return segments
+
+
+def split_into_symbols(content: str, extension: str) -> Optional[List[Segment]]:
+    """
+    Returns the top-level symbol segments of a source file, or None when the
+    extension isn't supported (the caller falls back to text splitting).
+    """
+    lines = split_lines(content)
+    if extension == ".py":
+        segments = _python_segments(content)
+        if segments is None:
+            segments = _indent_segments(lines)
+    elif extension in BRACE_EXTENSIONS:
+        segments = brace_segments(lines)
+    else:
+        return None
+    return _fill_gaps(segments, 1, len(lines)) if segments else []
@@ -1,53 +1,312 @@
 from chromadb import PersistentClient
 from chromadb.config import Settings
-from typing import List
+from chromadb.errors import NotFoundError
+from typing import Dict, List, Optional
+import hashlib
 import logging
+import os
+import re
+import shutil
+import threading
+from services.vector_store import VectorStore, next_version, vector_io_pool
+from config.settings import VECTOR_WRITE_BATCH_SIZE, VECTOR_BACKEND, NUMPY_STORE_PATH
 
-class ChromaDBWrapper:
-    def __init__(self, persist_path="./chroma_store", collection_name="repo_chunks"):
-        self.client = PersistentClient(path=persist_path, settings=Settings(allow_reset=True))
+DEFAULT_PERSIST_PATH = "./chroma_store"
+
+_clients: Dict[str, PersistentClient] = {}
+_repo_dbs: Dict[str, VectorStore] = {}
+_lock = threading.Lock()
+
+
+def get_client(persist_path: str = DEFAULT_PERSIST_PATH) -> PersistentClient:
+    """
+    Returns one shared PersistentClient per store path.
+    """
+    with _lock:
+        if persist_path not in _clients:
+            _clients[persist_path] = PersistentClient(path=persist_path, settings=Settings(allow_reset=True))
+        return _clients[persist_path]
+
+
+def collection_name_for(repo_id: str) -> str:
+    """
+    Maps a repo id onto a valid Chroma collection name (3-63 chars, alphanumeric ends).
+    """
+    name = "repo_" + re.sub(r"[^a-zA-Z0-9._-]", "-", repo_id)
+    if len(name) > 63 or not name[-1].isalnum():
+        digest = hashlib.sha1(repo_id.encode("utf-8")).hexdigest()[:8]
+        name = name[:50].rstrip("._-") + "_" + digest
+    return name
+
+
+def _open_repo_store(repo_id: str) -> VectorStore:
+    if VECTOR_BACKEND == "numpy":
+        from services.numpy_store import NumpyVectorStore
+        return NumpyVectorStore(os.path.join(NUMPY_STORE_PATH, collection_name_for(repo_id)))
+    return ChromaDBWrapper(collection_name=collection_name_for(repo_id))
+
+
+def get_repo_db(repo_id: str) -> VectorStore:
+    """
+    Returns the (cached) store that holds `repo_id`'s chunks, using the
+    VECTOR_BACKEND backend.
+    """
+    with _lock:
+        db = _repo_dbs.get(repo_id)
+    if db is None:
+        db = _open_repo_store(repo_id)
+        with _lock:
+            db = _repo_dbs.setdefault(repo_id, db)
+    return db
+
+
+def content_chunk_id(repo: str, source: str, start_index: int, text: str) -> str:
+    """
+    Deterministic chunk ID from (repo, path, offset in file, content hash): the same
+    chunk always maps to the same ID, so re-indexing a file overwrites its vectors
+    and chunks of different repos/uploads never collide.
+    """
+    content_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    key = f"{repo}\0{source}\0{start_index}\0{content_hash}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def drop_repo_collection(repo_id: str):
+    with _lock:
+        db = _repo_dbs.pop(repo_id, None)
+    if VECTOR_BACKEND == "numpy":
+        from services.numpy_store import drop_store
+        drop_store(os.path.join(NUMPY_STORE_PATH, collection_name_for(repo_id)), db)
+        logging.info(f"🗑️ Dropped NumPy vector store for {repo_id}")
+        return
+    try:
+        get_client().delete_collection(collection_name_for(repo_id))
+        logging.info(f"🗑️ Dropped Chroma collection for {repo_id}")
+    except Exception as e:
+        logging.warning(f"⚠️ Could not drop collection for {repo_id}: {e}")
+
+
+def staging_name_for(repo_id: str, prefix: str = "next_") -> str:
+    """
+    Collection/store name used while `repo_id` is rebuilt ("next_") or while the
+    replaced one is dropped ("prev_"). Same length as the live name, never equal to one.
+    """
+    return prefix + collection_name_for(repo_id)[len("repo_"):]
+
+
+def open_staging_db(repo_id: str) -> VectorStore:
+    """
+    Returns an empty store next to `repo_id`'s live one. A full re-index writes
+    into it and only replaces the live store via promote_staging_db once it
+    completes, so a failed or cancelled run leaves the old index searchable.
+    """
+    if VECTOR_BACKEND == "numpy":
+        from services.numpy_store import NumpyVectorStore, drop_store
+        path = os.path.join(NUMPY_STORE_PATH, staging_name_for(repo_id))
+        drop_store(path)
+        return NumpyVectorStore(path)
+    db = ChromaDBWrapper(collection_name=staging_name_for(repo_id))
+    db.clear()
+    return db
+
+
+def promote_staging_db(repo_id: str, staging: VectorStore) -> VectorStore:
+    """
+    Makes a completed staging store the live store of `repo_id` and drops the old one.
+    """
+    if VECTOR_BACKEND == "numpy":
+        from services.numpy_store import NumpyVectorStore, drop_store
+        live_path = os.path.join(NUMPY_STORE_PATH, collection_name_for(repo_id))
+        old_path = os.path.join(NUMPY_STORE_PATH, staging_name_for(repo_id, "prev_"))
+        staging.close()
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(live_path):
+            os.replace(live_path, old_path)
+        os.replace(staging.path, live_path)
+        db = NumpyVectorStore(live_path)
+        with _lock:
+            old = _repo_dbs.get(repo_id)
+            _repo_dbs[repo_id] = db
+        drop_store(old_path, old)
+        logging.info(f"🔀 Swapped in the rebuilt NumPy vector store for {repo_id}")
+        return db
+
+    client = staging.client
+    live_name, old_name = collection_name_for(repo_id), staging_name_for(repo_id, "prev_")
+    try:
+        client.delete_collection(old_name)
+    except Exception:
+        pass
+    try:
+        # Collections are addressed by id, so in-flight queries keep reading the old data
+        client.get_collection(live_name).modify(name=old_name)
+    except NotFoundError:
+        pass
+    staging.collection.modify(name=live_name)
+    with _lock:
+        db = _repo_dbs.setdefault(repo_id, staging)
+    if db is not staging:
+        db.collection = staging.collection
+        db.version = next_version()
+    try:
+        client.delete_collection(old_name)
+    except Exception as e:
+        logging.warning(f"⚠️ Could not drop replaced collection for {repo_id}: {e}")
+    logging.info(f"🔀 Swapped in the rebuilt Chroma collection for {repo_id}")
+    return db
+
+
+def discard_staging_db(repo_id: str, staging: VectorStore):
+    """
+    Drops an unfinished staging store; the live store is untouched.
+    """
+    if VECTOR_BACKEND == "numpy":
+        from services.numpy_store import drop_store
+        drop_store(staging.path, staging)
+        return
+    try:
+        staging.client.delete_collection(staging_name_for(repo_id))
+    except Exception as e:
+        logging.warning(f"⚠️ Could not drop staging collection for {repo_id}: {e}")
+
+
+class ChromaDBWrapper(VectorStore):
+    def __init__(self, persist_path=DEFAULT_PERSIST_PATH, collection_name="repo_chunks"):
+        self.client = get_client(persist_path)
         self.collection = self.client.get_or_create_collection(name=collection_name)
+        # Bumped on every write so caches keyed on it invalidate themselves
+        self.version = next_version()
         logging.info(f"📚 Connected to Chroma collection: {collection_name} at {persist_path}")
 
-    def add_chunks(self, chunks: List[str], embeddings: List[List[float]], metadatas: List[dict]):
+    def _write_batch_size(self, batch_size: Optional[int]) -> int:
+        batch_size = batch_size or VECTOR_WRITE_BATCH_SIZE
+        try:
+            return max(1, min(batch_size, self.client.get_max_batch_size()))
+        except Exception:
+            return max(1, batch_size)
+
+    def add_chunks(self, chunks: List[str], embeddings: List[List[float]], metadatas: List[dict],
+                   ids: Optional[List[str]] = None, batch_size: Optional[int] = None) -> List[str]:
+        """
+        Upserts chunks in batches of at most `batch_size` (VECTOR_WRITE_BATCH_SIZE by
+        default). Without `ids`, content-addressed IDs are derived from each chunk's
+        source, start offset and text. Returns the IDs of the chunks that could not
+        be written (empty on success).
+        """
         if not chunks:
             logging.warning("⚠️ No chunks to add to ChromaDB.")
-            return
+            return []
 
-        ids = [f"doc-{i}" for i in range(len(chunks))]
-        logging.info(f"📥 Adding {len(chunks)} documents to ChromaDB.")
-        try:
-            self.collection.add(
-                documents=chunks,
-                embeddings=embeddings,
-                metadatas=metadatas,
-                ids=ids
-            )
+        if ids is None:
+            ids = [
+                content_chunk_id(self.collection.name, meta.get("source", ""), meta.get("start_index", 0), chunk)
+                for chunk, meta in zip(chunks, metadatas)
+            ]
+        batch_size = self._write_batch_size(batch_size)
+        logging.info(f"📥 Upserting {len(chunks)} documents to ChromaDB.")
+        failed: List[str] = []
+        for start in range(0, len(chunks), batch_size):
+            end = start + batch_size
+            try:
+                self.collection.upsert(
+                    documents=chunks[start:end],
+                    embeddings=embeddings[start:end],
+                    metadatas=metadatas[start:end],
+                    ids=ids[start:end]
+                )
+            except Exception as e:
+                # Other batches still go in; their IDs make a retry idempotent
+                logging.error(f"❌ Failed to add batch to ChromaDB: {e}")
+                failed.extend(ids[start:end])
+        self.version = next_version()
+        if failed:
+            logging.error(f"❌ {len(failed)} of {len(chunks)} chunks were not added to ChromaDB.")
+        else:
             logging.info("✅ Chunks added to ChromaDB.")
-        except Exception as e:
-            logging.error(f"❌ Failed to add to ChromaDB: {e}")
+        return failed
 
-    def similarity_search(self, query_embedding: List[float], top_k=5):
+    def similarity_search(self, query_embedding: List[float], top_k=5, include_embeddings: bool = False):
+        include = ["documents", "metadatas", "distances"] + (["embeddings"] if include_embeddings else [])
         try:
             results = self.collection.query(
                 query_embeddings=[query_embedding],
-                n_results=top_k
+                n_results=top_k,
+                include=include
             )
             docs = results.get("documents", [[]])[0]
             metadatas = results.get("metadatas", [[]])[0]
             logging.info(f"🔍 Retrieved {len(docs)} documents.")
-            for i, doc in enumerate(docs):
-                logging.info(f"🔗 Result {i+1}: {metadatas[i].get('source', 'unknown file')} - {doc[:150]}...")
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                for i, doc in enumerate(docs):
+                    logging.debug(f"🔗 Result {i+1}: {metadatas[i].get('source', 'unknown file')} - {doc[:150]}...")
             return results
         except Exception as e:
             logging.error(f"❌ Failed similarity search: {e}")
             return {}
 
-    def clear(self):
+    def get_by_ids(self, ids: List[str], include_embeddings: bool = False) -> dict:
+        """
+        Fetches documents and metadatas (and optionally embeddings) for the given
+        IDs, in the order requested.
+        """
+        if not ids:
+            return {"ids": [], "documents": [], "metadatas": []}
         try:
-        # Trick: match everything where "id" is not null
-           self.collection.delete(where={"id": {"$ne": "nonexistent"}})
-           logging.info("🧹 Cleared all existing documents from ChromaDB.")
+            include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+            results = self.collection.get(ids=list(ids), include=include)
+            embeddings = results.get("embeddings") if include_embeddings else None
+            if embeddings is None:
+                embeddings = [None] * len(results["ids"])
+            by_id = {
+                doc_id: (doc, meta, embedding)
+                for doc_id, doc, meta, embedding in zip(results["ids"], results["documents"], results["metadatas"],
+                                                        embeddings)
+            }
+            found = [doc_id for doc_id in ids if doc_id in by_id]
+            fetched = {
+                "ids": found,
+                "documents": [by_id[doc_id][0] for doc_id in found],
+                "metadatas": [by_id[doc_id][1] for doc_id in found],
+            }
+            if include_embeddings:
+                fetched["embeddings"] = [by_id[doc_id][2] for doc_id in found]
+            return fetched
         except Exception as e:
-           logging.error(f"❌ Failed to clear ChromaDB collection: {e}")
+            logging.error(f"❌ Failed to fetch documents by id: {e}")
+            return {"ids": [], "documents": [], "metadatas": []}
 
+    def delete_by_source(self, sources: List[str], batch_size: Optional[int] = None) -> List[str]:
+        """
+        Deletes every chunk whose `source` metadata is one of `sources`, so a
+        changed file can be replaced without touching the rest of the collection.
+        Returns the sources whose chunks could not be deleted (empty on success).
+        """
+        if not sources:
+            return []
+        sources = list(sources)
+        batch_size = self._write_batch_size(batch_size)
+        failed: List[str] = []
+        for start in range(0, len(sources), batch_size):
+            batch = sources[start:start + batch_size]
+            try:
+                self.collection.delete(where={"source": {"$in": batch}})
+            except Exception as e:
+                logging.error(f"❌ Failed to delete chunks by source: {e}")
+                failed.extend(batch)
+        self.version = next_version()
+        logging.info(f"🗑️ Deleted chunks of {len(sources) - len(failed)} files from ChromaDB.")
+        return failed
+
+    def clear(self):
+        """
+        Removes every document by recreating the collection, which is O(1) instead
+        of a metadata-filtered delete over all rows.
+        """
+        name = self.collection.name
+        try:
+            self.client.delete_collection(name)
+            self.collection = self.client.get_or_create_collection(name=name)
+            self.version = next_version()
+            logging.info("🧹 Cleared all existing documents from ChromaDB.")
+        except Exception as e:
+            logging.error(f"❌ Failed to clear ChromaDB collection: {e}")
@@ -0,0 +1,89 @@
+import itertools
+from abc import ABC, abstractmethod
+from typing import List, Optional
+import numpy as np
+from services.async_pool import bounded_pool, run_in_pool
+from config.settings import VECTOR_IO_WORKERS
+
+# 🗄️ Interface shared by the vector store backends (Chroma, in-process NumPy)
+
+# Process-wide counter so a recreated store never reuses an old version number
+_versions = itertools.count(1)
+# Vector stores are blocking; coroutines run their calls on this pool
+vector_io_pool = bounded_pool("vector-io", VECTOR_IO_WORKERS)
+
+
+def next_version() -> int:
+    return next(_versions)
+
+
+def first_result(results: dict, key: str) -> list:
+    """
+    The values for the first (only) query in a query()-shaped result, e.g.
+    first_result(results, "ids"). Missing or empty keys give [].
+    """
+    # Chroma returns embeddings as numpy arrays, which have no truth value
+    values = results.get(key)
+    if values is None or len(values) == 0 or values[0] is None:
+        return []
+    return list(values[0])
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    Scales each vector (along the last axis) to unit length; zero vectors stay zero.
+    """
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+class VectorStore(ABC):
+    """
+    One repo's chunk vectors. Results use Chroma's query() shape so callers don't
+    care which backend answered. `version` changes on every write, so caches keyed
+    on it invalidate themselves.
+    """
+
+    version: int
+
+    @abstractmethod
+    def add_chunks(self, chunks: List[str], embeddings: List[List[float]], metadatas: List[dict],
+                   ids: Optional[List[str]] = None, batch_size: Optional[int] = None) -> List[str]:
+        """
+        Upserts chunks; writing the same ID again replaces the old entry. Returns
+        the IDs that could not be written, so callers can retry them.
+        """
+
+    @abstractmethod
+    def similarity_search(self, query_embedding: List[float], top_k=5, include_embeddings: bool = False) -> dict:
+        """
+        Top-k nearest chunks as {"ids": [[...]], "documents": [[...]], "metadatas": [[...]], "distances": [[...]]},
+        plus "embeddings": [[...]] when `include_embeddings` is set.
+        """
+
+    @abstractmethod
+    def get_by_ids(self, ids: List[str], include_embeddings: bool = False) -> dict:
+        """
+        Documents and metadatas (and optionally embeddings) for the given IDs, in
+        the order requested.
+        """
+
+    @abstractmethod
+    def delete_by_source(self, sources: List[str], batch_size: Optional[int] = None) -> List[str]:
+        """
+        Deletes every chunk whose `source` metadata is one of `sources`. Returns
+        the sources whose chunks could not be deleted.
+        """
+
+    @abstractmethod
+    def clear(self):
+        """
+        Removes every chunk.
+        """
+
+    async def similarity_search_async(self, query_embedding: List[float], top_k=5,
+                                      include_embeddings: bool = False) -> dict:
+        return await run_in_pool(vector_io_pool, self.similarity_search, query_embedding, top_k, include_embeddings)
+
+    async def get_by_ids_async(self, ids: List[str], include_embeddings: bool = False) -> dict:
+        return await run_in_pool(vector_io_pool, self.get_by_ids, ids, include_embeddings)
@@ -1,4 +1,10 @@
 import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from services.repo_scanner import scan_repo
+from config.settings import TREE_SNAPSHOT_CACHE_SIZE
 
 def build_file_tree(path: str) -> dict:
     """
@@ -32,3 +38,89 @@ def build_file_tree(path: str) -> dict:
     except Exception as e:
         print(f"⚠️ Error reading {path}: {e}")
     return tree
+
+
+class TreeSnapshot:
+    """
+    One-level-at-a-time view of a repo's indexable files, built from a single
+    scanner pass (same skip rules as ingestion).
+    """
+
+    def __init__(self, files: List[str], root: str):
+        subdirs: Dict[str, set] = {"": set()}
+        files_by_dir: Dict[str, List[str]] = {"": []}
+        for file_path in files:
+            rel_path = os.path.relpath(file_path, root).replace(os.sep, "/")
+            parent, _, name = rel_path.rpartition("/")
+            files_by_dir.setdefault(parent, []).append(name)
+            # Register the folder chain up to the first ancestor already known
+            while parent:
+                subdirs.setdefault(parent, set())
+                grandparent, _, folder = parent.rpartition("/")
+                siblings = subdirs.setdefault(grandparent, set())
+                if folder in siblings:
+                    break
+                siblings.add(folder)
+                parent = grandparent
+
+        # folder relative path -> (sorted sub-folder names, sorted file names)
+        self.dirs: Dict[str, Tuple[List[str], List[str]]] = {
+            path: (sorted(subdirs.get(path, ())), sorted(files_by_dir.get(path, ())))
+            for path in subdirs
+        }
+
+    def child_count(self, path: str) -> int:
+        folders, files = self.dirs.get(path, ((), ()))
+        return len(folders) + len(files)
+
+    def list_dir(self, path: str = "", offset: int = 0, limit: int = 200) -> Optional[dict]:
+        """
+        Returns one page of a folder's children (folders first), or None if the
+        folder isn't in the snapshot.
+        """
+        path = path.strip("/")
+        if path not in self.dirs:
+            return None
+        folders, files = self.dirs[path]
+        prefix = f"{path}/" if path else ""
+
+        entries = [
+            {"name": name, "path": prefix + name, "type": "folder",
+             "children_count": self.child_count(prefix + name)}
+            for name in folders
+        ] + [{"name": name, "path": prefix + name, "type": "file"} for name in files]
+
+        page = entries[offset:offset + limit]
+        return {
+            "path": path,
+            "entries": page,
+            "total": len(entries),
+            "offset": offset,
+            "limit": limit,
+            "has_more": offset + len(page) < len(entries),
+        }
+
+
+_snapshots: "OrderedDict[Tuple[str, Optional[str]], TreeSnapshot]" = OrderedDict()
+_snapshots_lock = threading.Lock()
+
+
+def get_tree_snapshot(repo_path: str, commit: Optional[str] = None) -> TreeSnapshot:
+    """
+    Returns the cached snapshot for (repo_path, commit), scanning the clone on a miss.
+    A new commit gets a new snapshot; old ones fall out of the LRU.
+    """
+    key = (os.path.abspath(repo_path), commit)
+    with _snapshots_lock:
+        if key in _snapshots:
+            _snapshots.move_to_end(key)
+            return _snapshots[key]
+
+    snapshot = TreeSnapshot(scan_repo(repo_path).files, repo_path)
+
+    with _snapshots_lock:
+        _snapshots[key] = snapshot
+        while len(_snapshots) > TREE_SNAPSHOT_CACHE_SIZE:
+            _snapshots.popitem(last=False)
+    logging.info(f"🌲 Tree snapshot built for {repo_path} @ {commit}")
+    return snapshot
@@ -0,0 +1,132 @@
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+import numpy as np
+from tools.tool_registory import tools
+from services.embedder import get_embeddings
+from services.retrival import embed_query
+from services.metrics import Counter
+from config.settings import ROUTER_MIN_SIMILARITY, ROUTER_MIN_MARGIN
+
+# 🧭 Routes plain single-intent questions straight to a tool, skipping the ReAct agent
+
+ROUTER_DECISIONS = Counter("repo_companion_router_decisions_total", "Chat requests by route taken.", ["route"])
+
+KEYWORD_RULES: Dict[str, List[str]] = {
+    "CodeExplainer": [r"\bexplain", r"\bwhat (?:does|is)\b", r"\bhow does\b", r"\bwalk me through\b",
+                      r"\bunderstand\b"],
+    "BugFinder": [r"\bbugs?\b", r"\berrors?\b", r"\bcrash", r"\bbroken\b", r"\bdebug", r"\bexceptions?\b",
+                  r"\bwhy (?:does|is) .* fail"],
+    "CodeReviewer": [r"\breview", r"\bcode quality\b", r"\bmaintainab", r"\breadab", r"\bbest practices?\b"],
+    "DocGenerator": [r"\bdocstrings?\b", r"\bdocument", r"\bcomments?\b", r"\breadme\b", r"\bjsdoc\b"],
+    "CodeModifier": [r"\brefactor", r"\bmodify\b", r"\brewrite\b", r"\brename\b", r"\bimplement\b",
+                     r"\bchange (?:the|this|it)\b"],
+    "PerformanceOptimizer": [r"\bperformance\b", r"\boptimi[sz]", r"\bfaster\b", r"\bslow", r"\bspeed up\b",
+                             r"\blatency\b", r"\bmemory usage\b"],
+    "SecurityAuditor": [r"\bsecur", r"\bvulnerab", r"\binjection\b", r"\bxss\b", r"\bcsrf\b", r"\bsecrets?\b",
+                        r"\baudit"],
+    "TestCaseGenerator": [r"\btests?\b", r"\btest cases?\b", r"\bunit tests?\b", r"\bpytest\b", r"\bjest\b",
+                          r"\bcoverage\b"],
+    "DependencyExplainer": [r"\bdependenc", r"\blibrar(?:y|ies)\b", r"\bpackages?\b", r"\brequirements\b",
+                            r"\bthird.party\b"],
+    "ArchitectureMapper": [r"\barchitecture\b", r"\bstructure", r"\bmodules?\b", r"\boverview\b",
+                           r"\bhigh.level\b", r"\bcomponents?\b"],
+}
+COMPILED_RULES = {name: [re.compile(p, re.IGNORECASE) for p in patterns] for name, patterns in KEYWORD_RULES.items()}
+# Keyword hits outweigh embedding similarity; one hit is worth this much similarity
+KEYWORD_WEIGHT = 0.3
+
+
+@dataclass
+class RouteDecision:
+    tool: str
+    func: Callable[[str], str]
+    coroutine: Callable[[str], Awaitable[str]]
+    score: float
+    reason: str
+
+
+class IntentRouter:
+    """
+    Picks a tool for a query from keyword rules plus embedding similarity to the
+    tool descriptions. Returns None when the query looks like it needs more than
+    one tool or no tool is a clear winner, so the agent handles it.
+    """
+
+    def __init__(self, registered_tools=tools):
+        self.tools = {tool.name: tool for tool in registered_tools}
+        self._description_matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def _descriptions(self) -> np.ndarray:
+        if self._description_matrix is None:
+            with self._lock:
+                if self._description_matrix is None:
+                    texts = [f"{name}: {tool.description}" for name, tool in self.tools.items()]
+                    matrix = np.asarray(get_embeddings(texts), dtype=np.float32)
+                    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                    self._description_matrix = matrix / np.where(norms == 0, 1.0, norms)
+        return self._description_matrix
+
+    def keyword_hits(self, query: str) -> Dict[str, int]:
+        hits = {}
+        for name, patterns in COMPILED_RULES.items():
+            count = sum(1 for pattern in patterns if pattern.search(query))
+            if count and name in self.tools:
+                hits[name] = count
+        return hits
+
+    def similarities(self, query: str) -> Dict[str, float]:
+        vector = np.asarray(embed_query(query), dtype=np.float32)
+        if not vector.size:
+            return {}
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        scores = self._descriptions() @ vector
+        return dict(zip(self.tools, scores.tolist()))
+
+    def route(self, query: str) -> Optional[RouteDecision]:
+        hits = self.keyword_hits(query)
+        similarities = self.similarities(query)
+        if not similarities:
+            return None
+
+        scores = {name: similarities[name] + KEYWORD_WEIGHT * hits.get(name, 0) for name in self.tools}
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        best, runner_up = ranked[0], ranked[1] if len(ranked) > 1 else None
+        margin = scores[best] - (scores[runner_up] if runner_up else 0.0)
+
+        if len(hits) > 1 and margin < KEYWORD_WEIGHT:
+            # e.g. "find the bugs and write tests": several intents, let the agent plan
+            return None
+        if hits and best in hits:
+            reason = f"keywords ({hits[best]}), similarity {similarities[best]:.2f}"
+        elif similarities[best] >= ROUTER_MIN_SIMILARITY and margin >= ROUTER_MIN_MARGIN:
+            reason = f"similarity {similarities[best]:.2f}, margin {margin:.2f}"
+        else:
+            return None
+        return RouteDecision(best, self.tools[best].func, self.tools[best].coroutine, round(scores[best], 4), reason)
+
+
+_router: Optional[IntentRouter] = None
+
+
+def route_query(query: str) -> Optional[RouteDecision]:
+    """
+    Returns the tool to answer `query` directly, or None to use the agent.
+    Routing failures never block a request; they just fall back to the agent.
+    """
+    global _router
+    try:
+        if _router is None:
+            _router = IntentRouter()
+        decision = _router.route(query)
+    except Exception as e:
+        logging.warning(f"⚠️ Intent routing failed, using the agent: {e}")
+        decision = None
+
+    ROUTER_DECISIONS.inc(route=decision.tool if decision else "agent")
+    if decision:
+        logging.info(f"🧭 Routed to {decision.tool} ({decision.reason})")
+    return decision
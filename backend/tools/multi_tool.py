@@ -1,9 +1,13 @@
-from services.retrival import retrieve_relevant_context
-from services.llm_query import generate_response_from_prompt
-
-def code_explainer(query: str) -> str:
-    context = retrieve_relevant_context(query)
-    prompt = f"""
+import asyncio
+import time
+from typing import AsyncIterator, List, Optional, Tuple
+from services.retrival import retrieve_relevant_context, retrieve_relevant_context_async
+from services.llm_query import generate_response_from_prompt, generate_response_from_prompt_async
+from services.streaming import event_sink
+from config.settings import ANALYSIS_CONCURRENCY
+
+# Prompt templates per tool; each is filled with the retrieved {context} and the user's {query}
+CODE_EXPLAINER_PROMPT = """
 Act as a senior software engineer helping developers understand unfamiliar code.
 
 Given the code context, break down and explain what it does in a clear and proper way.  
@@ -19,12 +23,8 @@ Context:
 User Query:
 {query}
 """
-    return generate_response_from_prompt(prompt)
 
-
-def bug_finder(query: str) -> str:
-    context = retrieve_relevant_context(query)
-    prompt = f"""
+BUG_FINDER_PROMPT = """
 Act as a debugging assistant. Analyze the provided code carefully for bugs or logical errors.  
 
 Look for syntax errors, runtime errors, bad practices, edge cases, or security vulnerabilities.  
@@ -42,12 +42,8 @@ Context:
 User Query:
 {query}
 """
-    return generate_response_from_prompt(prompt)
-
 
-def code_reviewer(query: str) -> str:
-    context = retrieve_relevant_context(query)
-    prompt = f"""
+CODE_REVIEWER_PROMPT = """
 Act as an experienced code reviewer evaluating this code for quality, style, and maintainability.  
 
 Analyze code structure, readability, naming conventions, and design decisions.  
@@ -65,12 +61,8 @@ Context:
 User Query:
 {query}
 """
-    return generate_response_from_prompt(prompt)
-
 
-def doc_generator(query: str) -> str:
-    context = retrieve_relevant_context(query)
-    prompt = f"""
+DOC_GENERATOR_PROMPT = """
 Act as a documentation assistant. Use the code context to generate helpful documentation.  
 
 Add docstrings for functions and classes if missing or incomplete.  
@@ -88,12 +80,8 @@ Context:
 User Query:
 {query}
 """
-    return generate_response_from_prompt(prompt)
-
 
-def code_modifier(query: str) -> str:
-    context = retrieve_relevant_context(query)
-    prompt = f"""
+CODE_MODIFIER_PROMPT = """
 Act as a reliable AI developer. Modify the provided code based on the user's query or requirements.
 
 Ensure your changes are precise and solve the request without breaking existing functionality.  
@@ -111,12 +99,8 @@ Context:
 User Query:
 {query}
 """
-    return generate_response_from_prompt(prompt)
 
-
-def performance_optimizer(query: str) -> str:
-    context = retrieve_relevant_context(query)
-    prompt = f"""
+PERFORMANCE_OPTIMIZER_PROMPT = """
 Act as a performance optimization expert. Analyze the code for slow or inefficient operations.
 
 Identify areas where performance can be improved (e.g., loops, DB calls, API usage, computation).  
@@ -134,12 +118,8 @@ Context:
 User Query:
 {query}
 """
-    return generate_response_from_prompt(prompt)
 
-
-def security_auditor(query: str) -> str:
-    context = retrieve_relevant_context(query)
-    prompt = f"""
+SECURITY_AUDITOR_PROMPT = """
 Act as a security auditor. Review the provided code for security vulnerabilities.
 
 Identify insecure coding patterns, injection risks, unsafe authentication/authorization flows, etc.  
@@ -157,11 +137,8 @@ Context:
 User Query:
 {query}
 """
-    return generate_response_from_prompt(prompt)
 
-def test_case_generator(query: str) -> str:
-    context = retrieve_relevant_context(query)
-    prompt = f"""
+TEST_CASE_GENERATOR_PROMPT = """
 Act as a test engineer. Analyze the provided code and generate relevant test cases.
 
 Create unit tests that cover core functionality, edge cases, and possible failure points.  
@@ -179,12 +156,8 @@ Context:
 User Query:
 {query}
 """
-    return generate_response_from_prompt(prompt)
 
-
-def dependency_explainer(query: str) -> str:
-    context = retrieve_relevant_context(query)
-    prompt = f"""
+DEPENDENCY_EXPLAINER_PROMPT = """
 Act as a dependency analysis expert. Review the code or configuration and explain external libraries used.
 
 List and explain the purpose of each imported or installed dependency.  
@@ -202,11 +175,8 @@ Context:
 User Query:
 {query}
 """
-    return generate_response_from_prompt(prompt)
 
-def architecture_mapper(query: str) -> str:
-    context = retrieve_relevant_context(query)
-    prompt = f"""
+ARCHITECTURE_MAPPER_PROMPT = """
 Act as a software architect. Analyze the codebase and describe the overall system architecture.
 
 Identify the major components, how they interact, and their responsibilities.  
@@ -224,4 +194,152 @@ Context:
 User Query:
 {query}
 """
-    return generate_response_from_prompt(prompt)
\ No newline at end of file
+
+TOOL_PROMPTS = {
+    "code_explainer": CODE_EXPLAINER_PROMPT,
+    "bug_finder": BUG_FINDER_PROMPT,
+    "code_reviewer": CODE_REVIEWER_PROMPT,
+    "doc_generator": DOC_GENERATOR_PROMPT,
+    "code_modifier": CODE_MODIFIER_PROMPT,
+    "performance_optimizer": PERFORMANCE_OPTIMIZER_PROMPT,
+    "security_auditor": SECURITY_AUDITOR_PROMPT,
+    "test_case_generator": TEST_CASE_GENERATOR_PROMPT,
+    "dependency_explainer": DEPENDENCY_EXPLAINER_PROMPT,
+    "architecture_mapper": ARCHITECTURE_MAPPER_PROMPT,
+}
+
+
+def run_tool(name: str, query: str) -> str:
+    """
+    Retrieves context for `query` and answers it with the prompt of tool `name`.
+    """
+    context = retrieve_relevant_context(query)
+    prompt = TOOL_PROMPTS[name].format(context=context, query=query)
+    return generate_response_from_prompt(prompt, query=query, scope=name)
+
+
+async def run_tool_async(name: str, query: str) -> str:
+    """
+    Async variant of run_tool; retrieval and the Gemini call don't block the event loop.
+    """
+    context = await retrieve_relevant_context_async(query)
+    prompt = TOOL_PROMPTS[name].format(context=context, query=query)
+    return await generate_response_from_prompt_async(prompt, query=query, scope=name)
+
+
+async def analyze_async(query: str, names: List[str],
+                        concurrency: Optional[int] = None) -> AsyncIterator[Tuple[str, str, float]]:
+    """
+    Runs several tools on the same question: the context is retrieved once and
+    the tool prompts go to Gemini concurrently, so the wall time is about one
+    LLM call instead of len(names).
+
+    Args:
+        query: The user question.
+        names: Tool keys from TOOL_PROMPTS, e.g. ["bug_finder", "security_auditor"].
+        concurrency: Max prompts in flight. Defaults to ANALYSIS_CONCURRENCY.
+
+    Yields:
+        (name, answer, seconds) per tool, in order of completion.
+    """
+    context = await retrieve_relevant_context_async(query)
+    semaphore = asyncio.Semaphore(max(1, concurrency or ANALYSIS_CONCURRENCY))
+
+    async def run(name: str) -> Tuple[str, str, float]:
+        sink = event_sink.get()
+        if sink is not None:
+            # Each task has its own context: tag this tool's streamed tokens with its name
+            event_sink.set(lambda event, data: sink(event, {**data, "tool": name}))
+        async with semaphore:
+            start = time.perf_counter()
+            prompt = TOOL_PROMPTS[name].format(context=context, query=query)
+            answer = await generate_response_from_prompt_async(prompt, query=query, scope=name)
+            return name, answer, round(time.perf_counter() - start, 3)
+
+    tasks = [asyncio.create_task(run(name)) for name in names]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def code_explainer(query: str) -> str:
+    return run_tool("code_explainer", query)
+
+
+async def code_explainer_async(query: str) -> str:
+    return await run_tool_async("code_explainer", query)
+
+
+def bug_finder(query: str) -> str:
+    return run_tool("bug_finder", query)
+
+
+async def bug_finder_async(query: str) -> str:
+    return await run_tool_async("bug_finder", query)
+
+
+def code_reviewer(query: str) -> str:
+    return run_tool("code_reviewer", query)
+
+
+async def code_reviewer_async(query: str) -> str:
+    return await run_tool_async("code_reviewer", query)
+
+
+def doc_generator(query: str) -> str:
+    return run_tool("doc_generator", query)
+
+
+async def doc_generator_async(query: str) -> str:
+    return await run_tool_async("doc_generator", query)
+
+
+def code_modifier(query: str) -> str:
+    return run_tool("code_modifier", query)
+
+
+async def code_modifier_async(query: str) -> str:
+    return await run_tool_async("code_modifier", query)
+
+
+def performance_optimizer(query: str) -> str:
+    return run_tool("performance_optimizer", query)
+
+
+async def performance_optimizer_async(query: str) -> str:
+    return await run_tool_async("performance_optimizer", query)
+
+
+def security_auditor(query: str) -> str:
+    return run_tool("security_auditor", query)
+
+
+async def security_auditor_async(query: str) -> str:
+    return await run_tool_async("security_auditor", query)
+
+
+def test_case_generator(query: str) -> str:
+    return run_tool("test_case_generator", query)
+
+
+async def test_case_generator_async(query: str) -> str:
+    return await run_tool_async("test_case_generator", query)
+
+
+def dependency_explainer(query: str) -> str:
+    return run_tool("dependency_explainer", query)
+
+
+async def dependency_explainer_async(query: str) -> str:
+    return await run_tool_async("dependency_explainer", query)
+
+
+def architecture_mapper(query: str) -> str:
+    return run_tool("architecture_mapper", query)
+
+
+async def architecture_mapper_async(query: str) -> str:
+    return await run_tool_async("architecture_mapper", query)
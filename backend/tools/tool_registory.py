@@ -1,55 +1,80 @@
 from langchain.tools import Tool
-from tools.multi_tool import code_explainer, bug_finder , code_reviewer, doc_generator, code_modifier, performance_optimizer, security_auditor, test_case_generator, dependency_explainer, architecture_mapper
+from tools.multi_tool import (
+    code_explainer, code_explainer_async,
+    bug_finder, bug_finder_async,
+    code_reviewer, code_reviewer_async,
+    doc_generator, doc_generator_async,
+    code_modifier, code_modifier_async,
+    performance_optimizer, performance_optimizer_async,
+    security_auditor, security_auditor_async,
+    test_case_generator, test_case_generator_async,
+    dependency_explainer, dependency_explainer_async,
+    architecture_mapper, architecture_mapper_async,
+)
 
+# Each tool has a sync func and a coroutine; AgentExecutor.ainvoke awaits the coroutine
 tools = [
     Tool.from_function(
         func=code_explainer,
+        coroutine=code_explainer_async,
         name="CodeExplainer",
         description="Explains any code snippet, function, or file in simple language."
     ),
     Tool.from_function(
         func=bug_finder,
+        coroutine=bug_finder_async,
         name="BugFinder",
         description="Finds bugs, issues, or potential flaws in the given code."
     ),
     Tool.from_function(
         func=code_reviewer,
+        coroutine=code_reviewer_async,
         name="CodeReviewer",
         description="Reviews code for quality, structure, and maintainability."
     ),
     Tool.from_function(
         func=doc_generator,
+        coroutine=doc_generator_async,
         name="DocGenerator",
         description="Generates documentation or comments for the code."
     ),
     Tool.from_function(
         func=code_modifier,
+        coroutine=code_modifier_async,
         name="CodeModifier",
         description="Modifies or refactors code based on user request."
     ),
     Tool.from_function(
         func=performance_optimizer,
+        coroutine=performance_optimizer_async,
         name="PerformanceOptimizer",
         description="Optimizes the code performance."
     ),
     Tool.from_function(
         func=security_auditor,
+        coroutine=security_auditor_async,
         name="SecurityAuditor",
         description="Audits the code for security vulnerabilities."
     ),
     Tool.from_function(
         func=test_case_generator,
+        coroutine=test_case_generator_async,
         name="TestCaseGenerator",
         description="Generates unit or integration test cases."
     ),
     Tool.from_function(
         func=dependency_explainer,
+        coroutine=dependency_explainer_async,
         name="DependencyExplainer",
         description="Explains libraries, packages, or dependencies used in the code."
     ),
     Tool.from_function(
         func=architecture_mapper,
+        coroutine=architecture_mapper_async,
         name="ArchitectureMapper",
         description="Describes the architectural structure and module interaction."
     )
-]
\ No newline at end of file
+]
+
+# Agent tool name -> TOOL_PROMPTS key, e.g. "BugFinder" -> "bug_finder"
+TOOL_KEYS = {tool.name: tool.func.__name__ for tool in tools}
@@ -7,7 +7,7 @@ import { CodeViewer } from './components/CodeViewer';
 import { AgentPanel } from './components/AgentPanel';
 import { ChatBox } from './components/ChatBox';
 import { FileNode, ChatMessage, AgentResult, RepoData } from './types';
-import { cloneRepo, getFileContent, explainCode, runAgent } from './utils/api';
+import { cloneRepo, getFileContent, streamExplainCode, runAgent } from './utils/api';
 
 type TabType = 'chat' | 'file' | 'agents';
 
@@ -47,7 +47,7 @@ function App() {
       setActiveTab('file');
 
       try {
-        const content = await getFileContent(file.path);
+        const content = await getFileContent(file.path, repoData?.repoId);
         setFileContent(content);
       } catch (error) {
         console.error('Error loading file:', error);
@@ -69,15 +69,22 @@ function App() {
     setChatMessages(prev => [...prev, userMessage]);
     setIsLoadingChat(true);
 
+    const assistantId = (Date.now() + 1).toString();
+    const updateAssistant = (update: (text: string) => string) =>
+      setChatMessages(prev => {
+        const exists = prev.some(m => m.id === assistantId);
+        if (!exists) {
+          return [...prev, { id: assistantId, text: update(''), sender: 'assistant', timestamp: new Date() }];
+        }
+        return prev.map(m => (m.id === assistantId ? { ...m, text: update(m.text) } : m));
+      });
+
     try {
-      const response = await explainCode(message, fileContent);
-      const assistantMessage: ChatMessage = {
-        id: (Date.now() + 1).toString(),
-        text: response,
-        sender: 'assistant',
-        timestamp: new Date()
-      };
-      setChatMessages(prev => [...prev, assistantMessage]);
+      const finalAnswer = await streamExplainCode(message, repoData?.repoId, token => {
+        setIsLoadingChat(false);
+        updateAssistant(text => text + token);
+      });
+      updateAssistant(text => finalAnswer || text);
     } catch (error) {
       console.error('Error getting explanation:', error);
     } finally {
@@ -1,6 +1,7 @@
 import React, { useState } from 'react';
 import { ChevronRight, ChevronDown, File, Folder, FolderOpen, Info } from 'lucide-react';
 import { FileNode, RepoData } from '../types';
+import { listRepoTree } from '../utils/api';
 
 interface FileExplorerProps {
   fileTree: FileNode[];
@@ -14,14 +15,35 @@ interface FileTreeItemProps {
   onFileSelect: (file: FileNode) => void;
   selectedFile: string | null;
   level: number;
+  repoId?: string;
 }
 
-const FileTreeItem: React.FC<FileTreeItemProps> = ({ node, onFileSelect, selectedFile, level }) => {
+const FileTreeItem: React.FC<FileTreeItemProps> = ({ node, onFileSelect, selectedFile, level, repoId }) => {
   const [isExpanded, setIsExpanded] = useState(false);
+  const [children, setChildren] = useState<FileNode[] | undefined>(node.children);
+  const [hasMore, setHasMore] = useState(false);
+  const [isLoading, setIsLoading] = useState(false);
   const isSelected = selectedFile === node.path;
 
+  const loadChildren = async (offset = 0) => {
+    if (!repoId) return;
+    setIsLoading(true);
+    try {
+      const page = await listRepoTree(repoId, node.path, offset);
+      setChildren(prev => (offset === 0 ? page.entries : [...(prev || []), ...page.entries]));
+      setHasMore(page.hasMore);
+    } catch (error) {
+      console.error('Error loading folder:', error);
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
   const handleClick = () => {
     if (node.type === 'directory') {
+      if (!isExpanded && children === undefined) {
+        loadChildren();
+      }
       setIsExpanded(prev => !prev);
     } else {
       onFileSelect(node);
@@ -64,17 +86,32 @@ const FileTreeItem: React.FC<FileTreeItemProps> = ({ node, onFileSelect, selecte
         <span className="truncate font-semibold">{node.name}</span>
       </div>
 
-      {node.type === 'directory' && isExpanded && node.children && (
+      {node.type === 'directory' && isExpanded && children && (
         <div>
-          {node.children.map((child, index) => (
+          {children.map((child, index) => (
             <FileTreeItem
               key={`${child.path}-${index}`}
               node={child}
               onFileSelect={onFileSelect}
               selectedFile={selectedFile}
               level={level + 1}
+              repoId={repoId}
             />
           ))}
+          {hasMore && (
+            <div
+              className="px-2 py-1 cursor-pointer text-blue-600 hover:underline"
+              style={{ paddingLeft: `${(level + 1) * 16 + 8}px` }}
+              onClick={() => loadChildren(children.length)}
+            >
+              Show more…
+            </div>
+          )}
+        </div>
+      )}
+      {node.type === 'directory' && isExpanded && isLoading && (
+        <div className="px-2 py-1 text-gray-500" style={{ paddingLeft: `${(level + 1) * 16 + 8}px` }}>
+          Loading…
         </div>
       )}
     </div>
@@ -122,6 +159,7 @@ export const FileExplorer: React.FC<FileExplorerProps> = ({
             onFileSelect={onFileSelect}
             selectedFile={selectedFile}
             level={0}
+            repoId={repoData.repoId}
           />
         ))}
       </div>
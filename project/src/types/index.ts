@@ -4,6 +4,7 @@ export interface FileNode {
   type: 'file' | 'directory'; // Updated 'folder' to 'directory'
   path: string;
   children?: FileNode[];
+  childrenCount?: number; // Set for folders whose children load lazily
   content?: string;
 }
 
@@ -38,6 +39,7 @@ export interface AgentResult {
 
 // Basic repository data
 export interface RepoData {
+  repoId?: string;
   url: string;
   name: string;
   fileTree: FileNode[];
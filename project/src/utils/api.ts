@@ -3,23 +3,27 @@ import { FileNode, AgentResult, RepoData } from '../types/index';
 const API_BASE_URL = 'http://localhost:8000';
 
 /**
- * Recursively converts backend file tree structure into FileNode[]
+ * Converts one level of the backend file tree into FileNode[].
+ * Folders without `children` are loaded on demand via listRepoTree.
  */
 const transformFileTree = (node: Record<string, any>, currentPath = ''): FileNode[] => {
   if (!node || typeof node !== 'object' || !Array.isArray(node.children)) return [];
 
-  return node.children.map((child: Record<string, any>) => {
-    const childPath = `${currentPath}${child.name}`;
-    return {
-      name: child.name,
-      path: childPath,
-      type: child.type === 'folder' ? 'directory' : 'file',
-      children: child.type === 'folder'
-        ? transformFileTree(child, `${childPath}/`)
-        : undefined,
-      content: child.content || undefined
-    };
-  });
+  return node.children.map((child: Record<string, any>) => toFileNode(child, currentPath));
+};
+
+const toFileNode = (child: Record<string, any>, currentPath = ''): FileNode => {
+  const childPath = child.path || `${currentPath}${child.name}`;
+  return {
+    name: child.name,
+    path: childPath,
+    type: child.type === 'folder' ? 'directory' : 'file',
+    children: child.type === 'folder' && Array.isArray(child.children)
+      ? transformFileTree(child, `${childPath}/`)
+      : undefined,
+    childrenCount: child.children_count,
+    content: child.content || undefined
+  };
 };
 
 /**
@@ -46,6 +50,7 @@ export const cloneRepo = async (repoUrl: string): Promise<RepoData> => {
     const repoName = urlParts[1];
 
     const repoInfo: RepoData = {
+      repoId: data.repo_id,
       name: repoName,
       owner,
       url: repoUrl,
@@ -66,14 +71,45 @@ export const cloneRepo = async (repoUrl: string): Promise<RepoData> => {
 };
 
 /**
- * Fetch content of a specific file
+ * List one folder of an indexed repository (one page, folders first)
+ */
+export const listRepoTree = async (
+  repoId: string,
+  path = '',
+  offset = 0
+): Promise<{ entries: FileNode[]; hasMore: boolean }> => {
+  const query = `path=${encodeURIComponent(path)}&offset=${offset}`;
+  const response = await fetch(`${API_BASE_URL}/repos/${encodeURIComponent(repoId)}/tree?${query}`);
+
+  if (!response.ok) {
+    const errorData = await response.json();
+    throw new Error(errorData.detail || 'Failed to list folder');
+  }
+
+  const data = await response.json();
+  return {
+    entries: data.entries.map((entry: Record<string, any>) => toFileNode(entry)),
+    hasMore: data.has_more
+  };
+};
+
+/**
+ * Fetch content of a specific file, optionally just a range of lines (1-based, inclusive)
  */
-export const getFileContent = async (filePath: string): Promise<string> => {
+export const getFileContent = async (
+  filePath: string,
+  repoId?: string,
+  lines?: { start: number; end?: number }
+): Promise<string> => {
   try {
-    const fullPath = `./temp/cloned_repo/${filePath}`;
-    const response = await fetch(
-      `${API_BASE_URL}/view-file?file_path=${encodeURIComponent(fullPath)}`
-    );
+    let query = repoId
+      ? `repo_id=${encodeURIComponent(repoId)}&file_path=${encodeURIComponent(filePath)}`
+      : `file_path=${encodeURIComponent(`./temp/cloned_repo/${filePath}`)}`;
+    if (lines) {
+      query += `&start_line=${lines.start}`;
+      if (lines.end) query += `&end_line=${lines.end}`;
+    }
+    const response = await fetch(`${API_BASE_URL}/view-file?${query}`);
 
     if (!response.ok) {
       const errorData = await response.json();
@@ -92,13 +128,14 @@ export const getFileContent = async (filePath: string): Promise<string> => {
  */
 export const explainCode = async (
   question: string,
-  fileContext: string
+  fileContext: string,
+  repoId?: string
 ): Promise<string> => {
   try {
     const response = await fetch(`${API_BASE_URL}/chat`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ query: question })
+      body: JSON.stringify({ query: question, repo_id: repoId })
     });
 
     if (!response.ok) {
@@ -114,6 +151,60 @@ export const explainCode = async (
   }
 };
 
+/**
+ * Ask a question and stream the answer via Server-Sent Events.
+ * `onToken` receives answer text as it is generated; resolves with the final answer.
+ */
+export const streamExplainCode = async (
+  question: string,
+  repoId: string | undefined,
+  onToken: (text: string) => void,
+  onStep?: (event: string, data: Record<string, any>) => void
+): Promise<string> => {
+  const response = await fetch(`${API_BASE_URL}/chat/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ query: question, repo_id: repoId })
+  });
+
+  if (!response.ok || !response.body) {
+    throw new Error('Failed to get AI response');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let finalAnswer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      const message = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf('\n\n');
+
+      const event = message.match(/^event: (.*)$/m)?.[1] ?? 'message';
+      const data = JSON.parse(message.match(/^data: (.*)$/m)?.[1] ?? '{}');
+
+      if (event === 'token') {
+        onToken(data.text);
+      } else if (event === 'final') {
+        finalAnswer = data.answer;
+      } else if (event === 'error') {
+        throw new Error(data.message);
+      } else {
+        onStep?.(event, data);
+      }
+    }
+  }
+
+  return finalAnswer;
+};
+
 /**
  * Run an AI agent like bugFinder, reviewer, or docgen
  * Placeholder: not implemented in backend yet